@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark results files (see run.py) and exit with status 1 if any benchmark's
+throughput dropped by more than the threshold
+
+    python benchmarks/compare.py baseline.json results.json --threshold 0.2
+"""
+import json
+import sys
+
+import click
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> (list[str], list[str]):
+    """
+    :return: report lines, and names of benchmarks whose throughput regressed beyond threshold
+    """
+    lines = [f'{"benchmark":40} {"baseline":>14} {"current":>14} {"change":>8}']
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        baseline_result = baseline['results'].get(name)
+        if baseline_result is None or not baseline_result.get('items_per_second') or not result.get('items_per_second'):
+            lines.append(f'{name:40} {"-":>14} {result.get("items_per_second") or 0:14.1f} {"new":>8}')
+            continue
+        change = result['items_per_second'] / baseline_result['items_per_second'] - 1
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        lines.append(f'{name:40} {baseline_result["items_per_second"]:14.1f} {result["items_per_second"]:14.1f} '
+                     f'{change:+8.1%}{flag}')
+    return lines, regressions
+
+
+@click.command()
+@click.argument('baseline', type=click.File('rt'))
+@click.argument('current', type=click.File('rt'))
+@click.option('--threshold', default=0.2, type=click.FloatRange(min=0), help='Maximum allowed drop in throughput (0.2 = 20%)')
+def compare(baseline, current, threshold):
+    """Compare benchmark results against a baseline"""
+    baseline_data = json.loads(baseline.read())
+    current_data = json.loads(current.read())
+    if baseline_data.get('quick') != current_data.get('quick'):
+        print('Warning: comparing quick and full benchmark runs', file=sys.stderr)
+
+    lines, regressions = compare_results(baseline_data, current_data, threshold)
+    print('\n'.join(lines))
+    if len(regressions) > 0:
+        print(f'\n{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    compare()
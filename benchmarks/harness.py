@@ -0,0 +1,142 @@
+"""
+Minimal benchmark harness for the dart cli: benchmarks register with @benchmark, build
+their synthetic inputs, and time their hot path with Bench.measure. Results are written as
+JSON (see run.py) so that runs can be compared (see compare.py).
+"""
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+BENCHMARKS: list[(str, Callable[['Bench'], None])] = []
+
+
+def benchmark(group: str):
+    """Register a benchmark function taking a Bench; group is used for --filter"""
+    def register(f):
+        BENCHMARKS.append((group, f))
+        return f
+    return register
+
+
+class Bench:
+    def __init__(self, quick: bool, repeat: int, work_dir: str):
+        self.quick = quick
+        self.repeat = repeat
+        self.work_dir = work_dir
+        self.results: dict[str, dict] = {}
+
+    def size(self, quick: int, full: int) -> int:
+        return quick if self.quick else full
+
+    def path(self, *parts: str) -> str:
+        path = os.path.join(self.work_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def measure(self, name: str, run: Callable[[], None], items: int, unit: str, repeat: int = None) -> None:
+        """Time run (which processes items units of work) repeat times and record the median"""
+        seconds = []
+        for _ in range(self.repeat if repeat is None else repeat):
+            start_time = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - start_time)
+        median = statistics.median(seconds)
+        self.results[name] = {
+            'unit': unit,
+            'items': items,
+            'seconds': seconds,
+            'median_seconds': median,
+            'min_seconds': min(seconds),
+            'items_per_second': items / median if median > 0 else None,
+        }
+        print(f'{name:40} {items / median:14.1f} {unit}/s  (median {median:.3f}s over {len(seconds)} runs)',
+              file=sys.stderr)
+
+
+def run_cli(args: list[str]) -> None:
+    """Run a dart command in this process, discarding its output"""
+    from dart_cli.cli.dart import cli
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        cli.main(args=args, prog_name='dart', standalone_mode=False)
+
+
+@contextlib.contextmanager
+def fake_dart_service(profile_name: str, seed_docs: int = 0, **profile_overrides):
+    """
+    Run a fake DART service (dart dev fake-server) in a background thread, and save a
+    configuration profile pointing at it
+    """
+    from dart_cli.dart_context.dart_context import DartContext
+    from dart_cli.dev.fake_server import FakeDartServer, configure_fake_environment, load_profiles
+
+    profiles = load_profiles('fast', profile_overrides, None)
+    server = FakeDartServer(('127.0.0.1', 0), profiles, seed_docs=seed_docs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    context = DartContext()
+    configure_fake_environment(context, '127.0.0.1', server.server_address[1], False)
+    context.save_profile(profile_name)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_raw_corpus(directory: str, count: int, size: int, files_per_dir: int = 1000) -> list[str]:
+    """Write count distinct documents of about size bytes, spread over subdirectories"""
+    paths = []
+    filler = b'lorem ipsum dolor sit amet ' * (size // 27 + 1)
+    for i in range(count):
+        sub_dir = os.path.join(directory, f'{i // files_per_dir:04d}')
+        if i % files_per_dir == 0:
+            os.makedirs(sub_dir, exist_ok=True)
+        path = os.path.join(sub_dir, f'doc-{i}.txt')
+        with open(path, 'wb') as doc_file:
+            doc_file.write(f'document {i}\n'.encode('utf-8') + filler[:size])
+        paths.append(path)
+    return paths
+
+
+def make_cdr_corpus(directory: str, count: int, text_size: int = 2000, files_per_dir: int = 1000) -> list[str]:
+    """Write count CDR files with labels and teams, returning their document ids"""
+    doc_ids = []
+    for i in range(count):
+        sub_dir = os.path.join(directory, f'{i // files_per_dir:04d}')
+        if i % files_per_dir == 0:
+            os.makedirs(sub_dir, exist_ok=True)
+        doc_id = hashlib.md5(f'cdr-{i}'.encode('utf-8')).hexdigest()
+        cdr = {
+            'document_id': doc_id,
+            'team': ['alpha', 'beta', 'gamma'][i % 3],
+            'labels': [f'label-{i % 10}', 'benchmark'],
+            'extracted_text': ('lorem ipsum ' * (text_size // 12 + 1))[:text_size],
+            'extracted_metadata': {'Title': f'Document {i}', 'Pages': i % 50},
+        }
+        with open(os.path.join(sub_dir, f'{doc_id}.cdr'), 'wt') as cdr_file:
+            cdr_file.write(json.dumps(cdr))
+        doc_ids.append(doc_id)
+    return doc_ids
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Run the cli benchmark suite and write its results as JSON
+
+    python benchmarks/run.py --quick --output results.json
+"""
+import json
+import os
+import sys
+import tempfile
+
+import click
+
+from harness import BENCHMARKS, Bench, environment_info
+import suite  # registers benchmarks
+
+
+@click.command()
+@click.option('--quick', is_flag=True, default=False, help='Use small corpora (for CI and smoke tests)')
+@click.option('--repeat', default=3, type=click.IntRange(min=1), help='Number of timed runs of each benchmark')
+@click.option('-k', '--filter', 'groups', multiple=True, help='Only run benchmark groups with this name (can be used multiple times)')
+@click.option('-o', '--output', default=None, help='File to write JSON results to (default stdout)')
+@click.option('--work-dir', default=None, help='Directory for synthetic corpora (default: a temporary directory)')
+def run(quick, repeat, groups, output, work_dir):
+    """Run the cli benchmark suite"""
+    with tempfile.TemporaryDirectory(prefix='dart-bench-') as tmp_dir:
+        bench_dir = tmp_dir if work_dir is None else work_dir
+        # Keep profiles, token caches and rate limit state out of the real home directory
+        os.environ['HOME'] = bench_dir
+        bench = Bench(quick, repeat, bench_dir)
+        for group, benchmark_function in BENCHMARKS:
+            if len(groups) == 0 or group in groups:
+                benchmark_function(bench)
+
+    results = {**environment_info(), 'quick': quick, 'results': bench.results}
+    if output is None:
+        json.dump(results, sys.stdout, indent=4)
+    else:
+        with open(output, 'wt') as output_file:
+            json.dump(results, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    run()
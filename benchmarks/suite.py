@@ -0,0 +1,112 @@
+"""Benchmarks of the cli's hot paths (run with benchmarks/run.py)"""
+import io
+import json
+import os
+import subprocess
+import sys
+
+from harness import Bench, benchmark, fake_dart_service, make_cdr_corpus, make_raw_corpus, run_cli
+
+
+@benchmark('forklift')
+def forklift_submit(bench: Bench):
+    count = bench.size(500, 5000)
+    input_dir = bench.path('forklift', 'input', '')
+    make_raw_corpus(input_dir, count, 2000)
+
+    with fake_dart_service('bench-forklift'):
+        bench.measure('forklift.submit',
+                      lambda: run_cli(['-p', 'bench-forklift', 'forklift', 'submit', '--input-dir', input_dir,
+                                       '--ignore-meta-files', '--no-progress']),
+                      count, 'files')
+        bench.measure('forklift.submit-prep-workers',
+                      lambda: run_cli(['-p', 'bench-forklift', 'forklift', 'submit', '--input-dir', input_dir,
+                                       '--ignore-meta-files', '--no-progress', '--prep-workers', '2']),
+                      count, 'files')
+
+
+@benchmark('retrieve')
+def retrieve(bench: Bench):
+    count = bench.size(200, 2000)
+    with fake_dart_service('bench-retrieve', seed_docs=count, payload_size=20000) as server:
+        doc_ids = sorted(server.documents)
+        ids_file = bench.path('retrieve', 'ids.txt')
+        with open(ids_file, 'wt') as ids_file_ptr:
+            ids_file_ptr.write('\n'.join(doc_ids))
+        cdrs_dir = bench.path('retrieve', 'cdrs', '')
+        raws_dir = bench.path('retrieve', 'raws', '')
+
+        bench.measure('retrieve.cdrs',
+                      lambda: run_cli(['-p', 'bench-retrieve', 'retrieve', 'cdrs', '-f', ids_file, '-o', cdrs_dir]),
+                      count, 'docs')
+        bench.measure('retrieve.raws',
+                      lambda: run_cli(['-p', 'bench-retrieve', 'retrieve', 'raws', '-o', raws_dir, *doc_ids]),
+                      count, 'docs')
+
+
+@benchmark('corpex')
+def corpex_shave(bench: Bench):
+    count = bench.size(20000, 200000)
+    with fake_dart_service('bench-corpex', seed_docs=count):
+        bench.measure('corpex.shave',
+                      lambda: run_cli(['-p', 'bench-corpex', 'corpex', 'shave', '-q', '{"queries": []}', str(count)]),
+                      count, 'ids')
+
+
+@benchmark('local')
+def local_commands(bench: Bench):
+    count = bench.size(2000, 100000)
+    cdr_dir = bench.path('local', 'cdrs', '')
+    doc_ids = make_cdr_corpus(cdr_dir, count)
+    ids_file = bench.path('local', 'ids.txt')
+    with open(ids_file, 'wt') as ids_file_ptr:
+        ids_file_ptr.write('\n'.join(doc_ids[::10]))
+    output_dir = bench.path('local', 'filtered', '')
+
+    bench.measure('local.filter-cdrs',
+                  lambda: run_cli(['local', 'filter-cdrs', '--doc-ids-file', ids_file, '--label', 'label-3',
+                                   '--input-dir', cdr_dir, '--output-dir', output_dir]),
+                  count, 'files')
+    bench.measure('local.list-ids',
+                  lambda: run_cli(['local', 'list-ids', '--input-dir', cdr_dir, '-o', bench.path('local', 'list.txt')]),
+                  count, 'files')
+    bench.measure('local.hash',
+                  lambda: run_cli(['local', 'hash', '--input-dir', cdr_dir]),
+                  count, 'files')
+
+
+@benchmark('messages')
+def message_printing(bench: Bench):
+    from dart_cli.dart_kafka.message_printer import JsonMessagePrinter, SimpleMessagePrinter
+
+    count = bench.size(5000, 50000)
+    messages = [(f'key-{i}', json.dumps({'document_id': f'doc-{i}',
+                                         'labels': ['a', 'b'],
+                                         'annotations': [{'label': 'qntfy-ner', 'content': list(range(20))}],
+                                         'extracted_metadata': {'Title': f'Title {i}', 'Author': 'Author'}}))
+                for i in range(count)]
+
+    def print_all(printer):
+        for key, value in messages:
+            printer.print_message(key, value)
+
+    def json_printer():
+        return JsonMessagePrinter(['document_id', 'extracted_metadata.Title'], ['annotations'],
+                                  SimpleMessagePrinter(True, True, False, io.StringIO()))
+
+    bench.measure('messages.simple', lambda: print_all(SimpleMessagePrinter(True, True, True, io.StringIO())),
+                  count, 'messages')
+    bench.measure('messages.json', lambda: print_all(json_printer()), count, 'messages')
+
+
+@benchmark('startup')
+def cli_startup(bench: Bench):
+    def start(args: list[str]):
+        subprocess.run([sys.executable, '-W', 'ignore', '-c', 'import sys; from dart_cli.cli.dart import cli; cli(sys.argv[1:])',
+                        *args],
+                       stdout=subprocess.DEVNULL, check=True, env={**os.environ, 'HOME': bench.work_dir})
+
+    repeat = bench.size(5, 20)
+    bench.measure('startup.help', lambda: start(['--help']), 1, 'starts', repeat=repeat)
+    bench.measure('startup.forklift-submit-help', lambda: start(['forklift', 'submit', '--help']), 1, 'starts',
+                  repeat=repeat)
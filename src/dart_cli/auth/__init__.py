@@ -1,15 +1,15 @@
 import click
 
-from dart_cli.auth import retrieve_token
 from dart_cli.dart_context.dart_context import DartContext
 
 from dart_cli.cli.global_options import dart_options, pass_dart_context
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='auth')
+@click.group(name='auth', cls=LazyGroup, lazy_subcommands={
+    'retrieve-token': 'dart_cli.auth.retrieve_token:command',
+})
 @dart_options
 @pass_dart_context
 def command(context : DartContext):
     """Commands for managing DART authentication/authorization"""
-
-command.add_command(retrieve_token.command)
@@ -2,7 +2,8 @@ import click
 
 from dart_cli.cli.global_options import dart_options, pass_dart_context
 from dart_cli.dart_context.dart_context import DartContext
-from dart_cli.utilities.auth import update_token
+from dart_cli.utilities.auth import update_token, dart_token_cache_key
+from dart_cli.utilities.token_cache import store_token
 
 
 @click.command(name='retrieve-token')
@@ -14,3 +15,5 @@ def command(context : DartContext, decode_only, decode):
     """Update token used to authenticate/authorize DART services"""
     new_token = update_token(context, not decode_only, decode or decode_only)
     context.auth_config.dart_auth_config.update_token(new_token)
+    if new_token is not None:
+        store_token(dart_token_cache_key(context), new_token)
@@ -1,5 +1,4 @@
 import click
-from dart_cli.utilities.aws import query_metadata
 
 from dart_cli.dart_context.dart_context import DartContext
 
@@ -555,6 +554,8 @@ def query_metadata_option(f):
     def callback(ctx, param, value):
         state: DartContext = ctx.ensure_object(DartContext)
         if value:
+            # boto3 is only needed here, so only import it when the flag is used
+            from dart_cli.utilities.aws import query_metadata
             query_metadata(state)
         return value
 
@@ -567,6 +568,128 @@ def query_metadata_option(f):
                         callback=callback)(f)
 
 
+def max_retries_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.retry_config.set_max_retries(value)
+        return value
+
+    return click.option('--max-retries',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.IntRange(min=0),
+                        help='Maximum number of times to retry a DART REST call that failed with a transient error (connection error, 429, 502, 503, 504)',
+                        callback=callback)(f)
+
+
+def retry_backoff_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.retry_config.set_retry_backoff(value)
+        return value
+
+    return click.option('--retry-backoff',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.FloatRange(min=0),
+                        help='Base delay in seconds before retrying a failed call (doubles with each attempt, with random jitter)',
+                        callback=callback)(f)
+
+
+def retry_max_backoff_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.retry_config.set_retry_max_backoff(value)
+        return value
+
+    return click.option('--retry-max-backoff',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.FloatRange(min=0),
+                        help='Maximum delay in seconds before retrying a failed call (also caps Retry-After)',
+                        callback=callback)(f)
+
+
+def retry_budget_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.retry_config.set_retry_budget(value)
+        return value
+
+    return click.option('--retry-budget',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.FloatRange(min=0),
+                        help='Maximum retries per command as a fraction of its requests (e.g., 0.2 allows one retry per five requests)',
+                        callback=callback)(f)
+
+
+def max_rps_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.rate_limit_config.set_max_rps(value)
+        return value
+
+    return click.option('--max-rps',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.FloatRange(min=0, min_open=True),
+                        help='Maximum DART REST requests per second, shared by all dart processes on this host',
+                        callback=callback)(f)
+
+
+def max_bytes_per_sec_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            state.rate_limit_config.set_max_bytes_per_sec(value)
+        return value
+
+    return click.option('--max-bytes-per-sec',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.FloatRange(min=0, min_open=True),
+                        help='Maximum bytes per second sent to and received from DART REST services, shared by all dart processes on this host',
+                        callback=callback)(f)
+
+
+def metrics_out_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            recorder = state.enable_metrics()
+            ctx.call_on_close(lambda: recorder.write_summary(value))
+        return value
+
+    return click.option('--metrics-out',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.Path(dir_okay=False, writable=True),
+                        help='Write a JSON summary of DART REST calls (counts, throughput, latency percentiles and errors per endpoint) to this file',
+                        callback=callback)(f)
+
+
+def metrics_prometheus_option(f):
+    def callback(ctx, param, value):
+        state: DartContext = ctx.ensure_object(DartContext)
+        if value is not None:
+            recorder = state.enable_metrics()
+            ctx.call_on_close(lambda: recorder.write_prometheus(value))
+        return value
+
+    return click.option('--metrics-prometheus',
+                        is_eager=False,
+                        expose_value=False,
+                        type=click.Path(dir_okay=False, writable=True),
+                        help='Write metrics of DART REST calls to this file in Prometheus textfile format',
+                        callback=callback)(f)
+
+
 def dart_options(f):
     f = profile_option(f)
     f = env_option(f)
@@ -609,4 +732,12 @@ def dart_options(f):
     f = project_id_option(f)
     f = pipeline_version_option(f)
     f = query_metadata_option(f)
+    f = max_retries_option(f)
+    f = retry_backoff_option(f)
+    f = retry_max_backoff_option(f)
+    f = retry_budget_option(f)
+    f = max_rps_option(f)
+    f = max_bytes_per_sec_option(f)
+    f = metrics_out_option(f)
+    f = metrics_prometheus_option(f)
     return f
@@ -0,0 +1,32 @@
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    Click group that resolves its subcommands only when they are looked up, so that
+    invoking one command does not import the dependencies of every other command.
+    Subcommands are registered as a mapping of command name to 'module.path:attribute'
+    """
+
+    def __init__(self, *args, lazy_subcommands: dict[str, str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = {} if lazy_subcommands is None else lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name in self.lazy_subcommands:
+            self.add_command(self.__load_command(cmd_name), cmd_name)
+            del self.lazy_subcommands[cmd_name]
+        return super().get_command(ctx, cmd_name)
+
+    def __load_command(self, cmd_name: str) -> click.Command:
+        import_path = self.lazy_subcommands[cmd_name]
+        module_name, attr_name = import_path.split(':')
+        cmd = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(cmd, click.Command):
+            raise ValueError(f'lazy subcommand {cmd_name} ({import_path}) is not a click command')
+        return cmd
@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Modules that only specific commands need, and that must never be loaded by the command tree itself
+HEAVY_MODULES = ['boto3', 'botocore', 'docker', 'dockerpty', 'kafka', 'jwt', 'requests']
+
+# Maximum number of modules a command may import on top of click itself
+IMPORT_BUDGET = 60
+
+PROBE_SCRIPT = '''
+import json
+import sys
+
+import click
+baseline = set(sys.modules)
+
+from dart_cli.cli.dart import cli
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+
+sys.stdout.flush()
+print(json.dumps(sorted(set(sys.modules) - baseline)), file=sys.stderr)
+'''
+
+
+def imported_modules(args: list[str]) -> list[str]:
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', PROBE_SCRIPT, *args],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('args', [['--help'], ['local', 'hash', __file__]])
+def test_command_import_budget(args):
+    modules = imported_modules(args)
+    loaded_heavy = [m for m in HEAVY_MODULES if m in modules]
+    assert loaded_heavy == [], f'dart {" ".join(args)} loaded {loaded_heavy}'
+    assert len(modules) <= IMPORT_BUDGET, f'dart {" ".join(args)} imported {len(modules)} modules: {modules}'
@@ -1,17 +1,16 @@
 import click
 
 from dart_cli.cli.global_options import pass_dart_context, dart_options
-from dart_cli.corpex import shave
-from dart_cli.corpex import search, aggregate
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='corpex')
+@click.group(name='corpex', cls=LazyGroup, lazy_subcommands={
+    'search': 'dart_cli.corpex.search:search_command',
+    'count': 'dart_cli.corpex.search:count_command',
+    'shave': 'dart_cli.corpex.shave:command',
+    'aggregate': 'dart_cli.corpex.aggregate:aggregate_command',
+})
 @dart_options
 @pass_dart_context
 def command(ctx):
     """Commands for searching the DART collection"""
-
-command.add_command(search.search_command)
-command.add_command(search.count_command)
-command.add_command(shave.command)
-command.add_command(aggregate.aggregate_command)
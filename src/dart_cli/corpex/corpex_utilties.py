@@ -1,15 +1,13 @@
-import requests
 import json
 
 from dart_cli.dart_context.dart_context import DartContext
 
 from dart_cli.utilities import url
-from dart_cli.utilities.auth import generate_auth_headers
 
 
 def start_scroll(dart_context: DartContext, query):
     scroll_url = 'http://' + url.get_host('search', dart_context) + ':9200/cdr_search/_search?scroll=1m'
-    return requests.post(scroll_url, json=json.loads(query))
+    return dart_context.rest_client().post(scroll_url, auth=False, json=json.loads(query))
 
 def continue_scroll(dart_context: DartContext, scroll_id):
     json_data = {
@@ -17,37 +15,53 @@ def continue_scroll(dart_context: DartContext, scroll_id):
         'scroll_id': scroll_id,
     }
     scroll_url = 'http://' + url.get_host('search', dart_context) + ':9200/_search/scroll'
-    return requests.post(scroll_url, json=json_data)
+    return dart_context.rest_client().post(scroll_url, auth=False, json=json_data)
 
 def search(dart_context: DartContext, query):
     search_url = url.get_base_url('corpex', dart_context) + '/search'
-    auth_headers = generate_auth_headers(dart_context)
-    with requests.post(search_url, json=query, headers=auth_headers) as response:
+    with dart_context.rest_client().post(search_url, json=query) as response:
         if response.status_code != 200:
             raise Exception(f'Search status: {response.status_code}:\n{response.text}')
         return response.json()
 
 def count(dart_context: DartContext, query):
     search_url = url.get_base_url('corpex', dart_context) + '/search/count'
-    auth_headers = generate_auth_headers(dart_context)
-    with requests.post(search_url, json=query, headers=auth_headers) as response:
+    with dart_context.rest_client().post(search_url, json=query) as response:
         if response.status_code != 200:
             raise Exception(f'Count status: {response.status_code}:\n{response.text}')
         return response.json()['num_results']
 
 def shave(dart_context: DartContext, query, take):
     search_url = url.get_base_url('corpex', dart_context) + '/search/shave?take=' + str(take)
-    auth_headers = generate_auth_headers(dart_context)
 
     if len(dart_context.tenants()) > 0:
         query['tenant_id'] = dart_context.tenants()[0]
 
-    with requests.post(search_url, json=query, headers=auth_headers) as response:
+    with dart_context.rest_client().post(search_url, json=query) as response:
         if response.status_code != 200:
             raise Exception(f'Count status: {response.status_code}:\n{response.text}')
         for doc_id in response.json():
             print(doc_id)
 
+def existing_document_ids(dart_context: DartContext, doc_ids: list[str], tenant_id: str = None) -> set[str]:
+    """Return which of doc_ids are in DART (in tenant_id if given), using a single corpex shave"""
+    search_url = url.get_base_url('corpex', dart_context) + '/search/shave?take=' + str(len(doc_ids))
+    query = {
+        'queries': [{
+            'query_type': 'TERM',
+            'bool_type': 'FILTER',
+            'queried_fields': ['cdr.document_id'],
+            'term_values': doc_ids,
+        }]
+    }
+    if tenant_id is not None:
+        query['tenant_id'] = tenant_id
+
+    with dart_context.rest_client().post(search_url, json=query) as response:
+        if response.status_code != 200:
+            raise Exception(f'Shave status: {response.status_code}:\n{response.text}')
+        return set(response.json())
+
 def aggregate_corpus(dart_context: DartContext, corpex_query, aggs):
     """Submit and return aggregation over corpex-filtered collection"""
     search_url = url.get_base_url('corpex', dart_context) + '/search'
@@ -58,9 +72,7 @@ def aggregate_corpus(dart_context: DartContext, corpex_query, aggs):
         'queries': corpex_query['queries'],
         'aggregations': aggs
     }
-
-    auth_headers = generate_auth_headers(dart_context)
-    with requests.post(search_url, json=query, headers=auth_headers) as response:
+    with dart_context.rest_client().post(search_url, json=query) as response:
         if response.status_code != 200:
             raise Exception(f'Search status: {response.status_code}:\n{response.text}')
         return response.json()
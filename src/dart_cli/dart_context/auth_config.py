@@ -3,7 +3,6 @@ from abc import ABC, abstractmethod
 from typing import Callable
 
 from dart_cli.dart_context.dart_config import DartConfig, DartConfigException
-from dart_cli.utilities.auth import update_token
 
 
 class AuthConfigType(DartConfig, ABC):
@@ -130,11 +129,13 @@ class DartAuthConfigType(AuthConfigType):
 
     def auth_headers(self, dart_context: 'DartContext') -> dict[str, str]:
         if self.token is None:
-            self.refresh_auth(dart_context)
+            from dart_cli.utilities.auth import cached_dart_token
+            self.token = cached_dart_token(dart_context)
         return {'Authorization': f'Bearer {self.token}'}
 
     def refresh_auth(self, dart_context: 'DartContext') -> None:
-        new_token = update_token(dart_context, False, False)
+        from dart_cli.utilities.auth import cached_dart_token
+        new_token = cached_dart_token(dart_context, stale_token=self.token)
         if new_token is not None:
             self.token = new_token
 
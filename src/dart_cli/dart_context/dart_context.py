@@ -1,12 +1,14 @@
 import json
 import os
-from typing import Callable
+from typing import Callable, Optional
 
 from dart_cli.dart_context.auth_config import AuthConfig
 from dart_cli.dart_context.dart_config import DartConfig, DartContextException
 from dart_cli.dart_context.dart_environment.dart_environment import DartEnvironment
 from dart_cli.dart_context.docker_config import DockerRegistryConfig
 from dart_cli.dart_context.kafka_config import KafkaConfig
+from dart_cli.dart_context.rate_limit_config import RateLimitConfig
+from dart_cli.dart_context.retry_config import RetryConfig
 
 
 DEFAULT_TENANTS = list()
@@ -17,10 +19,43 @@ class DartContext(DartConfig):
     kafka_config: KafkaConfig = KafkaConfig()
     docker_config: DockerRegistryConfig = DockerRegistryConfig()
     auth_config: AuthConfig = AuthConfig()
+    retry_config: RetryConfig = RetryConfig()
+    rate_limit_config: RateLimitConfig = RateLimitConfig()
 
     aws_profile: str = None
     ssh_key: str = None
+    profile_name: str = None  # profile loaded with from_profile (not persisted)
     __tenants = None
+    __rest_client = None
+    __metrics_recorder = None
+
+    def rest_client(self) -> 'DartRestClient':
+        """Shared client used for all calls to DART REST services (created on first use)"""
+        if self.__rest_client is None:
+            from dart_cli.dart_rest.rest_client import DartRestClient
+            self.__rest_client = DartRestClient(self)
+        return self.__rest_client
+
+    def metrics_recorder(self) -> Optional['MetricsRecorder']:
+        """Recorder of all calls made to DART REST services, or None if metrics are not enabled"""
+        return self.__metrics_recorder
+
+    def enable_metrics(self) -> 'MetricsRecorder':
+        if self.__metrics_recorder is None:
+            from dart_cli.dart_rest.metrics import MetricsRecorder, METRICS_SERVICES
+            self.__metrics_recorder = MetricsRecorder(lambda: self.__service_base_urls(METRICS_SERVICES))
+            self.rest_client().add_listener(self.__metrics_recorder.record)
+        return self.__metrics_recorder
+
+    def __service_base_urls(self, services: list[str]) -> dict[str, str]:
+        base_urls = {}
+        for service in services:
+            try:
+                base_urls[service] = self.dart_env.service_base_url(service)
+            except Exception:
+                # Service is not configured for this environment
+                pass
+        return base_urls
 
     def tenants(self) -> list:
         if self.__tenants is None:
@@ -46,6 +81,8 @@ class DartContext(DartConfig):
             'auth_config': self.auth_config,
             'kafka_config': self.kafka_config,
             'docker_config': self.docker_config,
+            'retry_config': self.retry_config,
+            'rate_limit_config': self.rate_limit_config,
         }
 
     def primitive_fields(self) -> dict[str, (Callable[[], any], Callable[[any], None])]:
@@ -63,6 +100,7 @@ class DartContext(DartConfig):
             with open(profile_path, 'rt') as profile_file:
                 profile_data = json.loads(profile_file.read())
                 self.from_dict(profile_data)
+                self.profile_name = profile_name
         except FileNotFoundError:
             raise DartContextException(f'Unable to open DART configuration profile: {profile_name}')
 
@@ -1,4 +1,3 @@
-import ssl
 from abc import ABC, abstractmethod
 from typing import Callable
 
@@ -37,7 +36,8 @@ class SaslKafkaConfigType(KafkaConfigType):
     kafka_username: str = None
     kafka_password: str = None
 
-    __ssl_context = ssl.create_default_context()
+    # Built on first use: loading the default CA bundle is slow, and most commands never talk to kafka
+    __ssl_context = None
 
     def set_username(self, un: str) -> None:
         self.kafka_username = un
@@ -45,13 +45,19 @@ class SaslKafkaConfigType(KafkaConfigType):
     def set_password(self, un: str) -> None:
         self.kafka_password = un
 
+    def ssl_context(self):
+        if self.__ssl_context is None:
+            import ssl
+            self.__ssl_context = ssl.create_default_context()
+        return self.__ssl_context
+
     def kafka_props(self) -> {}:
         return {
             'api_version': (2, 3, 1),
             'sasl_plain_username': self.kafka_username,
             'sasl_plain_password': self.kafka_password,
             'security_protocol': 'SASL_SSL',
-            'ssl_context': self.__ssl_context,
+            'ssl_context': self.ssl_context(),
             'sasl_mechanism': 'PLAIN',
         }
 
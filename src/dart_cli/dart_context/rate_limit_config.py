@@ -0,0 +1,38 @@
+from typing import Callable, Optional
+
+from dart_cli.dart_context.dart_config import DartConfig
+
+
+class RateLimitConfig(DartConfig):
+    """
+    Client-side limits on the load sent to DART REST services, shared by all threads of a
+    command and by all dart processes on the same host (see dart_rest.rate_limit.RateLimiter).
+    Limits that are not set are unlimited.
+    """
+
+    __max_rps: float = None
+    __max_bytes_per_sec: float = None
+
+    def max_rps(self) -> Optional[float]:
+        return self.__max_rps
+
+    def max_bytes_per_sec(self) -> Optional[float]:
+        return self.__max_bytes_per_sec
+
+    def is_limited(self) -> bool:
+        return self.__max_rps is not None or self.__max_bytes_per_sec is not None
+
+    def set_max_rps(self, max_rps: float) -> None:
+        self.__max_rps = float(max_rps)
+
+    def set_max_bytes_per_sec(self, max_bytes_per_sec: float) -> None:
+        self.__max_bytes_per_sec = float(max_bytes_per_sec)
+
+    def sub_config_fields(self) -> dict[str, DartConfig]:
+        return {}
+
+    def primitive_fields(self) -> dict[str, (Callable[[], any], Callable[[any], None])]:
+        return {
+            'max_rps': (lambda: self.__max_rps, lambda x: self.set_max_rps(x)),
+            'max_bytes_per_sec': (lambda: self.__max_bytes_per_sec, lambda x: self.set_max_bytes_per_sec(x)),
+        }
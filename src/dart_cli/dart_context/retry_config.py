@@ -0,0 +1,56 @@
+from typing import Callable
+
+from dart_cli.dart_context.dart_config import DartConfig
+
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_RETRY_MAX_BACKOFF = 30.0
+DEFAULT_RETRY_BUDGET = 0.2
+
+
+class RetryConfig(DartConfig):
+    """
+    Configuration for retrying failed calls to DART REST services
+    (see dart_rest.retry.RetryPolicy)
+    """
+
+    __max_retries: int = None
+    __retry_backoff: float = None
+    __retry_max_backoff: float = None
+    __retry_budget: float = None
+
+    def max_retries(self) -> int:
+        return DEFAULT_MAX_RETRIES if self.__max_retries is None else self.__max_retries
+
+    def retry_backoff(self) -> float:
+        return DEFAULT_RETRY_BACKOFF if self.__retry_backoff is None else self.__retry_backoff
+
+    def retry_max_backoff(self) -> float:
+        return DEFAULT_RETRY_MAX_BACKOFF if self.__retry_max_backoff is None else self.__retry_max_backoff
+
+    def retry_budget(self) -> float:
+        return DEFAULT_RETRY_BUDGET if self.__retry_budget is None else self.__retry_budget
+
+    def set_max_retries(self, max_retries: int) -> None:
+        self.__max_retries = int(max_retries)
+
+    def set_retry_backoff(self, backoff: float) -> None:
+        self.__retry_backoff = float(backoff)
+
+    def set_retry_max_backoff(self, max_backoff: float) -> None:
+        self.__retry_max_backoff = float(max_backoff)
+
+    def set_retry_budget(self, budget: float) -> None:
+        self.__retry_budget = float(budget)
+
+    def sub_config_fields(self) -> dict[str, DartConfig]:
+        return {}
+
+    def primitive_fields(self) -> dict[str, (Callable[[], any], Callable[[any], None])]:
+        return {
+            'max_retries': (lambda: self.__max_retries, lambda x: self.set_max_retries(x)),
+            'retry_backoff': (lambda: self.__retry_backoff, lambda x: self.set_retry_backoff(x)),
+            'retry_max_backoff': (lambda: self.__retry_max_backoff, lambda x: self.set_retry_max_backoff(x)),
+            'retry_budget': (lambda: self.__retry_budget, lambda x: self.set_retry_budget(x)),
+        }
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Seconds spent opening connections (TCP connect and TLS handshake) by the current thread
+# since the last reset; requests sent on a reused keep-alive connection add nothing
+_connect_timing = threading.local()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start_time = time.monotonic()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + time.monotonic() - start_time
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start_time = time.monotonic()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + time.monotonic() - start_time
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections record how long they take to open (see RequestAttempt.connect_time)"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+def request_body_size(request_kwargs: dict) -> int:
+    """
+    Estimate the number of bytes a request will send from its data, json and files
+    arguments (multipart and form encoding overhead is not counted)
+    """
+    size = 0
+    data = request_kwargs.get('data')
+    if isinstance(data, (bytes, str)):
+        size += len(data)
+    elif isinstance(data, dict):
+        size += sum(len(str(key)) + len(str(value)) + 2 for key, value in data.items())
+    elif hasattr(data, 'read') and hasattr(data, '__len__'):
+        size += len(data) - data.tell() if hasattr(data, 'tell') else len(data)
+    if request_kwargs.get('json') is not None:
+        size += len(json.dumps(request_kwargs['json']))
+
+    files = request_kwargs.get('files')
+    file_values = [] if not files else files.values() if isinstance(files, dict) else [value for _, value in files]
+    for value in file_values:
+        content = value[1] if isinstance(value, tuple) else value
+        if isinstance(content, (bytes, str)):
+            size += len(content)
+        elif hasattr(content, 'getbuffer'):
+            size += content.getbuffer().nbytes - content.tell()
+        elif hasattr(content, 'fileno'):
+            try:
+                size += os.fstat(content.fileno()).st_size - content.tell()
+            except (OSError, ValueError):
+                pass
+    return size
+
+
+def response_size(response: requests.Response, streamed: bool = False) -> int:
+    """Bytes received in a response (from Content-Length if its body is streamed)"""
+    if streamed:
+        try:
+            return int(response.headers.get('Content-Length', 0))
+        except ValueError:
+            return 0
+    return len(response.content or b'')
+
+
+class RequestAttempt:
+    """
+    One attempt at sending a request: its outcome (exactly one of response and error is
+    set), size, and timing. All times are in seconds; ttfb is the time until the response
+    headers were received and includes connect_time, which is 0 when a pooled connection
+    was reused. elapsed includes reading the body, unless the response is streamed.
+    """
+
+    def __init__(self,
+                 method: str,
+                 url: str,
+                 response: Optional[requests.Response],
+                 error: Optional[Exception],
+                 elapsed: float,
+                 ttfb: float,
+                 connect_time: float,
+                 bytes_sent: int,
+                 bytes_received: int):
+        self.method = method
+        self.url = url
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+        self.ttfb = ttfb
+        self.connect_time = connect_time
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+
+    def status(self) -> str:
+        """Response status code, or the name of the error that prevented a response"""
+        return type(self.error).__name__ if self.response is None else str(self.response.status_code)
+
+    def is_error(self) -> bool:
+        return self.response is None or self.response.status_code >= 400
+
+
+RequestListener = Callable[[RequestAttempt], None]
+
+
+def observed_request(session: requests.Session, method: str, url: str, listeners: list[RequestListener],
+                     **kwargs) -> RequestAttempt:
+    """
+    Send one request with session, reporting the attempt to every listener (also when it
+    fails, in which case the error is raised after reporting)
+    :param kwargs: any other arguments accepted by requests.Session.request
+    """
+    _connect_timing.seconds = 0.0
+    start_time = time.monotonic()
+    try:
+        response = session.request(method, url, **kwargs)
+    except Exception as e:
+        elapsed = time.monotonic() - start_time
+        attempt = RequestAttempt(method, url, None, e, elapsed, elapsed, _connect_timing.seconds,
+                                 request_body_size(kwargs), 0)
+        for listener in listeners:
+            listener(attempt)
+        raise
+
+    elapsed = time.monotonic() - start_time
+    try:
+        bytes_sent = int(response.request.headers.get('Content-Length', 0))
+    except ValueError:
+        bytes_sent = 0
+    attempt = RequestAttempt(method, url, response, None, elapsed, response.elapsed.total_seconds(),
+                             _connect_timing.seconds, bytes_sent, response_size(response, kwargs.get('stream', False)))
+    for listener in listeners:
+        listener(attempt)
+    return attempt
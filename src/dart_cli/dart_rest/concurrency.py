@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Callable, Optional
+
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 64
+
+# Fraction of the limit kept after a congestion signal (multiplicative decrease)
+DEFAULT_BACKOFF_RATIO = 0.5
+
+# Smoothed latency above this multiple of the baseline (uncongested) latency counts as congestion
+DEFAULT_LATENCY_TOLERANCE = 2.0
+
+# Weight of each new sample in the smoothed latency, and rate at which the baseline
+# drifts up towards recent latencies (so a baseline measured against an idle service
+# does not hold the limit down forever)
+LATENCY_SMOOTHING = 0.2
+BASELINE_DRIFT = 0.01
+
+# Latency is compared per byte sent, so that large requests are not taken for congestion. Requests
+# smaller than this are counted as this size, as their latency is mostly the service's response time
+DEFAULT_LATENCY_SIZE_FLOOR = 64 * 1024
+
+
+class AimdConcurrencyLimit:
+    """
+    Limits the number of requests in flight, adjusting the limit with additive increase /
+    multiplicative decrease (AIMD): every successful request grows the limit by 1/limit
+    (i.e., by about one per round of requests), and every congestion signal (errors, 429s,
+    5xx responses, or latency well above the baseline) cuts it by backoff_ratio. Decreases
+    are applied at most once per smoothed latency, so a burst of failures from one round of
+    requests only counts once. Latency is compared to the baseline per byte sent (with
+    requests smaller than size_floor counted as size_floor bytes), so a large request that
+    takes long to send is not a congestion signal.
+    """
+
+    def __init__(self,
+                 initial: int,
+                 floor: int = DEFAULT_MIN_CONCURRENCY,
+                 ceiling: int = DEFAULT_MAX_CONCURRENCY,
+                 backoff_ratio: float = DEFAULT_BACKOFF_RATIO,
+                 latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+                 size_floor: int = DEFAULT_LATENCY_SIZE_FLOOR,
+                 on_change: Callable[[int], None] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 1 <= floor <= ceiling:
+            raise ValueError(f'invalid concurrency bounds: floor={floor}, ceiling={ceiling}')
+        self.floor = floor
+        self.ceiling = ceiling
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.size_floor = size_floor
+        self.on_change = on_change
+        self.clock = clock
+        self.in_flight = 0
+        self.__limit = float(min(max(initial, floor), ceiling))
+        # Seconds per byte sent
+        self.__baseline_cost: Optional[float] = None
+        self.__smoothed_cost: Optional[float] = None
+        self.__smoothed_latency: Optional[float] = None
+        self.__last_decrease = float('-inf')
+        self.__condition = threading.Condition()
+
+    def limit(self) -> int:
+        return int(self.__limit)
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        with self.__condition:
+            while self.in_flight >= int(self.__limit):
+                self.__condition.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self.__condition:
+            self.in_flight -= 1
+            self.__condition.notify()
+
+    def on_success(self, latency: float, size: int = 0) -> None:
+        """Record a successful request that took latency seconds and sent size bytes"""
+        with self.__condition:
+            self.__record_latency(latency, size)
+            if self.__smoothed_cost > self.__baseline_cost * self.latency_tolerance:
+                self.__decrease()
+            else:
+                self.__set_limit(min(self.__limit + 1 / self.__limit, self.ceiling))
+
+    def on_congestion(self, latency: float = None, size: int = 0) -> None:
+        with self.__condition:
+            if latency is not None:
+                self.__record_latency(latency, size)
+            self.__decrease()
+
+    def __record_latency(self, latency: float, size: int) -> None:
+        cost = latency / max(size, self.size_floor)
+        if self.__baseline_cost is None:
+            self.__baseline_cost = cost
+            self.__smoothed_cost = cost
+            self.__smoothed_latency = latency
+            return
+        self.__smoothed_latency += LATENCY_SMOOTHING * (latency - self.__smoothed_latency)
+        self.__smoothed_cost += LATENCY_SMOOTHING * (cost - self.__smoothed_cost)
+        # Track the minimum of the smoothed cost rather than of single samples, so that one
+        # unusually fast response does not make normal jitter look like congestion
+        self.__baseline_cost = min(self.__smoothed_cost,
+                                   self.__baseline_cost + BASELINE_DRIFT * (self.__smoothed_cost - self.__baseline_cost))
+
+    def __decrease(self) -> None:
+        now = self.clock()
+        cooldown = 0.0 if self.__smoothed_latency is None else self.__smoothed_latency
+        if now - self.__last_decrease < cooldown:
+            return
+        self.__last_decrease = now
+        self.__set_limit(max(self.__limit * self.backoff_ratio, self.floor))
+
+    def __set_limit(self, limit: float) -> None:
+        previous = int(self.__limit)
+        self.__limit = limit
+        if int(limit) > previous:
+            self.__condition.notify(int(limit) - previous)
+        if int(limit) != previous and self.on_change is not None:
+            self.on_change(int(limit))
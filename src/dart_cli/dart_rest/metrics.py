@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+# Services whose base urls are used to attribute requests (others are reported by host:port)
+METRICS_SERVICES = ['forklift', 'cdr-retrieval', 'corpex', 'tenants', 'users', 'reprocess', 'keycloak']
+
+METRICS_QUANTILES = [0.5, 0.9, 0.99]
+
+# Path segments that identify a resource rather than an endpoint (document ids, numbers, uuids)
+ID_SEGMENT_PATTERN = re.compile(r'^([0-9a-fA-F]{16,}|\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+
+def percentile(sorted_values, quantile: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted sequence (None if it is empty)"""
+    if len(sorted_values) == 0:
+        return None
+    rank = max(math.ceil(quantile * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def endpoint_path(path: str) -> str:
+    """Replace id-like segments of a url path with {id}, so requests for different documents share an endpoint"""
+    segments = ['{id}' if ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split('/')]
+    path = '/'.join(segments)
+    return path if path.startswith('/') else '/' + path
+
+
+def service_endpoint(url: str, base_urls: dict[str, str]) -> (str, str):
+    """
+    Attribute a url to a service and endpoint, using the service whose base url is the
+    longest prefix of url, or the url's host:port if none match
+    """
+    url_parts = urlsplit(url)
+    plain_url = f'{url_parts.scheme}://{url_parts.netloc}{url_parts.path}'
+    best_service, best_base_url = None, ''
+    for service, base_url in base_urls.items():
+        base_url = base_url.rstrip('/')
+        if len(base_url) > len(best_base_url) and (plain_url == base_url or plain_url.startswith(base_url + '/')):
+            best_service, best_base_url = service, base_url
+    if best_service is None:
+        return url_parts.netloc, endpoint_path(url_parts.path)
+    return best_service, endpoint_path(plain_url[len(best_base_url):])
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.count = 0
+        self.statuses: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.elapsed = array('d')
+        self.ttfb = array('d')
+        self.connect_time = array('d')
+
+    def record(self, attempt: 'RequestAttempt') -> None:
+        status = attempt.status()
+        self.count += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if attempt.is_error():
+            self.errors[status] = self.errors.get(status, 0) + 1
+        self.bytes_sent += attempt.bytes_sent
+        self.bytes_received += attempt.bytes_received
+        self.elapsed.append(attempt.elapsed)
+        self.ttfb.append(attempt.ttfb)
+        self.connect_time.append(attempt.connect_time)
+
+
+def latency_summary(values) -> dict:
+    sorted_values = sorted(values)
+    summary = {f'p{round(quantile * 100)}': percentile(sorted_values, quantile) for quantile in METRICS_QUANTILES}
+    summary['mean'] = sum(sorted_values) / len(sorted_values) if len(sorted_values) > 0 else None
+    summary['max'] = sorted_values[-1] if len(sorted_values) > 0 else None
+    return summary
+
+
+def prometheus_labels(labels: dict) -> str:
+    escaped = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for key, value in labels.items()]
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def write_atomically(path: str, content: str) -> None:
+    """Write a file by renaming a complete temporary file over it (as required by Prometheus textfile collectors)"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wt') as tmp_file:
+        tmp_file.write(content)
+    os.replace(tmp_path, path)
+
+
+class MetricsRecorder:
+    """
+    Records every attempt made to DART REST services (register record as a listener of a
+    DartRestClient) and summarizes counts, throughput, latency percentiles and errors by
+    service, method and endpoint
+    """
+
+    def __init__(self, base_urls: Callable[[], dict[str, str]] = dict, clock: Callable[[], float] = time.time):
+        """
+        :param base_urls: called once, on the first recorded request, to get the base url of
+                          each service requests should be attributed to
+        """
+        self.clock = clock
+        self.start_time = clock()
+        self.__get_base_urls = base_urls
+        self.__base_urls = None
+        self.__endpoints: dict[(str, str, str), EndpointMetrics] = {}
+        self.__lock = threading.Lock()
+
+    def record(self, attempt: 'RequestAttempt') -> None:
+        with self.__lock:
+            if self.__base_urls is None:
+                self.__base_urls = self.__get_base_urls()
+            service, endpoint = service_endpoint(attempt.url, self.__base_urls)
+            key = (service, attempt.method, endpoint)
+            if key not in self.__endpoints:
+                self.__endpoints[key] = EndpointMetrics()
+            self.__endpoints[key].record(attempt)
+
+    def summary(self) -> dict:
+        with self.__lock:
+            end_time = self.clock()
+            duration = max(end_time - self.start_time, 1e-9)
+            endpoints = {}
+            errors: dict[str, int] = {}
+            for (service, method, endpoint), metrics in sorted(self.__endpoints.items()):
+                for status, count in metrics.errors.items():
+                    errors[status] = errors.get(status, 0) + count
+                endpoints[f'{service} {method} {endpoint}'] = {
+                    'service': service,
+                    'method': method,
+                    'endpoint': endpoint,
+                    'count': metrics.count,
+                    'errors': sum(metrics.errors.values()),
+                    'statuses': metrics.statuses,
+                    'requests_per_second': metrics.count / duration,
+                    'bytes_sent': metrics.bytes_sent,
+                    'bytes_received': metrics.bytes_received,
+                    'total_seconds': latency_summary(metrics.elapsed),
+                    'ttfb_seconds': latency_summary(metrics.ttfb),
+                    'connect_seconds': latency_summary(metrics.connect_time),
+                }
+            count = sum(metrics.count for metrics in self.__endpoints.values())
+            bytes_sent = sum(metrics.bytes_sent for metrics in self.__endpoints.values())
+            bytes_received = sum(metrics.bytes_received for metrics in self.__endpoints.values())
+            return {
+                'start_time': datetime.fromtimestamp(self.start_time, timezone.utc).isoformat(),
+                'end_time': datetime.fromtimestamp(end_time, timezone.utc).isoformat(),
+                'duration_seconds': duration,
+                'requests': count,
+                'errors': sum(errors.values()),
+                'error_breakdown': errors,
+                'requests_per_second': count / duration,
+                'bytes_sent': bytes_sent,
+                'bytes_received': bytes_received,
+                'bytes_per_second': (bytes_sent + bytes_received) / duration,
+                'endpoints': endpoints,
+            }
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self.__lock:
+            endpoints = sorted(self.__endpoints.items())
+
+        def metric(name: str, metric_type: str, description: str):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        metric('dart_cli_requests_total', 'counter', 'Requests made to DART REST services')
+        for (service, method, endpoint), metrics in endpoints:
+            for status, count in sorted(metrics.statuses.items()):
+                labels = {'service': service, 'method': method, 'endpoint': endpoint, 'status': status}
+                lines.append(f'dart_cli_requests_total{prometheus_labels(labels)} {count}')
+
+        for name, description, attribute in [('dart_cli_request_duration_seconds', 'Total time of requests to DART REST services', 'elapsed'),
+                                             ('dart_cli_request_ttfb_seconds', 'Time to first byte of responses from DART REST services', 'ttfb'),
+                                             ('dart_cli_request_connect_seconds', 'Time spent opening connections to DART REST services', 'connect_time')]:
+            metric(name, 'summary', description)
+            for (service, method, endpoint), metrics in endpoints:
+                labels = {'service': service, 'method': method, 'endpoint': endpoint}
+                values = getattr(metrics, attribute)
+                sorted_values = sorted(values)
+                for quantile in METRICS_QUANTILES:
+                    quantile_labels = prometheus_labels({**labels, 'quantile': quantile})
+                    lines.append(f'{name}{quantile_labels} {percentile(sorted_values, quantile)}')
+                lines.append(f'{name}_sum{prometheus_labels(labels)} {sum(values)}')
+                lines.append(f'{name}_count{prometheus_labels(labels)} {len(values)}')
+
+        for name, description, attribute in [('dart_cli_request_bytes_sent_total', 'Bytes sent to DART REST services', 'bytes_sent'),
+                                             ('dart_cli_request_bytes_received_total', 'Bytes received from DART REST services', 'bytes_received')]:
+            metric(name, 'counter', description)
+            for (service, method, endpoint), metrics in endpoints:
+                labels = {'service': service, 'method': method, 'endpoint': endpoint}
+                lines.append(f'{name}{prometheus_labels(labels)} {getattr(metrics, attribute)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_summary(self, path: str) -> None:
+        write_atomically(path, json.dumps(self.summary(), indent=4))
+
+    def write_prometheus(self, path: str) -> None:
+        write_atomically(path, self.prometheus_text())
+
+
+def merge_latency_summaries(summaries: list[tuple[int, dict]]) -> dict:
+    """
+    Combine (count, latency summary) pairs: the mean is weighted by count and the max is exact,
+    but percentiles cannot be recovered from summaries, so each is the largest of the inputs'
+    (an upper bound)
+    """
+    counted = [(count, summary) for count, summary in summaries if count > 0 and summary.get('mean') is not None]
+    if len(counted) == 0:
+        return latency_summary([])
+    merged = {key: max(summary[key] for _, summary in counted) for key in counted[0][1] if key != 'mean'}
+    merged['mean'] = sum(count * summary['mean'] for count, summary in counted) / sum(count for count, _ in counted)
+    return merged
+
+
+def merge_summaries(summaries: list[dict]) -> dict:
+    """
+    Combine metrics summaries (see MetricsRecorder.summary) of commands that ran side by side,
+    e.g. on several hosts: counts and bytes are added up, and rates are over the time from
+    the first start to the last end (see merge_latency_summaries for latencies)
+    """
+    start_time = min(datetime.fromisoformat(summary['start_time']) for summary in summaries)
+    end_time = max(datetime.fromisoformat(summary['end_time']) for summary in summaries)
+    duration = max((end_time - start_time).total_seconds(), 1e-9)
+
+    def add_up(counts: list[dict]) -> dict:
+        total = {}
+        for count in counts:
+            for key, value in count.items():
+                total[key] = total.get(key, 0) + value
+        return total
+
+    endpoints = {}
+    for key in sorted({key for summary in summaries for key in summary['endpoints']}):
+        parts = [summary['endpoints'][key] for summary in summaries if key in summary['endpoints']]
+        count = sum(part['count'] for part in parts)
+        endpoints[key] = {
+            'service': parts[0]['service'],
+            'method': parts[0]['method'],
+            'endpoint': parts[0]['endpoint'],
+            'count': count,
+            'errors': sum(part['errors'] for part in parts),
+            'statuses': add_up([part['statuses'] for part in parts]),
+            'requests_per_second': count / duration,
+            'bytes_sent': sum(part['bytes_sent'] for part in parts),
+            'bytes_received': sum(part['bytes_received'] for part in parts),
+        }
+        for latency in ['total_seconds', 'ttfb_seconds', 'connect_seconds']:
+            endpoints[key][latency] = merge_latency_summaries([(part['count'], part[latency]) for part in parts])
+
+    count = sum(summary['requests'] for summary in summaries)
+    bytes_sent = sum(summary['bytes_sent'] for summary in summaries)
+    bytes_received = sum(summary['bytes_received'] for summary in summaries)
+    errors = add_up([summary['error_breakdown'] for summary in summaries])
+    return {
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'duration_seconds': duration,
+        'requests': count,
+        'errors': sum(errors.values()),
+        'error_breakdown': errors,
+        'requests_per_second': count / duration,
+        'bytes_sent': bytes_sent,
+        'bytes_received': bytes_received,
+        'bytes_per_second': (bytes_sent + bytes_received) / duration,
+        'endpoints': endpoints,
+    }
@@ -0,0 +1,144 @@
+import binascii
+import os
+from typing import BinaryIO, Callable, Optional, Union
+
+from urllib3.fields import RequestField
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def file_size(file: BinaryIO) -> Optional[int]:
+    """Number of bytes left to read from a file object (None if it cannot be told without reading it)"""
+    try:
+        return os.fstat(file.fileno()).st_size - file.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class MultipartStream:
+    """
+    A multipart/form-data request body that is read from its parts as it is sent, so that
+    uploading a file takes a small buffer rather than the whole file in memory. Pass it as
+    the data of a request, with content_type as its Content-Type header: requests sends it
+    with a Content-Length and reads it with read(). It can be rewound with seek, so a
+    request sending it can be retried.
+
+    The headers of each part are rendered by urllib3, so the body is the same as the one
+    requests builds for the files argument.
+
+    throttle, if given, is called with the size of each chunk read before it is returned
+    (e.g. a BandwidthShaper), so the body is paced as it is sent.
+    """
+
+    def __init__(self, boundary: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, throttle: Callable[[int], None] = None):
+        self.boundary = binascii.hexlify(os.urandom(16)).decode('ascii') if boundary is None else boundary
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.chunk_size = chunk_size
+        self.throttle = throttle
+        # Each segment is bytes, or a (file, start position, size) to read from
+        self.__segments: list[Union[bytes, tuple[BinaryIO, int, int]]] = []
+        self.__length = len(self.__closing())
+        self.__position = 0
+        self.__segment_index = 0
+        self.__segment_offset = 0
+
+    def __closing(self) -> bytes:
+        return f'--{self.boundary}--\r\n'.encode('latin-1')
+
+    def __part_headers(self, name: str, filename: Optional[str], content_type: Optional[str]) -> bytes:
+        field = RequestField(name=name, data=b'', filename=filename)
+        field.make_multipart(content_type=content_type)
+        return f'--{self.boundary}\r\n'.encode('latin-1') + field.render_headers().encode('latin-1')
+
+    def add_field(self, name: str, value: Union[str, bytes], content_type: str = None, filename: str = None) -> 'MultipartStream':
+        """Add a part held in memory"""
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        self.__add(self.__part_headers(name, filename, content_type) + value + b'\r\n')
+        return self
+
+    def add_file(self, name: str, filename: str, file: BinaryIO, size: int = None, content_type: str = None) -> 'MultipartStream':
+        """
+        Add a part read from file (from its current position) while the body is sent
+        :param size: number of bytes to read from file (default: the rest of the file, which must have a fileno)
+        """
+        if size is None:
+            size = file_size(file)
+            if size is None:
+                raise ValueError(f'size of {filename} must be given, it cannot be read from the file')
+        self.__add(self.__part_headers(name, filename, content_type))
+        self.__segments.append((file, file.tell(), size))
+        self.__length += size
+        self.__add(b'\r\n')
+        return self
+
+    def __add(self, data: bytes) -> None:
+        self.__segments.append(data)
+        self.__length += len(data)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def tell(self) -> int:
+        return self.__position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.__position
+        elif whence == os.SEEK_END:
+            offset += self.__length
+        offset = min(max(offset, 0), self.__length)
+        self.__position = offset
+        self.__segment_index = 0
+        self.__segment_offset = offset
+        for segment in self.__segments:
+            segment_size = len(segment) if isinstance(segment, bytes) else segment[2]
+            if self.__segment_offset < segment_size:
+                break
+            self.__segment_offset -= segment_size
+            self.__segment_index += 1
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.__length - self.__position
+        chunks = []
+        while size > 0 and self.__segment_index <= len(self.__segments):
+            chunk = self.__read_segment(size)
+            if len(chunk) == 0:
+                self.__segment_index += 1
+                self.__segment_offset = 0
+                continue
+            chunks.append(chunk)
+            size -= len(chunk)
+            self.__position += len(chunk)
+            self.__segment_offset += len(chunk)
+        data = b''.join(chunks)
+        if self.throttle is not None:
+            self.throttle(len(data))
+        return data
+
+    def __read_segment(self, size: int) -> bytes:
+        """Read up to size bytes from the current segment (the closing boundary after the last one)"""
+        if self.__segment_index == len(self.__segments):
+            return self.__closing()[self.__segment_offset:self.__segment_offset + size]
+        segment = self.__segments[self.__segment_index]
+        if isinstance(segment, bytes):
+            return segment[self.__segment_offset:self.__segment_offset + size]
+        file, start, segment_size = segment
+        remaining = segment_size - self.__segment_offset
+        if remaining <= 0:
+            return b''
+        if file.tell() != start + self.__segment_offset:
+            file.seek(start + self.__segment_offset)
+        chunk = file.read(min(size, remaining))
+        if len(chunk) == 0:
+            raise IOError(f'file ended {remaining} bytes before its expected size')
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if len(chunk) == 0:
+                return
+            yield chunk
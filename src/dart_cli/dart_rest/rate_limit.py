@@ -0,0 +1,171 @@
+import os
+import re
+import struct
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locking available (e.g., Windows): limits still apply to all threads
+    # of a process, but not across processes
+    fcntl = None
+
+
+RATE_LIMIT_DIRNAME = 'rate-limit'
+
+# Bucket state in the shared file: available tokens and the time they were computed
+BUCKET_STATE = struct.Struct('<dd')
+
+# Burst allowed by bandwidth shaping, in seconds' worth of bytes: small, so uploads are sent at a steady rate
+SHAPING_BURST_SECONDS = 0.05
+
+
+def rate_limit_dir() -> str:
+    return os.path.join(os.getenv('HOME'), '.dart', RATE_LIMIT_DIRNAME)
+
+
+def bucket_name(url: str, kind: str) -> str:
+    """Name of the state file of a kind of limit on the host (and port) of url"""
+    url_parts = urlsplit(url)
+    host = re.sub(r'[^A-Za-z0-9.-]', '_', f'{url_parts.hostname}_{url_parts.port or url_parts.scheme}')
+    return f'{host}.{kind}'
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate tokens per second, holding up to capacity tokens. The
+    bucket is stored in a small state file, so that every process using the same file
+    draws from the same bucket. Taking more tokens than are available puts the bucket
+    in debt, and the caller waits until the debt is repaid; this lets a single cost larger
+    than the capacity (e.g., a large upload) through without starving it.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 capacity: float,
+                 state_path: str,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_path = state_path
+        self.clock = clock
+        self.sleep = sleep
+        self.__lock = threading.Lock()
+        self.__fd = None
+
+    def reserve(self, cost: float) -> float:
+        """
+        Take cost tokens from the bucket
+        :return: seconds the caller must wait before using them
+        """
+        with self.__lock:
+            fd = self.__state_fd()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                now = self.clock()
+                state = os.pread(fd, BUCKET_STATE.size, 0)
+                if len(state) == BUCKET_STATE.size:
+                    tokens, updated = BUCKET_STATE.unpack(state)
+                    tokens = min(self.capacity, tokens + max(now - updated, 0.0) * self.rate)
+                else:
+                    tokens = self.capacity
+                tokens -= cost
+                os.pwrite(fd, BUCKET_STATE.pack(tokens, now), 0)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        return max(-tokens / self.rate, 0.0)
+
+    def acquire(self, cost: float = 1) -> None:
+        wait = self.reserve(cost)
+        if wait > 0:
+            self.sleep(wait)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__fd is not None:
+                os.close(self.__fd)
+                self.__fd = None
+
+    def __state_fd(self) -> int:
+        if self.__fd is None:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            self.__fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o600)
+        return self.__fd
+
+
+class RateLimiter:
+    """
+    Limits requests per second and bytes per second sent to each DART host. Limits are
+    shared through state files in ~/.dart/rate-limit, one per host and limit, so that all
+    threads and all dart processes on this host calling the same service share one budget.
+    """
+
+    def __init__(self, max_rps: Optional[float], max_bytes_per_sec: Optional[float], state_dir: str = None):
+        self.max_rps = max_rps
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.state_dir = rate_limit_dir() if state_dir is None else state_dir
+        self.__buckets: dict[str, TokenBucket] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def from_config(rate_limit_config: 'RateLimitConfig') -> Optional['RateLimiter']:
+        """Build a limiter from a context's configuration, or None if no limit is set"""
+        if not rate_limit_config.is_limited():
+            return None
+        return RateLimiter(rate_limit_config.max_rps(), rate_limit_config.max_bytes_per_sec())
+
+    def before_request(self, url: str, body_size: int = 0) -> None:
+        """Wait until a request to url sending body_size bytes is within the limits"""
+        if self.max_rps is not None:
+            self.__bucket(url, 'requests', self.max_rps).acquire(1)
+        if self.max_bytes_per_sec is not None and body_size > 0:
+            self.__bucket(url, 'bytes', self.max_bytes_per_sec).acquire(body_size)
+
+    def after_response(self, url: str, size: int) -> None:
+        """Account for size bytes received from url (waiting if this exceeds the byte limit)"""
+        if self.max_bytes_per_sec is not None and size > 0:
+            self.__bucket(url, 'bytes', self.max_bytes_per_sec).acquire(size)
+
+    def close(self) -> None:
+        with self.__lock:
+            for bucket in self.__buckets.values():
+                bucket.close()
+            self.__buckets = {}
+
+    def __bucket(self, url: str, kind: str, rate: float) -> TokenBucket:
+        name = bucket_name(url, kind)
+        with self.__lock:
+            if name not in self.__buckets:
+                # Allow bursts of up to one second's worth of traffic
+                self.__buckets[name] = TokenBucket(rate, rate, os.path.join(self.state_dir, name))
+            return self.__buckets[name]
+
+
+class BandwidthShaper:
+    """
+    Paces the bytes of request bodies sent to a DART host at rate bytes per second, as they
+    are sent: call it with the size of each chunk before the chunk is sent (see MultipartStream).
+    Unlike RateLimiter, which lets a whole request through at once, this keeps a large upload
+    from going out in bursts. The budget is shared by all threads and all dart processes on
+    this host shaping uploads to the same DART host.
+    """
+
+    def __init__(self, url: str, rate: float, state_dir: str = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        state_dir = rate_limit_dir() if state_dir is None else state_dir
+        self.__bucket = TokenBucket(rate, rate * SHAPING_BURST_SECONDS, os.path.join(state_dir, bucket_name(url, 'upload-bytes')),
+                                    clock=clock, sleep=sleep)
+
+    def __call__(self, size: int) -> None:
+        if size > 0:
+            self.__bucket.acquire(size)
+
+    def close(self) -> None:
+        self.__bucket.close()
@@ -0,0 +1,175 @@
+import threading
+from typing import Callable, Optional
+
+import requests
+
+from dart_cli.dart_rest.attempts import RequestListener, TimedHTTPAdapter, observed_request, request_body_size
+from dart_cli.dart_rest.rate_limit import RateLimiter
+from dart_cli.dart_rest.retry import RetryPolicy
+from dart_cli.utilities.auth import generate_auth_headers
+
+
+DEFAULT_POOL_SIZE = 10
+
+
+def pooled_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Build a keep-alive session that holds up to pool_size open connections per host,
+    so that repeated calls to the same service reuse TCP/TLS connections
+    """
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=pool_size, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def request_body_rewinder(request_kwargs: dict) -> Callable[[], None]:
+    """
+    Record the current position of every file object in a request's files argument, and of
+    its data if that is a file-like object (e.g. a multipart.MultipartStream)
+    :return: function that restores those positions, so the request can be sent again
+    """
+    files = request_kwargs.get('files')
+    file_values = [] if not files else files.values() if isinstance(files, dict) else [value for _, value in files]
+    positions = []
+    data = request_kwargs.get('data')
+    if hasattr(data, 'read') and hasattr(data, 'seek') and hasattr(data, 'tell'):
+        positions.append((data, data.tell()))
+    for value in file_values:
+        file_obj = value[1] if isinstance(value, tuple) else value
+        if hasattr(file_obj, 'seek') and hasattr(file_obj, 'tell'):
+            positions.append((file_obj, file_obj.tell()))
+
+    def rewind():
+        for rewind_obj, position in positions:
+            rewind_obj.seek(position)
+
+    return rewind
+
+
+class DartRestClient:
+    """
+    Shared client for DART REST services. All calls made through it share one pooled
+    session and are sent with the auth headers of the current DART context. If a call is
+    rejected with 401, auth is refreshed (once for all threads rejected with the same
+    credentials) and the call is replayed with the new credentials. Transient failures
+    are retried according to the context's retry configuration, and every attempt is held
+    to the context's rate limits. Listeners can be added to observe the outcome, size and
+    timing of every attempt (see attempts.RequestAttempt).
+    """
+
+    def __init__(self, dart_context: 'DartContext'):
+        self.dart_context = dart_context
+        self.pool_size = DEFAULT_POOL_SIZE
+        self.__session = None
+        self.__retry_policy = None
+        self.__rate_limiter = None
+        self.__rate_limiter_loaded = False
+        self.__listeners: list[RequestListener] = []
+        self.__session_lock = threading.Lock()
+        self.__auth_lock = threading.Lock()
+
+    def set_pool_size(self, pool_size: int) -> None:
+        """
+        Size the per-host connection pools to the number of concurrent requests a command
+        will make (e.g., its --threads option)
+        """
+        with self.__session_lock:
+            self.pool_size = max(int(pool_size), 1)
+            if self.__session is not None:
+                self.__session.close()
+                self.__session = None
+
+    def session(self) -> requests.Session:
+        with self.__session_lock:
+            if self.__session is None:
+                self.__session = pooled_session(self.pool_size)
+            return self.__session
+
+    def add_listener(self, listener: RequestListener) -> None:
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener: RequestListener) -> None:
+        self.__listeners.remove(listener)
+
+    def retry_policy(self) -> RetryPolicy:
+        with self.__session_lock:
+            if self.__retry_policy is None:
+                self.__retry_policy = RetryPolicy.from_config(self.dart_context.retry_config)
+            return self.__retry_policy
+
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        with self.__session_lock:
+            if not self.__rate_limiter_loaded:
+                self.__rate_limiter = RateLimiter.from_config(self.dart_context.rate_limit_config)
+                self.__rate_limiter_loaded = True
+            return self.__rate_limiter
+
+    def request(self, method: str, url: str, headers: dict = None, auth: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request using the shared session
+        :param auth: if True, add the DART context's auth headers to the request
+        :param kwargs: any other arguments accepted by requests.Session.request
+        """
+        rewind_body = request_body_rewinder(kwargs)
+        return self.retry_policy().execute(
+            lambda: self.__send_authenticated(method, url, headers, auth, kwargs, rewind_body),
+            rewind_body,
+        )
+
+    def __send_authenticated(self, method: str, url: str, headers: dict, auth: bool, kwargs: dict,
+                             rewind_body: Callable[[], None]) -> requests.Response:
+        auth_headers = generate_auth_headers(self.dart_context) if auth else {}
+        response = self.__send(method, url, auth_headers, headers, kwargs)
+        if auth and response.status_code == 401:
+            refreshed_headers = self.__refresh_auth(auth_headers)
+            if refreshed_headers != auth_headers:
+                response.close()
+                rewind_body()
+                response = self.__send(method, url, refreshed_headers, headers, kwargs)
+        return response
+
+    def __send(self, method: str, url: str, auth_headers: dict, headers: dict, kwargs: dict) -> requests.Response:
+        all_headers = dict(auth_headers)
+        if headers is not None:
+            all_headers.update(headers)
+        rate_limiter = self.rate_limiter()
+        if rate_limiter is not None:
+            rate_limiter.before_request(url, request_body_size(kwargs))
+        attempt = observed_request(self.session(), method, url, self.__listeners, headers=all_headers, **kwargs)
+        if rate_limiter is not None:
+            rate_limiter.after_response(url, attempt.bytes_received)
+        return attempt.response
+
+    def __refresh_auth(self, rejected_headers: dict) -> dict:
+        """
+        Refresh auth unless another thread has already replaced the rejected credentials
+        :return: auth headers to use for replaying the rejected request
+        """
+        with self.__auth_lock:
+            current_headers = generate_auth_headers(self.dart_context)
+            if current_headers == rejected_headers:
+                self.dart_context.auth_config.refresh_auth(self.dart_context)
+                current_headers = generate_auth_headers(self.dart_context)
+            return current_headers
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self) -> None:
+        with self.__session_lock:
+            if self.__session is not None:
+                self.__session.close()
+                self.__session = None
+            if self.__rate_limiter is not None:
+                self.__rate_limiter.close()
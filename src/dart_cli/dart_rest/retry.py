@@ -0,0 +1,123 @@
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+from dart_cli.dart_context.retry_config import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF, DEFAULT_RETRY_MAX_BACKOFF, \
+    DEFAULT_RETRY_BUDGET
+
+# Status codes that indicate a transient condition on the server side. Any other
+# error status (in particular 4xx) is returned to the caller without retrying.
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+# Number of retries always allowed by the budget, regardless of request count
+MIN_RETRY_BUDGET = 10
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (either delay in seconds or an HTTP date) into seconds"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_date.timestamp() - time.time(), 0.0)
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of all requests made during a job, so that when a service
+    is degraded the client does not multiply its load with a retry storm
+    """
+
+    def __init__(self, ratio: float = DEFAULT_RETRY_BUDGET, min_retries: int = MIN_RETRY_BUDGET):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.__lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self.__lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Reserve a retry if the budget allows it"""
+        with self.__lock:
+            if self.retries < self.min_retries + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    """
+    Retries transient failures (connection errors and RETRY_STATUS_CODES responses) with
+    exponential backoff and full jitter, honoring Retry-After headers
+    """
+
+    def __init__(self,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_RETRY_BACKOFF,
+                 max_backoff: float = DEFAULT_RETRY_MAX_BACKOFF,
+                 budget: RetryBudget = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = RetryBudget() if budget is None else budget
+        self.sleep = sleep
+
+    @staticmethod
+    def from_config(retry_config: 'RetryConfig') -> 'RetryPolicy':
+        return RetryPolicy(max_retries=retry_config.max_retries(),
+                           backoff=retry_config.retry_backoff(),
+                           max_backoff=retry_config.retry_max_backoff(),
+                           budget=RetryBudget(retry_config.retry_budget()))
+
+    @staticmethod
+    def is_retryable_status(status_code: int) -> bool:
+        return status_code in RETRY_STATUS_CODES
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait before retry number attempt (starting at 0)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def execute(self, send: Callable[[], requests.Response], before_retry: Callable[[], None] = None) -> requests.Response:
+        """
+        Call send until it returns a non-retryable response, or until retries or the retry budget
+        are exhausted (in which case the last response is returned or the last exception raised)
+        :param send: makes one attempt at the request
+        :param before_retry: prepares the request to be sent again (e.g., rewinds file bodies)
+        """
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or not self.budget.try_spend():
+                    raise
+                retry_after = None
+            else:
+                if (not self.is_retryable_status(response.status_code)
+                        or attempt >= self.max_retries
+                        or not self.budget.try_spend()):
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+
+            self.sleep(self.delay(attempt, retry_after))
+            attempt += 1
+            if before_retry is not None:
+                before_retry()
@@ -0,0 +1,86 @@
+import threading
+
+from dart_cli.dart_rest.concurrency import AimdConcurrencyLimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_successes_grow_limit_additively_up_to_ceiling():
+    limit = AimdConcurrencyLimit(2, floor=1, ceiling=4)
+    for _ in range(3):
+        limit.on_success(0.1)
+    assert limit.limit() == 3
+
+    for _ in range(100):
+        limit.on_success(0.1)
+    assert limit.limit() == 4
+
+
+def test_congestion_halves_limit_once_per_latency_window():
+    clock = FakeClock()
+    limit = AimdConcurrencyLimit(16, floor=1, ceiling=64, clock=clock)
+    limit.on_success(1.0)
+
+    limit.on_congestion()
+    limit.on_congestion()
+    assert limit.limit() == 8
+
+    clock.now += 2.0
+    limit.on_congestion()
+    assert limit.limit() == 4
+
+
+def test_limit_never_drops_below_floor():
+    clock = FakeClock()
+    limit = AimdConcurrencyLimit(4, floor=3, ceiling=8, clock=clock)
+    for _ in range(5):
+        clock.now += 10
+        limit.on_congestion()
+    assert limit.limit() == 3
+
+
+def test_high_latency_counts_as_congestion():
+    limit = AimdConcurrencyLimit(10, floor=1, ceiling=64)
+    limit.on_success(0.1)
+    limit.on_success(1.0)
+    assert limit.limit() == 5
+
+
+def test_acquire_blocks_at_limit():
+    limit = AimdConcurrencyLimit(1, floor=1, ceiling=2)
+    limit.acquire()
+    acquired = threading.Event()
+
+    def second():
+        limit.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=second, daemon=True)
+    thread.start()
+    assert not acquired.wait(0.1)
+
+    limit.release()
+    assert acquired.wait(1)
+    limit.release()
+    assert limit.in_flight == 0
+
+
+def test_large_requests_taking_longer_are_not_congestion():
+    limit = AimdConcurrencyLimit(25, floor=1, ceiling=64)
+    for _ in range(200):
+        limit.on_success(0.05, 1024)
+    grown = limit.limit()
+    # 10 MB sent in 2s is faster per byte than the small requests
+    for _ in range(6):
+        limit.on_success(2.0, 10 * 1024 * 1024)
+    assert limit.limit() == grown
+
+    # The same latency for a small request is congestion
+    limit.on_success(2.0, 1024)
+    assert limit.limit() < grown
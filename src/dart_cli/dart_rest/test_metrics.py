@@ -0,0 +1,85 @@
+import json
+
+import pytest
+import requests
+
+from dart_cli.dart_rest.attempts import RequestAttempt
+from dart_cli.dart_rest.metrics import MetricsRecorder, merge_summaries, percentile, service_endpoint
+
+BASE_URLS = {
+    'forklift': 'http://dart:1337/dart/api/v1/forklift',
+    'cdr-retrieval': 'http://dart:8090/dart/api/v1/cdrs',
+}
+
+
+def response(status_code: int) -> requests.Response:
+    result = requests.Response()
+    result.status_code = status_code
+    return result
+
+
+def attempt(url: str, status_code: int = None, elapsed: float = 0.1) -> RequestAttempt:
+    if status_code is None:
+        return RequestAttempt('GET', url, None, requests.ConnectionError(), elapsed, elapsed, 0.0, 0, 0)
+    return RequestAttempt('GET', url, response(status_code), None, elapsed, elapsed / 2, 0.0, 10, 100)
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_urls_are_attributed_to_services_with_ids_collapsed():
+    assert service_endpoint('http://dart:8090/dart/api/v1/cdrs/raw/0123456789abcdef0123456789abcdef?date=1', BASE_URLS) \
+        == ('cdr-retrieval', '/raw/{id}')
+    assert service_endpoint('http://dart:1337/dart/api/v1/forklift/upload', BASE_URLS) == ('forklift', '/upload')
+    assert service_endpoint('http://search:9200/_search/scroll', BASE_URLS) == ('search:9200', '/_search/scroll')
+
+
+def test_summary_reports_percentiles_and_errors(tmp_path):
+    recorder = MetricsRecorder(lambda: BASE_URLS)
+    for i in range(1, 11):
+        recorder.record(attempt(f'{BASE_URLS["cdr-retrieval"]}/{i}', 200, elapsed=i / 10))
+    recorder.record(attempt(f'{BASE_URLS["forklift"]}/upload', 503))
+    recorder.record(attempt(f'{BASE_URLS["forklift"]}/upload'))
+
+    recorder.write_summary(str(tmp_path / 'metrics.json'))
+    summary = json.loads((tmp_path / 'metrics.json').read_text())
+
+    assert summary['requests'] == 12
+    assert summary['error_breakdown'] == {'503': 1, 'ConnectionError': 1}
+    retrieval = summary['endpoints']['cdr-retrieval GET /{id}']
+    assert retrieval['count'] == 10
+    assert retrieval['total_seconds']['p50'] == 0.5
+    assert retrieval['total_seconds']['p90'] == 0.9
+    assert retrieval['bytes_received'] == 1000
+
+
+def test_prometheus_text_has_counters_and_quantiles():
+    recorder = MetricsRecorder(lambda: BASE_URLS)
+    recorder.record(attempt(f'{BASE_URLS["forklift"]}/upload', 201))
+
+    text = recorder.prometheus_text()
+    assert 'dart_cli_requests_total{service="forklift",method="GET",endpoint="/upload",status="201"} 1' in text
+    assert 'dart_cli_request_duration_seconds{service="forklift",method="GET",endpoint="/upload",quantile="0.5"} 0.1' in text
+
+
+def test_merged_summaries_add_up_counts():
+    clock_times = iter([100.0, 110.0])
+    first = MetricsRecorder(lambda: BASE_URLS, clock=lambda: next(clock_times))
+    first.record(attempt(f'{BASE_URLS["forklift"]}/upload', 201, elapsed=0.2))
+    first.record(attempt(f'{BASE_URLS["forklift"]}/upload', 503, elapsed=1.0))
+    clock_times_2 = iter([105.0, 120.0])
+    second = MetricsRecorder(lambda: BASE_URLS, clock=lambda: next(clock_times_2))
+    second.record(attempt(f'{BASE_URLS["forklift"]}/upload', 201, elapsed=0.4))
+
+    merged = merge_summaries([first.summary(), second.summary()])
+    assert merged['requests'] == 3
+    assert merged['duration_seconds'] == 20.0
+    assert merged['error_breakdown'] == {'503': 1}
+    upload = merged['endpoints']['forklift GET /upload']
+    assert upload['statuses'] == {'201': 2, '503': 1}
+    assert upload['total_seconds']['mean'] == pytest.approx(1.6 / 3)
+    assert upload['total_seconds']['max'] == 1.0
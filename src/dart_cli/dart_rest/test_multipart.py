@@ -0,0 +1,75 @@
+import io
+import zipfile
+
+import pytest
+import requests
+
+from dart_cli.dart_rest.multipart import MultipartStream
+
+
+def expected_body(boundary: str, content: bytes, metadata: str) -> bytes:
+    """Body requests builds for the same upload, with its boundary replaced by boundary"""
+    request = requests.Request('POST', 'http://localhost/', files={
+        'file': ('doc.pdf', content),
+        'metadata': (None, metadata, 'application/json'),
+    }).prepare()
+    requests_boundary = request.headers['Content-Type'].split('boundary=')[1]
+    return request.body.replace(requests_boundary.encode('ascii'), boundary.encode('ascii'))
+
+
+def test_file_body_matches_requests_encoding(tmp_path):
+    content = bytes(range(256)) * 1000
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(content)
+    with open(path, 'rb') as file:
+        body = MultipartStream(boundary='b0undary', chunk_size=1000).add_file('file', 'doc.pdf', file)
+        body.add_field('metadata', '{"labels": ["a"]}', content_type='application/json')
+
+        expected = expected_body('b0undary', content, '{"labels": ["a"]}')
+        assert len(body) == len(expected)
+        assert body.content_type == 'multipart/form-data; boundary=b0undary'
+        assert b''.join(body) == expected
+
+
+def test_reads_in_bounded_chunks_and_rewinds(tmp_path):
+    content = b'x' * 10000
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(content)
+    with open(path, 'rb') as file:
+        body = MultipartStream(boundary='b').add_file('file', 'doc.pdf', file)
+        body.add_field('metadata', '{}', content_type='application/json')
+        expected = expected_body('b', content, '{}')
+
+        chunks = iter(lambda: body.read(333), b'')
+        assert all(len(chunk) <= 333 for chunk in chunks)
+        assert body.tell() == len(body)
+
+        body.seek(0)
+        assert body.read() == expected
+        body.seek(len(expected) - 20)
+        assert body.read() == expected[-20:]
+
+
+def test_unsized_file_needs_size():
+    archive_bytes = io.BytesIO()
+    with zipfile.ZipFile(archive_bytes, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('doc.pdf', b'y' * 5000)
+    with zipfile.ZipFile(archive_bytes) as archive:
+        info = archive.getinfo('doc.pdf')
+        with pytest.raises(ValueError):
+            MultipartStream().add_file('file', 'doc.pdf', archive.open(info))
+
+        body = MultipartStream(boundary='b').add_file('file', 'doc.pdf', archive.open(info), size=info.file_size)
+        body.add_field('metadata', '{}', content_type='application/json')
+        assert body.read() == expected_body('b', b'y' * 5000, '{}')
+
+
+def test_throttle_sees_every_chunk():
+    throttled = []
+    body = MultipartStream(boundary='b', chunk_size=1000, throttle=throttled.append).add_field('file', b'z' * 4500, filename='doc.pdf')
+    body.add_field('metadata', '{}', content_type='application/json')
+
+    sent = b''.join(body)
+    assert sent == expected_body('b', b'z' * 4500, '{}')
+    assert all(size <= 1000 for size in throttled)
+    assert sum(throttled) == len(body)
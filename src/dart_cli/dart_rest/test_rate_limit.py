@@ -0,0 +1,95 @@
+import io
+import threading
+
+import pytest
+
+from dart_cli.dart_rest.attempts import request_body_size
+from dart_cli.dart_rest.rate_limit import BandwidthShaper, RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_burst_then_waits(tmp_path):
+    clock = FakeClock()
+    bucket = TokenBucket(10, 10, str(tmp_path / 'bucket'), clock=clock)
+
+    assert [bucket.reserve(1) for _ in range(10)] == [0.0] * 10
+    assert bucket.reserve(1) == 0.1
+
+    clock.now += 1.0
+    assert bucket.reserve(1) == 0.0
+
+
+def test_large_cost_goes_into_debt(tmp_path):
+    clock = FakeClock()
+    bucket = TokenBucket(100, 100, str(tmp_path / 'bucket'), clock=clock)
+
+    assert bucket.reserve(300) == 2.0
+    assert bucket.reserve(100) == 3.0
+
+
+def test_buckets_sharing_a_state_file_share_tokens(tmp_path):
+    clock = FakeClock()
+    state_path = str(tmp_path / 'bucket')
+    first = TokenBucket(5, 5, state_path, clock=clock)
+    second = TokenBucket(5, 5, state_path, clock=clock)
+
+    for _ in range(5):
+        first.reserve(1)
+    assert second.reserve(1) == 0.2
+
+
+def test_limit_applies_across_threads(tmp_path):
+    clock = FakeClock()
+    bucket = TokenBucket(10, 10, str(tmp_path / 'bucket'), clock=clock)
+    waits = []
+
+    def reserve():
+        for _ in range(5):
+            waits.append(bucket.reserve(1))
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(waits)[-1] == 1.0
+
+
+def test_limiter_keeps_separate_budgets_per_host(tmp_path):
+    limiter = RateLimiter(max_rps=1, max_bytes_per_sec=None, state_dir=str(tmp_path))
+    limiter.before_request('http://forklift:1337/upload')
+    limiter.before_request('http://cdr-retrieval:8090/dart/api/v1/cdrs')
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['cdr-retrieval_8090.requests', 'forklift_1337.requests']
+
+
+def test_request_body_size_counts_files_and_json():
+    assert request_body_size({'json': {'a': 1}}) == len('{"a": 1}')
+    files = {'file': ('doc.txt', io.BytesIO(b'0123456789')), 'metadata': (None, '{}', 'application/json')}
+    assert request_body_size({'files': files}) == 12
+
+
+def test_shaper_paces_chunks_with_a_small_burst(tmp_path):
+    clock = FakeClock()
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    shaper = BandwidthShaper('http://forklift:1337/upload', 1000, state_dir=str(tmp_path), clock=clock, sleep=sleep)
+    for _ in range(10):
+        shaper(100)
+
+    # Only a twentieth of a second's worth goes out unpaced, then each chunk waits for its share
+    assert sleeps[0] == pytest.approx(0.05)
+    assert sum(sleeps) == pytest.approx(0.95)
+    assert [path.name for path in tmp_path.iterdir()] == ['forklift_1337.upload-bytes']
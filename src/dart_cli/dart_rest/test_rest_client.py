@@ -0,0 +1,163 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dart_cli.dart_context.rate_limit_config import RateLimitConfig
+from dart_cli.dart_context.retry_config import RetryConfig
+from dart_cli.dart_rest.rest_client import DartRestClient
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.server.bodies.append(self.rfile.read(int(self.headers['Content-Length'])))
+        self.respond()
+
+    def respond(self):
+        self.server.connections.add(self.client_address)
+        auth = self.headers.get('Authorization')
+        self.server.auth_headers.append(auth)
+        body = b'{}'
+        self.send_response(200 if self.server.required_auth in (None, auth) else 401)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StaticAuthConfig:
+    def auth_headers(self, dart_context) -> dict[str, str]:
+        return {'Authorization': 'Bearer test-token'}
+
+    def refresh_auth(self, dart_context) -> None:
+        return
+
+
+class StubContext:
+    auth_config = StaticAuthConfig()
+    retry_config = RetryConfig()
+    rate_limit_config = RateLimitConfig()
+
+
+class RefreshingAuthConfig:
+    def __init__(self):
+        self.token = 'expired-token'
+        self.refresh_count = 0
+
+    def auth_headers(self, dart_context) -> dict[str, str]:
+        return {'Authorization': f'Bearer {self.token}'}
+
+    def refresh_auth(self, dart_context) -> None:
+        self.refresh_count += 1
+        self.token = f'new-token-{self.refresh_count}'
+
+
+class RefreshingContext:
+    retry_config = RetryConfig()
+    rate_limit_config = RateLimitConfig()
+
+    def __init__(self):
+        self.auth_config = RefreshingAuthConfig()
+
+
+@pytest.fixture
+def server():
+    test_server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    test_server.connections = set()
+    test_server.auth_headers = []
+    test_server.bodies = []
+    test_server.required_auth = None
+    thread = threading.Thread(target=test_server.serve_forever, daemon=True)
+    thread.start()
+    yield test_server
+    test_server.shutdown()
+    test_server.server_close()
+
+
+def test_requests_reuse_connections_and_send_auth(server):
+    client = DartRestClient(StubContext())
+    url = f'http://127.0.0.1:{server.server_address[1]}/health'
+    for _ in range(5):
+        client.get(url).raise_for_status()
+
+    assert len(server.connections) == 1
+    assert server.auth_headers == ['Bearer test-token'] * 5
+
+
+def test_unauthenticated_requests_omit_auth(server):
+    client = DartRestClient(StubContext())
+    url = f'http://127.0.0.1:{server.server_address[1]}/health'
+    client.get(url, auth=False).raise_for_status()
+
+    assert server.auth_headers == [None]
+
+
+def test_concurrent_401s_refresh_auth_once(server):
+    server.required_auth = 'Bearer new-token-1'
+    context = RefreshingContext()
+    client = DartRestClient(context)
+    url = f'http://127.0.0.1:{server.server_address[1]}/health'
+
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def call():
+        barrier.wait()
+        statuses.append(client.get(url).status_code)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 8
+    assert context.auth_config.refresh_count == 1
+
+
+def test_replayed_upload_resends_file(server):
+    server.required_auth = 'Bearer new-token-1'
+    client = DartRestClient(RefreshingContext())
+    url = f'http://127.0.0.1:{server.server_address[1]}/upload'
+
+    response = client.post(url, files={'file': ('doc.txt', io.BytesIO(b'document content'))})
+
+    assert response.status_code == 200
+    assert len(server.bodies) == 2
+    assert b'document content' in server.bodies[0]
+    assert b'document content' in server.bodies[1]
+
+
+def test_static_credentials_are_not_replayed(server):
+    server.required_auth = 'Bearer other-token'
+    client = DartRestClient(StubContext())
+    url = f'http://127.0.0.1:{server.server_address[1]}/health'
+
+    assert client.get(url).status_code == 401
+    assert len(server.auth_headers) == 1
+
+
+def test_listeners_see_connect_time_only_for_new_connections(server):
+    client = DartRestClient(StubContext())
+    url = f'http://127.0.0.1:{server.server_address[1]}/upload'
+    attempts = []
+    client.add_listener(attempts.append)
+
+    client.post(url, files={'file': ('doc.txt', io.BytesIO(b'document content'))})
+    client.get(url)
+
+    assert [attempt.status() for attempt in attempts] == ['200', '200']
+    assert attempts[0].connect_time > 0
+    assert attempts[1].connect_time == 0
+    assert attempts[0].bytes_sent > len(b'document content')
+    assert attempts[1].bytes_received == 2
+    assert all(attempt.ttfb <= attempt.elapsed for attempt in attempts)
@@ -0,0 +1,85 @@
+import pytest
+import requests
+
+from dart_cli.dart_rest.retry import RetryPolicy, RetryBudget, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = {} if headers is None else headers
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def scripted_send(*results):
+    remaining = list(results)
+    calls = []
+
+    def send():
+        calls.append(1)
+        result = remaining.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return send, calls
+
+
+def test_transient_statuses_are_retried_until_success():
+    delays = []
+    policy = RetryPolicy(max_retries=3, backoff=1, sleep=delays.append)
+    send, calls = scripted_send(FakeResponse(503), FakeResponse(429), FakeResponse(201))
+
+    assert policy.execute(send).status_code == 201
+    assert len(calls) == 3
+    assert 0 <= delays[0] <= 1
+    assert 0 <= delays[1] <= 2
+
+
+@pytest.mark.parametrize('status_code', [400, 404, 409, 500])
+def test_other_errors_fail_fast(status_code):
+    policy = RetryPolicy(max_retries=3, sleep=lambda s: None)
+    send, calls = scripted_send(FakeResponse(status_code))
+
+    assert policy.execute(send).status_code == status_code
+    assert len(calls) == 1
+
+
+def test_connection_errors_are_retried_then_raised():
+    policy = RetryPolicy(max_retries=2, sleep=lambda s: None)
+    send, calls = scripted_send(requests.ConnectionError(), requests.ConnectionError(), requests.ConnectionError())
+
+    with pytest.raises(requests.ConnectionError):
+        policy.execute(send)
+    assert len(calls) == 3
+
+
+def test_retry_after_is_honored():
+    delays = []
+    rewinds = []
+    policy = RetryPolicy(max_retries=1, max_backoff=60, sleep=delays.append)
+    send, calls = scripted_send(FakeResponse(503, {'Retry-After': '7'}), FakeResponse(200))
+
+    assert policy.execute(send, lambda: rewinds.append(1)).status_code == 200
+    assert delays == [7.0]
+    assert rewinds == [1]
+
+
+def test_retry_after_dates_are_parsed():
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('not a date') is None
+
+
+def test_budget_stops_retry_storms():
+    budget = RetryBudget(ratio=0, min_retries=2)
+    policy = RetryPolicy(max_retries=5, budget=budget, sleep=lambda s: None)
+    send, calls = scripted_send(*[FakeResponse(502)] * 10)
+
+    assert policy.execute(send).status_code == 502
+    assert len(calls) == 3
+    send, calls = scripted_send(FakeResponse(502))
+    assert policy.execute(send).status_code == 502
+    assert len(calls) == 1
@@ -0,0 +1,13 @@
+import click
+
+from dart_cli.cli.global_options import dart_options, pass_dart_context
+from dart_cli.cli.lazy_group import LazyGroup
+
+
+@click.group(name='dev', cls=LazyGroup, lazy_subcommands={
+    'fake-server': 'dart_cli.dev.fake_server:fake_server_command',
+})
+@dart_options
+@pass_dart_context
+def command(ctx):
+    """Tools for developing and load testing the cli"""
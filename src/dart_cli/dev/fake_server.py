@@ -0,0 +1,496 @@
+import base64
+import email
+import email.policy
+import hashlib
+import hmac
+import io
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from dart_cli.cli.global_options import dart_options, pass_dart_context
+from dart_cli.dart_context.dart_context import DartContext
+
+# Services served by the fake server, all under /dart/api/v1/[service] (cdr-retrieval is also
+# served as /dart/api/v1/cdrs, its path in DART deployments)
+FAKE_SERVICES = ['forklift', 'cdr-retrieval', 'corpex', 'tenants', 'users', 'reprocess']
+SERVICE_ALIASES = {'cdrs': 'cdr-retrieval'}
+FAKE_INSTANCE = 'fake-dart'
+API_PATH_PATTERN = re.compile(r'^/dart/api/v1/([^/]+)(/.*)?$')
+TOKEN_PATH_SUFFIX = '/protocol/openid-connect/token'
+
+DEFAULT_PORT = 8999
+DEFAULT_PAYLOAD_SIZE = 4096
+DEFAULT_TOKEN_LIFETIME = 300
+FAKE_CLIENT_SECRET = 'fake-dart-secret'
+TOKEN_SIGNING_KEY = b'fake-dart-signing-key'
+
+# Named service profiles; fields not given take FakeServiceProfile defaults
+PRESETS = {
+    'fast': {},
+    'realistic': {'latency': 0.05, 'latency_jitter': 0.02, 'error_rate': 0.005, 'payload_size': 20000},
+    'degraded': {'latency': 0.3, 'latency_jitter': 0.2, 'error_rate': 0.1, 'error_statuses': [429, 502, 503],
+                 'payload_size': 100000, 'max_concurrency': 8},
+}
+
+
+class FakeServiceProfile:
+    """
+    How a fake service behaves: latency (seconds, with uniform jitter) added to every
+    request, fraction of requests failed with one of error_statuses, size of generated
+    document content, and number of concurrent requests served before responding 503
+    """
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_statuses: list[int] = None,
+                 payload_size: int = DEFAULT_PAYLOAD_SIZE,
+                 max_concurrency: int = None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_statuses = [503] if error_statuses is None else list(error_statuses)
+        self.payload_size = payload_size
+        self.max_concurrency = max_concurrency
+
+    def updated(self, overrides: dict) -> 'FakeServiceProfile':
+        fields = {**vars(self), **{key: value for key, value in overrides.items() if value is not None}}
+        return FakeServiceProfile(**fields)
+
+    def delay(self) -> float:
+        return max(self.latency + random.uniform(-self.latency_jitter, self.latency_jitter), 0.0)
+
+
+def load_profiles(preset: str, overrides: dict, profile_file: Optional[str]) -> dict[str, FakeServiceProfile]:
+    """
+    Build the profile of every service from a preset, then a profile file (JSON with
+    optional "default" and per-service sections), then overrides for all services
+    """
+    base_profile = FakeServiceProfile().updated(PRESETS[preset])
+    file_data = {}
+    if profile_file is not None:
+        with open(profile_file, 'rt') as profile_file_ptr:
+            file_data = json.loads(profile_file_ptr.read())
+    default_profile = base_profile.updated(file_data.get('default', {}))
+    profiles = {}
+    for service in FAKE_SERVICES + ['keycloak']:
+        profiles[service] = default_profile.updated(file_data.get(service, {})).updated(overrides)
+    return profiles
+
+
+def seeded_doc_ids(count: int) -> list[str]:
+    """Ids of the documents created by FakeDartServer(seed_docs=count)"""
+    return [hashlib.md5(f'fake-doc-{i}'.encode('utf-8')).hexdigest() for i in range(count)]
+
+
+def base64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def issue_token(lifetime: float) -> str:
+    """Signed JWT (HS256) in the shape of a Keycloak access token"""
+    now = int(time.time())
+    header = base64url(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode('utf-8'))
+    claims = base64url(json.dumps({'iat': now, 'exp': now + int(lifetime), 'iss': 'fake-dart',
+                                   'preferred_username': 'fake-dart-cli'}).encode('utf-8'))
+    signature = hmac.new(TOKEN_SIGNING_KEY, f'{header}.{claims}'.encode('ascii'), hashlib.sha256).digest()
+    return f'{header}.{claims}.{base64url(signature)}'
+
+
+def is_valid_token(token: str) -> bool:
+    try:
+        header, claims, signature = token.split('.')
+        expected = hmac.new(TOKEN_SIGNING_KEY, f'{header}.{claims}'.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(base64url(expected), signature):
+            return False
+        claims_data = json.loads(base64.urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))
+        return claims_data['exp'] > time.time()
+    except (ValueError, KeyError):
+        return False
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict[str, (Optional[str], bytes)]:
+    """Parse a multipart/form-data body into {field name: (filename, content)}"""
+    message = email.message_from_bytes(f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + body,
+                                       policy=email.policy.HTTP)
+    fields = {}
+    if message.is_multipart():
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if name is not None:
+                fields[name] = (part.get_filename(), part.get_payload(decode=True) or b'')
+    return fields
+
+
+class FakeDocument:
+    def __init__(self, doc_id: str, filename: str, size: int, metadata: dict):
+        self.doc_id = doc_id
+        self.filename = filename
+        self.size = size
+        self.metadata = metadata
+
+    def cdr(self, payload_size: int) -> dict:
+        return {
+            'document_id': self.doc_id,
+            'capture_source': 'fake-dart',
+            'extracted_text': ('lorem ipsum ' * (payload_size // 12 + 1))[:payload_size],
+            'extracted_metadata': {'Title': self.filename, 'OriginalFileSize': self.size},
+            'labels': self.metadata.get('labels', []),
+            'source_uri': self.filename,
+            'timestamp': '2024-01-01T00:00:00Z',
+        }
+
+
+class FakeDartServer(ThreadingHTTPServer):
+    """
+    In-memory stand-in for the DART services used by the cli (forklift, cdr-retrieval,
+    corpex, tenants, users, reprocess, health checks and Keycloak tokens), with configurable
+    latency, errors and payload sizes (see FakeServiceProfile)
+    """
+
+    daemon_threads = True
+
+    def __init__(self,
+                 address: (str, int),
+                 profiles: dict[str, FakeServiceProfile] = None,
+                 require_auth: bool = False,
+                 token_lifetime: float = DEFAULT_TOKEN_LIFETIME,
+                 seed_docs: int = 0,
+                 verbose: bool = False):
+        super().__init__(address, FakeDartHandler)
+        self.profiles = {} if profiles is None else profiles
+        self.require_auth = require_auth
+        self.token_lifetime = token_lifetime
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.documents: dict[str, FakeDocument] = {}
+        self.tenants: dict[str, set[str]] = {}
+        self.users: dict[str, dict] = {}
+        self.in_flight: dict[str, int] = {}
+        for doc_id in seeded_doc_ids(seed_docs):
+            self.documents[doc_id] = FakeDocument(doc_id, f'{doc_id}.txt', DEFAULT_PAYLOAD_SIZE, {})
+
+    def profile(self, service: str) -> FakeServiceProfile:
+        return self.profiles.get(service, FakeServiceProfile())
+
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+class FakeDartHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, delayed ACKs add ~40ms per response
+    disable_nagle_algorithm = True
+    server: FakeDartServer
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers up to the terminating empty line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def send_body(self, status: int, body: bytes, content_type: str = 'application/json', headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json(self, status: int, data):
+        self.send_body(status, json.dumps(data).encode('utf-8'))
+
+    def handle_request(self, method: str):
+        url_parts = urlsplit(self.path)
+        query = parse_qs(url_parts.query)
+        body = self.read_body()
+
+        if url_parts.path.endswith(TOKEN_PATH_SUFFIX):
+            service, route = 'keycloak', url_parts.path
+        else:
+            match = API_PATH_PATTERN.match(url_parts.path)
+            if match is None:
+                return self.send_json(404, {'message': f'unknown path {url_parts.path}'})
+            service = SERVICE_ALIASES.get(match.group(1), match.group(1))
+            route = match.group(2) or '/'
+
+        profile = self.server.profile(service)
+        with self.server.lock:
+            in_flight = self.server.in_flight.get(service, 0) + 1
+            self.server.in_flight[service] = in_flight
+        try:
+            time.sleep(profile.delay())
+            if profile.max_concurrency is not None and in_flight > profile.max_concurrency:
+                return self.send_json(503, {'message': f'{service} overloaded'})
+            if random.random() < profile.error_rate:
+                status = random.choice(profile.error_statuses)
+                return self.send_body(status, json.dumps({'message': 'injected failure'}).encode('utf-8'),
+                                      headers={'Retry-After': '1'} if status == 429 else None)
+            if service != 'keycloak' and route != '/health' and self.server.require_auth:
+                authorization = self.headers.get('Authorization', '')
+                if not authorization.startswith('Bearer ') or not is_valid_token(authorization[len('Bearer '):]):
+                    return self.send_json(401, {'message': 'invalid or expired token'})
+            self.route(service, method, route, query, body, profile)
+        finally:
+            with self.server.lock:
+                self.server.in_flight[service] -= 1
+
+    def route(self, service: str, method: str, route: str, query: dict, body: bytes, profile: FakeServiceProfile):
+        if route == '/health':
+            return self.send_json(200, {'status': 'HEALTHY', 'version': 'fake', 'message': f'fake {service}'})
+        handler = {
+            'keycloak': self.handle_keycloak,
+            'forklift': self.handle_forklift,
+            'cdr-retrieval': self.handle_cdr_retrieval,
+            'corpex': self.handle_corpex,
+            'tenants': self.handle_tenants,
+            'users': self.handle_users,
+            'reprocess': self.handle_reprocess,
+        }.get(service)
+        if handler is None:
+            return self.send_json(404, {'message': f'unknown service {service}'})
+        handler(method, route, query, body, profile)
+
+    def handle_keycloak(self, method, route, query, body, profile):
+        if method != 'POST':
+            return self.send_json(405, {'message': 'method not allowed'})
+        self.send_json(200, {'access_token': issue_token(self.server.token_lifetime),
+                             'expires_in': self.server.token_lifetime,
+                             'token_type': 'Bearer'})
+
+    def handle_forklift(self, method, route, query, body, profile):
+        if method != 'POST' or route != '/upload':
+            return self.send_json(404, {'message': f'unknown forklift endpoint {method} {route}'})
+        fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+        if 'file' not in fields:
+            return self.send_json(400, {'message': 'missing file'})
+        filename, content = fields['file']
+        metadata = json.loads(fields['metadata'][1]) if 'metadata' in fields else {}
+        doc_id = hashlib.md5(content).hexdigest()
+        with self.server.lock:
+            self.server.documents[doc_id] = FakeDocument(doc_id, filename, len(content), metadata)
+            for tenant in metadata.get('tenants', []):
+                self.server.tenants.setdefault(tenant, set()).add(doc_id)
+        self.send_json(201, {'document_id': doc_id, 'filename': filename})
+
+    def handle_cdr_retrieval(self, method, route, query, body, profile):
+        if method != 'GET':
+            return self.send_json(405, {'message': 'method not allowed'})
+        if route == '/archive':
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as archive_zip:
+                for document in list(self.server.documents.values()):
+                    archive_zip.writestr(f'{document.doc_id}.cdr', json.dumps(document.cdr(profile.payload_size)))
+            return self.send_body(200, archive.getvalue(), 'application/zip',
+                                  {'Content-Disposition': 'attachment; filename="cdr-archive.zip"'})
+
+        raw = route.startswith('/raw/')
+        doc_id = route[len('/raw/'):] if raw else route.lstrip('/')
+        document = self.server.documents.get(doc_id)
+        if document is None:
+            return self.send_json(404, {'message': f'document {doc_id} not found'})
+        if raw:
+            return self.send_body(200, b'x' * document.size, 'application/octet-stream',
+                                  {'Content-Disposition': f'attachment; filename="{document.filename}"'})
+        self.send_json(200, document.cdr(profile.payload_size))
+
+    def handle_corpex(self, method, route, query, body, profile):
+        if method != 'POST':
+            return self.send_json(405, {'message': 'method not allowed'})
+        doc_ids = self.matching_doc_ids(json.loads(body or b'{}'))
+        if route == '/search/count':
+            return self.send_json(200, {'num_results': len(doc_ids)})
+        if route == '/search/shave':
+            take = int(query.get('take', [len(doc_ids)])[0])
+            return self.send_json(200, doc_ids[:take])
+        if route == '/search':
+            search_query = json.loads(body or b'{}')
+            page_size = int(search_query.get('page_size', 10))
+            page = int(search_query.get('page', 0))
+            page_ids = doc_ids[page * page_size:(page + 1) * page_size]
+            return self.send_json(200, {
+                'num_results': len(doc_ids),
+                'page': page,
+                'num_pages': (len(doc_ids) + page_size - 1) // page_size if page_size > 0 else 0,
+                'page_size': page_size,
+                'results': [{'cdr': self.server.documents[doc_id].cdr(profile.payload_size)} for doc_id in page_ids],
+            })
+        self.send_json(404, {'message': f'unknown corpex endpoint {route}'})
+
+    def matching_doc_ids(self, search_query: dict) -> list[str]:
+        """Ids of documents matching a corpex query (only tenant_id and TERM queries on document_id filter)"""
+        with self.server.lock:
+            doc_ids = set(self.server.documents)
+            if search_query.get('tenant_id') is not None:
+                doc_ids &= self.server.tenants.get(search_query['tenant_id'], set())
+        for query in search_query.get('queries', []):
+            if query.get('query_type') == 'TERM' and 'cdr.document_id' in query.get('queried_fields', []):
+                doc_ids &= set(query.get('term_values', []))
+        return sorted(doc_ids)
+
+    def handle_tenants(self, method, route, query, body, profile):
+        segments = [segment for segment in route.split('/') if segment != '']
+        tenants = self.server.tenants
+        with self.server.lock:
+            if len(segments) == 0 and method == 'GET':
+                return self.send_json(200, sorted(tenants))
+            tenant = segments[0] if len(segments) > 0 else None
+            if len(segments) == 1 and method == 'POST':
+                if tenant in tenants:
+                    return self.send_json(409, {'message': f'tenant {tenant} already exists'})
+                tenants[tenant] = set()
+                return self.send_json(201, {'tenant_id': tenant})
+            if tenant not in tenants:
+                return self.send_json(404, {'message': f'tenant {tenant} not found'})
+            if len(segments) == 1 and method == 'DELETE':
+                del tenants[tenant]
+                return self.send_json(200, {'tenant_id': tenant})
+            if len(segments) == 3 and segments[1] == 'clone' and method == 'POST':
+                tenants[segments[2]] = set(tenants[tenant])
+                return self.send_json(201, {'tenant_id': segments[2]})
+            if segments[1:] == ['documents'] and method == 'GET':
+                return self.send_json(200, sorted(tenants[tenant]))
+            if segments[1:] == ['documents'] and method == 'POST':
+                tenants[tenant].update(json.loads(body))
+                return self.send_json(200, sorted(tenants[tenant]))
+            if segments[1:] == ['documents', 'remove'] and method == 'POST':
+                tenants[tenant].difference_update(json.loads(body))
+                return self.send_json(200, sorted(tenants[tenant]))
+        self.send_json(404, {'message': f'unknown tenants endpoint {method} {route}'})
+
+    def handle_users(self, method, route, query, body, profile):
+        segments = [segment for segment in route.split('/') if segment != '']
+        users = self.server.users
+        with self.server.lock:
+            if len(segments) == 0 and method == 'GET':
+                return self.send_json(200, list(users.values()))
+            user_name = segments[0] if len(segments) > 0 else None
+            if len(segments) == 1 and method == 'POST':
+                if user_name in users:
+                    return self.send_json(409, {'message': f'user {user_name} already exists'})
+                user = {key: value for key, value in json.loads(body or b'{}').items() if key != 'password'}
+                users[user_name] = {**user, 'user_name': user_name}
+                return self.send_json(201, users[user_name])
+            if user_name not in users:
+                return self.send_json(404, {'message': f'user {user_name} not found'})
+            if len(segments) == 1 and method == 'GET':
+                return self.send_json(200, users[user_name])
+            if len(segments) == 1 and method == 'PUT':
+                update = {key: value for key, value in json.loads(body or b'{}').items() if key != 'password'}
+                users[user_name].update(update)
+                return self.send_json(200, users[user_name])
+            if len(segments) == 1 and method == 'DELETE':
+                del users[user_name]
+                return self.send_json(200, {'user_name': user_name})
+            if segments[1:] == ['groups'] and method == 'POST':
+                groups = set(users[user_name].get('groups', [])).union(json.loads(body))
+                users[user_name]['groups'] = sorted(groups)
+                return self.send_json(200, users[user_name])
+        self.send_json(404, {'message': f'unknown users endpoint {method} {route}'})
+
+    def handle_reprocess(self, method, route, query, body, profile):
+        if method != 'POST':
+            return self.send_json(405, {'message': 'method not allowed'})
+        cdr = json.loads(body or b'{}')
+        self.send_json(200, {'document_id': cdr.get('document_id')})
+
+
+def configure_fake_environment(dart_context: DartContext, host: str, port: int, require_auth: bool) -> None:
+    """Point dart_context at a fake server using the custom environment type"""
+    service_mapping = {service: {'instance': FAKE_INSTANCE, 'port': port, 'container_name': service}
+                       for service in FAKE_SERVICES}
+    service_mapping['keycloak'] = {'instance': FAKE_INSTANCE, 'port': port, 'base_path': '', 'container_name': 'keycloak'}
+    dart_context.dart_env.set_env_type('custom')
+    dart_context.dart_env.custom_env.set_instance_mapping({FAKE_INSTANCE: host})
+    dart_context.dart_env.custom_env.set_service_mapping(service_mapping)
+    if require_auth:
+        dart_context.auth_config.set_auth_type_dart()
+        dart_context.auth_config.dart_auth_config.use_client()
+        dart_context.auth_config.dart_auth_config.set_client_secret(FAKE_CLIENT_SECRET)
+    else:
+        dart_context.auth_config.set_auth_type_none()
+
+
+@click.command(name='fake-server')
+@dart_options
+@click.option('--host', required=False, default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', required=False, default=DEFAULT_PORT, type=click.IntRange(min=0, max=65535), help='Port to listen on (0 for any free port)')
+@click.option('--preset', required=False, default='fast', type=click.Choice(sorted(PRESETS)), help='Base latency/error/payload profile for all services')
+@click.option('--profile-file', required=False, default=None, type=click.Path(exists=True, dir_okay=False), help='JSON file with "default" and per-service profile settings (latency, latency_jitter, error_rate, error_statuses, payload_size, max_concurrency)')
+@click.option('--latency', required=False, type=click.FloatRange(min=0), help='Seconds added to every response')
+@click.option('--latency-jitter', required=False, type=click.FloatRange(min=0), help='Maximum random variation of --latency in seconds')
+@click.option('--error-rate', required=False, type=click.FloatRange(min=0, max=1), help='Fraction of requests that fail with an --error-status')
+@click.option('--error-status', required=False, multiple=True, type=int, help='Status code of injected failures (can be used multiple times)')
+@click.option('--payload-size', required=False, type=click.IntRange(min=0), help='Size in bytes of generated document text in CDRs')
+@click.option('--max-concurrency', required=False, type=click.IntRange(min=1), help='Concurrent requests per service before responding 503')
+@click.option('--require-auth', required=False, is_flag=True, default=False, help='Reject requests without a valid token from the fake Keycloak endpoint')
+@click.option('--token-lifetime', required=False, default=DEFAULT_TOKEN_LIFETIME, type=click.IntRange(min=1), help='Lifetime in seconds of issued tokens')
+@click.option('--seed-docs', required=False, default=0, type=click.IntRange(min=0), help='Number of documents to create at startup (ids are md5 of "fake-doc-[i]")')
+@click.option('--write-profile', required=False, default=None, help='Save a configuration profile pointing at this server (use with dart -p [profile])')
+@click.option('--verbose', required=False, is_flag=True, default=False, help='Log every request')
+@pass_dart_context
+def fake_server_command(dart_context: DartContext, host, port, preset, profile_file, latency, latency_jitter, error_rate,
+                        error_status, payload_size, max_concurrency, require_auth, token_lifetime, seed_docs,
+                        write_profile, verbose):
+    """Run a local fake DART service for testing and benchmarking the cli"""
+    overrides = {
+        'latency': latency,
+        'latency_jitter': latency_jitter,
+        'error_rate': error_rate,
+        'error_statuses': list(error_status) if len(error_status) > 0 else None,
+        'payload_size': payload_size,
+        'max_concurrency': max_concurrency,
+    }
+    profiles = load_profiles(preset, overrides, profile_file)
+    server = FakeDartServer((host, port), profiles, require_auth, token_lifetime, seed_docs, verbose)
+    bound_port = server.server_address[1]
+
+    if write_profile is not None:
+        configure_fake_environment(dart_context, host, bound_port, require_auth)
+        dart_context.save_profile(write_profile)
+        print(f'Saved profile {write_profile} (use: dart -p {write_profile} ...)')
+
+    print(f'Fake DART service listening on {server.base_url()} (Ctrl-C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,82 @@
+import hashlib
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+import requests
+
+from dart_cli.dev.fake_server import FakeDartServer, FakeServiceProfile, load_profiles, seeded_doc_ids
+
+
+def start_server(**kwargs) -> FakeDartServer:
+    server = FakeDartServer(('127.0.0.1', 0), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server():
+    test_server = start_server(seed_docs=3)
+    yield test_server
+    test_server.shutdown()
+    test_server.server_close()
+
+
+def test_uploaded_documents_can_be_retrieved_and_searched(server):
+    api = server.base_url() + '/dart/api/v1'
+    upload = requests.post(api + '/forklift/upload',
+                           files={'file': ('doc.txt', io.BytesIO(b'document content')),
+                                  'metadata': (None, json.dumps({'labels': ['test']}), 'application/json')})
+    doc_id = hashlib.md5(b'document content').hexdigest()
+
+    assert upload.status_code == 201
+    assert upload.json()['document_id'] == doc_id
+    assert requests.get(api + f'/cdrs/{doc_id}').json()['labels'] == ['test']
+    assert requests.get(api + f'/cdr-retrieval/raw/{doc_id}').content == b'x' * len(b'document content')
+    assert requests.get(api + '/cdrs/0' * 32).status_code == 404
+    assert requests.post(api + '/corpex/search/count', json={}).json() == {'num_results': 4}
+    assert len(requests.post(api + '/corpex/search/shave?take=2', json={}).json()) == 2
+
+    archive = zipfile.ZipFile(io.BytesIO(requests.get(api + '/cdrs/archive').content))
+    assert sorted(archive.namelist()) == sorted(f'{i}.cdr' for i in seeded_doc_ids(3) + [doc_id])
+
+
+def test_auth_requires_token_from_fake_keycloak():
+    server = start_server(require_auth=True)
+    try:
+        api = server.base_url() + '/dart/api/v1'
+        assert requests.get(api + '/tenants').status_code == 401
+        assert requests.get(api + '/tenants/health').status_code == 200
+
+        token = requests.post(server.base_url() + '/auth/realms/dart/protocol/openid-connect/token',
+                              data={'grant_type': 'client_credentials'}).json()['access_token']
+        assert requests.get(api + '/tenants', headers={'Authorization': f'Bearer {token}'}).json() == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_profiles_inject_errors():
+    profiles = {'forklift': FakeServiceProfile(error_rate=1.0, error_statuses=[429])}
+    server = start_server(profiles=profiles)
+    try:
+        response = requests.post(server.base_url() + '/dart/api/v1/forklift/upload', files={'file': ('a', b'a')})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_profile_overrides_apply_in_order(tmp_path):
+    profile_file = tmp_path / 'profile.json'
+    profile_file.write_text(json.dumps({'default': {'latency': 0.2}, 'corpex': {'error_rate': 0.5}}))
+
+    profiles = load_profiles('realistic', {'payload_size': 10}, str(profile_file))
+
+    assert profiles['forklift'].latency == 0.2
+    assert profiles['forklift'].error_rate == 0.005
+    assert profiles['corpex'].error_rate == 0.5
+    assert profiles['corpex'].payload_size == 10
@@ -1,14 +1,16 @@
 import click
 
 from dart_cli.cli import global_options
-from dart_cli.forklift.submit import submit_command
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='forklift')
+@click.group(name='forklift', cls=LazyGroup, lazy_subcommands={
+    'submit': 'dart_cli.forklift.submit:submit_command',
+    'merge': 'dart_cli.forklift.merge:merge_command',
+    'trace': 'dart_cli.forklift.trace:trace_command',
+    'retry-failed': 'dart_cli.forklift.retry:retry_failed_command',
+})
 @global_options.dart_options
 @global_options.pass_dart_context
 def command(dart_context):
     """Commands for submitting raw documents to DART"""
-
-
-command.add_command(submit_command)
@@ -0,0 +1,257 @@
+import io
+import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from contextlib import ExitStack
+from functools import partial
+from typing import BinaryIO, Container, Iterator, Optional
+
+from dart_cli.forklift.metadata import DocumentMetadata, find_meta_filename
+from dart_cli.forklift.prepare import PreparedFile
+from dart_cli.forklift.scan import is_document_name
+
+# Separates an archive's path from the name of a member in the paths recorded in the journal
+MEMBER_SEPARATOR = '!'
+
+# Tar members up to this size are held in memory until they are uploaded, larger ones are spooled to a temporary file
+MEMBER_MEMORY_SIZE = 1024 * 1024
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def member_path(archive_path: str, member_name: str) -> str:
+    return f'{archive_path}{MEMBER_SEPARATOR}{member_name}'
+
+
+def member_meta_name(member_name: str, meta_names: Container[str]) -> Optional[str]:
+    """Name of the .meta member among meta_names holding per-file metadata for member_name (in the same archive directory)"""
+    directory, filename = posixpath.split(member_name)
+    meta_name = find_meta_filename(filename, lambda name: posixpath.join(directory, name) in meta_names)
+    return None if meta_name is None else posixpath.join(directory, meta_name)
+
+
+def is_document_member(member_name: str, ignore_meta: bool) -> bool:
+    """Whether a file member is uploaded, as when submitting a directory"""
+    return is_document_name(posixpath.basename(member_name), ignore_meta)
+
+
+def archive_members(archive_path: str, document_metadata: DocumentMetadata, ignore_meta: bool,
+                    open_archives: ExitStack = None) -> Iterator[PreparedFile]:
+    """
+    Yield the documents in a zip or tar archive (optionally compressed) without extracting it
+    to disk, with their metadata merged with their .meta members unless ignore_meta
+    :param open_archives: keeps zip archives open for the uploads of their members, until it is
+                          closed (by default a zip archive is closed once its members are yielded)
+    """
+    if zipfile.is_zipfile(archive_path):
+        return zip_members(archive_path, document_metadata, ignore_meta, open_archives)
+    return tar_members(archive_path, document_metadata, ignore_meta)
+
+
+def zip_members(archive_path: str, document_metadata: DocumentMetadata, ignore_meta: bool,
+                open_archives: ExitStack = None) -> Iterator[PreparedFile]:
+    """
+    Zip members are read by the upload itself (zip files support reading several members at
+    once), so content is streamed from the archive into the upload request
+    """
+    with ExitStack() as stack:
+        archive = stack.enter_context(zipfile.ZipFile(archive_path))
+        if open_archives is not None:
+            # The caller closes the archive once its members are uploaded
+            open_archives.push(stack.pop_all())
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        meta_names = set() if ignore_meta else {info.filename for info in infos if info.filename.endswith('.meta')}
+        for info in infos:
+            if not is_document_member(info.filename, ignore_meta):
+                continue
+            path = member_path(archive_path, info.filename)
+            meta_name = member_meta_name(info.filename, meta_names)
+            try:
+                meta_text = archive.read(meta_name).decode('utf-8') if meta_name is not None else None
+                metadata = document_metadata.merged_json(meta_text)
+            except ValueError as e:
+                yield PreparedFile(path, None, None, None, f'FAILED TO READ METADATA. {member_path(archive_path, meta_name)}: {e}')
+                continue
+            yield PreparedFile(path, None, None, metadata, filename=info.filename, opener=partial(archive.open, info),
+                               size=info.file_size)
+
+
+class SpooledMember:
+    """
+    Content of an archive member copied to an unlinked temporary file, which is removed once
+    the member is no longer referenced. Each open returns a reader with its own position, so
+    the member can be hashed and uploaded (and its upload retried) independently.
+    """
+
+    def __init__(self, spool: BinaryIO):
+        self.__spool = spool
+        self.__lock = threading.Lock()
+
+    def open(self) -> BinaryIO:
+        return SpooledMemberReader(self.__spool, self.__lock)
+
+
+class SpooledMemberReader(io.RawIOBase):
+    def __init__(self, spool: BinaryIO, lock: threading.Lock):
+        super().__init__()
+        self.__spool = spool
+        self.__lock = lock
+        self.__position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.__position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.__position
+        elif whence == os.SEEK_END:
+            with self.__lock:
+                offset += self.__spool.seek(0, os.SEEK_END)
+        self.__position = max(offset, 0)
+        return self.__position
+
+    def readinto(self, buffer) -> int:
+        with self.__lock:
+            self.__spool.seek(self.__position)
+            data = self.__spool.read(len(buffer))
+        buffer[:len(data)] = data
+        self.__position += len(data)
+        return len(data)
+
+
+def tar_file_members(archive: tarfile.TarFile) -> Iterator[tarfile.TarInfo]:
+    """The file members of an open tar archive, in order, without tarfile keeping a list of every member it has read"""
+    while True:
+        member = archive.next()
+        if member is None:
+            return
+        archive.members = []
+        if member.isfile():
+            yield member
+
+
+def tar_meta_texts(archive_path: str) -> dict[str, str]:
+    """
+    Content of the .meta members of a tar archive, by name. Other members are skipped: without
+    compression their content is seeked past, not read.
+    """
+    meta_texts = {}
+    with tarfile.open(archive_path, 'r:*') as archive:
+        for member in tar_file_members(archive):
+            if member.name.endswith('.meta'):
+                meta_texts[member.name] = archive.extractfile(member).read().decode('utf-8')
+    return meta_texts
+
+
+def tar_member_content(archive: tarfile.TarFile, member: tarfile.TarInfo, path: str, metadata: str) -> PreparedFile:
+    """
+    Copy a tar member out of its archive as the archive is read in order, which cannot be
+    rewound for the upload (or its retries): small members are held in memory, others are
+    spooled to a temporary file
+    """
+    member_file = archive.extractfile(member)
+    if member.size <= MEMBER_MEMORY_SIZE:
+        return PreparedFile(path, member_file.read(), None, metadata, filename=member.name)
+    spool = tempfile.TemporaryFile()
+    shutil.copyfileobj(member_file, spool, SPOOL_CHUNK_SIZE)
+    return PreparedFile(path, None, None, metadata, filename=member.name, opener=SpooledMember(spool).open,
+                        size=member.size)
+
+
+def tar_members(archive_path: str, document_metadata: DocumentMetadata, ignore_meta: bool) -> Iterator[PreparedFile]:
+    """
+    Tar archives are read once, in order, as a stream, with each member copied out as its
+    turn comes (see tar_member_content). .meta members may come after their documents, so
+    unless ignore_meta they are collected first (see tar_meta_texts).
+    """
+    meta_texts = {} if ignore_meta else tar_meta_texts(archive_path)
+    with tarfile.open(archive_path, 'r|*') as archive:
+        for member in tar_file_members(archive):
+            if not is_document_member(member.name, ignore_meta):
+                continue
+            path = member_path(archive_path, member.name)
+            meta_name = member_meta_name(member.name, meta_texts)
+            try:
+                metadata = document_metadata.merged_json(None if meta_name is None else meta_texts[meta_name])
+            except ValueError as e:
+                yield PreparedFile(path, None, None, None, f'FAILED TO READ METADATA. {member_path(archive_path, meta_name)}: {e}')
+                continue
+            yield tar_member_content(archive, member, path, metadata)
+
+
+def split_member_path(path: str) -> Optional[tuple[str, str]]:
+    """:return: the archive path and member name of an ARCHIVE!MEMBER path, or None if it names no archive"""
+    separator = path.find(MEMBER_SEPARATOR)
+    while separator >= 0 and not os.path.isfile(path[:separator]):
+        separator = path.find(MEMBER_SEPARATOR, separator + 1)
+    if separator < 0:
+        return None
+    return path[:separator], path[separator + 1:]
+
+
+def open_members(paths: list[str], open_archives: ExitStack = None) -> Iterator[PreparedFile]:
+    """
+    Prepare archive members given by their ARCHIVE!MEMBER paths (e.g. to upload them again),
+    with no metadata. Each archive is opened once for all of its members: zip members are
+    opened by the upload, as in zip_members (the caller closes the archives), and tar archives
+    are read once, in order, copying out the members asked for.
+    """
+    members_by_archive: dict[str, dict[str, str]] = {}
+    for path in paths:
+        archive_member = split_member_path(path)
+        if archive_member is None:
+            yield PreparedFile(path, None, None, None, f'FAILED TO READ FILE. No archive in {path}')
+            continue
+        archive_path, member_name = archive_member
+        members_by_archive.setdefault(archive_path, {})[member_name] = path
+
+    for archive_path, member_paths in members_by_archive.items():
+        if zipfile.is_zipfile(archive_path):
+            yield from zip_archive_members(archive_path, member_paths, open_archives)
+        else:
+            yield from tar_archive_members(archive_path, member_paths)
+
+
+def zip_archive_members(archive_path: str, member_paths: dict[str, str], open_archives: ExitStack = None) -> Iterator[PreparedFile]:
+    with ExitStack() as stack:
+        try:
+            archive = stack.enter_context(zipfile.ZipFile(archive_path))
+        except (OSError, zipfile.BadZipFile) as e:
+            for path in member_paths.values():
+                yield PreparedFile(path, None, None, None, f'FAILED TO READ FILE. {e}')
+            return
+        if open_archives is not None:
+            open_archives.push(stack.pop_all())
+        for member_name, path in member_paths.items():
+            try:
+                info = archive.getinfo(member_name)
+            except KeyError as e:
+                yield PreparedFile(path, None, None, None, f'FAILED TO READ FILE. {e}')
+                continue
+            yield PreparedFile(path, None, None, None, filename=member_name, opener=partial(archive.open, info),
+                               size=info.file_size)
+
+
+def tar_archive_members(archive_path: str, member_paths: dict[str, str]) -> Iterator[PreparedFile]:
+    """The archive is read once, in order, with the members asked for copied out as their turn comes"""
+    remaining = dict(member_paths)
+    error = None
+    try:
+        with tarfile.open(archive_path, 'r|*') as archive:
+            for member in tar_file_members(archive):
+                path = remaining.pop(member.name, None)
+                if path is not None:
+                    yield tar_member_content(archive, member, path, None)
+    except (OSError, tarfile.TarError) as e:
+        error = f'FAILED TO READ FILE. {e}'
+    for member_name, path in remaining.items():
+        yield PreparedFile(path, None, None, None, error or f'FAILED TO READ FILE. No file {member_name} in {archive_path}')
@@ -0,0 +1,75 @@
+import hashlib
+from typing import Any, Callable, Iterator, Optional
+
+from dart_cli.forklift.journal import UploadJournal
+
+EXISTENCE_BATCH_SIZE = 500
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_md5(file_path: str) -> str:
+    """Hex MD5 of a file's content, which is the id DART gives the document (see local hash)"""
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class ExistingDocumentFilter:
+    """
+    Leaves out of a stream of discovered files those whose content is already in DART. Files
+    are hashed and their ids looked up in batches; files with the same content as an earlier
+    file in their batch are left out as well. Entries are (file path, ...) tuples.
+    """
+
+    def __init__(self,
+                 existing_ids: Callable[[list[str]], set[str]],
+                 document_id: Callable[[Any], Optional[str]],
+                 journal: UploadJournal = None,
+                 batch_size: int = EXISTENCE_BATCH_SIZE):
+        """
+        :param existing_ids: returns which of a list of document ids are already in DART
+        :param document_id: gets the document id of an entry (None if it cannot, to let the upload report the failure)
+        :param journal: records left out files as existing
+        """
+        self.existing_ids = existing_ids
+        self.journal = journal
+        self.document_id = document_id
+        self.batch_size = batch_size
+        self.existing_count = 0
+        self.duplicate_count = 0
+
+    def new_files(self, discovered: Iterator[tuple]) -> Iterator[tuple]:
+        batch = []
+        for entry in discovered:
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                yield from self.__filter_batch(batch)
+                batch = []
+        if len(batch) > 0:
+            yield from self.__filter_batch(batch)
+
+    def __filter_batch(self, batch: list[tuple]) -> Iterator[tuple]:
+        unique_entries: dict[str, tuple] = {}
+        for entry in batch:
+            doc_id = self.document_id(entry)
+            if doc_id is None:
+                yield entry
+            elif doc_id in unique_entries:
+                self.duplicate_count += 1
+                self.__skip(entry[0], doc_id)
+            else:
+                unique_entries[doc_id] = entry
+
+        existing = self.existing_ids(list(unique_entries)) if len(unique_entries) > 0 else set()
+        for doc_id, entry in unique_entries.items():
+            if doc_id in existing:
+                self.existing_count += 1
+                self.__skip(entry[0], doc_id)
+            else:
+                yield entry
+
+    def __skip(self, file_path: str, doc_id: str) -> None:
+        if self.journal is not None:
+            self.journal.existing(file_path, doc_id)
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from typing import Iterator, Optional
+
+from dart_cli.dart_rest.attempts import RequestAttempt
+from dart_cli.forklift.archives import MEMBER_SEPARATOR, open_members
+from dart_cli.forklift.metadata import DocumentMetadata, existing_meta_path
+from dart_cli.forklift.prepare import PreparedFile
+
+# Characters of a failed upload's response body kept in the failure report
+RESPONSE_EXCERPT_LENGTH = 500
+
+
+def default_failure_report_path(journal_path: str) -> str:
+    """Failure report of a submission, next to its journal"""
+    base, _ = os.path.splitext(journal_path)
+    return f'{base}.failures.jsonl'
+
+
+class FailureReport:
+    """
+    JSONL report of the files a submission failed to upload, one record per failure: the
+    file's path (and where it was moved, with --failed-dir), the reason, the response's status
+    code and the start of its body, the number of attempts made and how long they took, and
+    the upload metadata, so that forklift retry-failed can submit the same documents again.
+    Every record is flushed as it is written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.__lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.__report_file = open(path, 'wt', encoding='utf-8')
+
+    def failed(self, path: str, reason: str, metadata: Optional[str] = None, status_code: Optional[int] = None,
+               response_excerpt: Optional[str] = None, attempts: Optional[int] = None, elapsed: Optional[float] = None,
+               moved_to: Optional[str] = None) -> None:
+        record = {'path': os.path.abspath(path), 'reason': reason, 'time': round(time.time(), 3)}
+        details = {
+            'status_code': status_code,
+            'response_excerpt': response_excerpt,
+            'attempts': attempts,
+            'elapsed': None if elapsed is None else round(elapsed, 3),
+            'moved_to': None if moved_to is None else os.path.abspath(moved_to),
+            'metadata': metadata,
+        }
+        record.update({key: value for key, value in details.items() if value is not None})
+        line = json.dumps(record)
+        with self.__lock:
+            if self.__report_file.closed:
+                return
+            self.__report_file.write(line + '\n')
+            self.__report_file.flush()
+            self.count += 1
+
+    def close(self) -> None:
+        with self.__lock:
+            if not self.__report_file.closed:
+                self.__report_file.close()
+
+
+class AttemptCounter:
+    """
+    Counts the attempts (first tries and retries) each thread makes to a url: register it as a
+    listener of the rest client, call start before an upload, and count after it
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.__local = threading.local()
+
+    def __call__(self, attempt: RequestAttempt) -> None:
+        if attempt.url == self.url:
+            self.__local.count = getattr(self.__local, 'count', 0) + 1
+
+    def start(self) -> None:
+        self.__local.count = 0
+
+    def count(self) -> int:
+        return getattr(self.__local, 'count', 0)
+
+
+def load_failures(report_path: str) -> dict[str, dict]:
+    """:return: the last failure record of each file in a failure report, by path"""
+    records = {}
+    with open(report_path, 'rt', encoding='utf-8') as report_file:
+        for line in report_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record['path']] = record
+    return records
+
+
+def failed_files(records: dict[str, dict], document_metadata: DocumentMetadata,
+                 open_archives: ExitStack = None) -> Iterator[PreparedFile]:
+    """
+    Yield the files of failure records (see load_failures) to upload again, from where they
+    were moved if they were, with the metadata they were uploaded with. Files that failed
+    before they were uploaded (e.g. their .meta file could not be read) get their metadata
+    resolved again, with document_metadata. Archive members are yielded after the other
+    files, so that each archive is opened once (see open_members; zip archives are left open
+    for the upload, and added to open_archives to be closed).
+    """
+    member_records = {}
+    for path, record in records.items():
+        file_path = record.get('moved_to', path)
+        if MEMBER_SEPARATOR in file_path and not os.path.exists(file_path):
+            member_records[file_path] = record
+        else:
+            yield with_failed_metadata(PreparedFile(file_path, None, None, None), record, document_metadata)
+    for prepared_file in open_members(list(member_records), open_archives):
+        yield with_failed_metadata(prepared_file, member_records[prepared_file.file_path], document_metadata)
+
+
+def with_failed_metadata(prepared_file: PreparedFile, record: dict, document_metadata: DocumentMetadata) -> PreparedFile:
+    if prepared_file.error is not None:
+        return prepared_file
+    metadata = record.get('metadata')
+    if metadata is None:
+        try:
+            metadata = document_metadata.metadata_json(existing_meta_path(prepared_file.file_path))
+        except (OSError, ValueError) as e:
+            return prepared_file._replace(error=f'FAILED TO READ METADATA. {e}')
+    return prepared_file._replace(metadata=metadata)
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+QUEUED = 'queued'
+IN_FLIGHT = 'in-flight'
+DONE = 'done'
+FAILED = 'failed'
+EXISTING = 'existing'
+
+JOURNAL_DIRNAME = 'forklift-journals'
+
+
+def default_journal_path(url: str, files, input_dir: Optional[str], shard: Optional[str] = None) -> str:
+    """
+    Journal location for a submission, keyed by its destination and inputs (and shard, so hosts
+    sharing a home directory keep separate journals) so that rerunning the same command finds
+    the same journal. It lives under ~/.dart rather than next to the input, which may be read-only.
+    """
+    inputs = [url,
+              sorted(os.path.abspath(file_path) for file_path in (files or [])),
+              None if input_dir is None else os.path.abspath(input_dir)]
+    if shard is not None:
+        inputs.append(shard)
+    key = hashlib.sha1(json.dumps(inputs).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(os.getenv('HOME'), '.dart', JOURNAL_DIRNAME, f'{key}.jsonl')
+
+
+class UploadJournal:
+    """
+    Append-only log of the state of each file in a forklift submission (queued, in-flight,
+    done or failed, with a failure reason or the uploaded document id, or existing if its
+    content was already in DART and it was not uploaded). Every record is
+    flushed as it is written, so the journal survives the process being killed, and the
+    last record of each file is its current state.
+
+    Only the states read from a resumed journal are kept in memory; records written by
+    this run are only counted.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        :param resume: keep the states of an existing journal at path (otherwise it is replaced)
+        """
+        self.path = path
+        self.__previous_states: dict[str, str] = {}
+        self.__counts = {QUEUED: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0, EXISTING: 0}
+        self.__lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume:
+            records = self.__load()
+            self.__compact(records)
+            self.__previous_states = {record_path: state for record_path, (state, _) in records.items()}
+        self.__journal_file = open(path, 'at' if resume else 'wt', encoding='utf-8')
+
+    def __load(self) -> dict[str, (str, str)]:
+        """:return: the state and last record of each file in the journal"""
+        records = {}
+        try:
+            with open(self.path, 'rt', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A record cut off by a crash
+                        continue
+                    records[record['path']] = (record['state'], line.rstrip('\n'))
+        except FileNotFoundError:
+            pass
+        return records
+
+    def __compact(self, records: dict[str, (str, str)]) -> None:
+        """Rewrite the journal with only the last record of each file, so it does not grow with every resume"""
+        if len(records) == 0:
+            return
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wt', encoding='utf-8') as tmp_file:
+            for _, line in records.values():
+                tmp_file.write(line + '\n')
+        os.replace(tmp_path, self.path)
+
+    def previous_state(self, path: str) -> Optional[str]:
+        """State of path in the resumed journal (None if it was not in it)"""
+        return self.__previous_states.get(os.path.abspath(path))
+
+    def was_done(self, path: str) -> bool:
+        return self.previous_state(path) in (DONE, EXISTING)
+
+    def counts(self) -> dict[str, int]:
+        """Number of records of each state written by this run"""
+        with self.__lock:
+            return dict(self.__counts)
+
+    def queued(self, path: str) -> None:
+        self.__write(path, QUEUED)
+
+    def in_flight(self, path: str) -> None:
+        self.__write(path, IN_FLIGHT)
+
+    def done(self, path: str, document_id: Optional[str]) -> None:
+        self.__write(path, DONE, document_id=document_id)
+
+    def failed(self, path: str, reason: str) -> None:
+        self.__write(path, FAILED, reason=reason)
+
+    def existing(self, path: str, document_id: str) -> None:
+        self.__write(path, EXISTING, document_id=document_id)
+
+    def __write(self, path: str, state: str, **details) -> None:
+        path = os.path.abspath(path)
+        record = {'path': path, 'state': state, 'time': round(time.time(), 3)}
+        record.update({key: value for key, value in details.items() if value is not None})
+        line = json.dumps(record)
+        with self.__lock:
+            if self.__journal_file.closed:
+                # Workers still running after an interrupted submission
+                return
+            self.__journal_file.write(line + '\n')
+            self.__journal_file.flush()
+            self.__counts[state] += 1
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__journal_file.closed:
+                return
+            self.__journal_file.flush()
+            os.fsync(self.__journal_file.fileno())
+            self.__journal_file.close()
+
+
+def uploaded_document_id(response_text: str) -> Optional[str]:
+    """Document id from a forklift upload response, if it has one"""
+    try:
+        response = json.loads(response_text)
+    except (TypeError, ValueError):
+        return None
+    return response.get('document_id') if isinstance(response, dict) else None
+
+
+def load_journal(path: str) -> dict[str, dict]:
+    """
+    Last record of each file in a journal (records cut off by a crash are skipped)
+    :raise OSError: if the journal cannot be read
+    """
+    records = {}
+    with open(path, 'rt', encoding='utf-8') as journal_file:
+        for line in journal_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['path']] = record
+    return records
+
+
+def merge_records(merged: dict[str, dict], records: dict[str, dict]) -> None:
+    """
+    Add the records of a journal (e.g. of one shard of a submission) to merged: if several
+    journals have a file, its most recent record wins
+    """
+    for file_path, record in records.items():
+        if file_path not in merged or record['time'] >= merged[file_path]['time']:
+            merged[file_path] = record
@@ -0,0 +1,33 @@
+import json
+import os
+from typing import Iterator
+
+from dart_cli.forklift.metadata import DocumentMetadata
+from dart_cli.forklift.prepare import PreparedFile
+
+
+def manifest_files(manifest_path: str, document_metadata: DocumentMetadata) -> Iterator[PreparedFile]:
+    """
+    Yield the documents listed in a JSONL manifest, reading it one line at a time. Each line
+    is an object with the document's path (relative paths are relative to the manifest's
+    directory) and its own metadata in the other fields (e.g. labels, tenants, genre), which
+    is merged with the submission's metadata as a .meta file would be:
+
+        {"path": "reports/2021-03.v2.pdf", "labels": ["quarterly"], "genre": "report", "source": "archive"}
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'rt', encoding='utf-8') as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            if line.strip() == '':
+                continue
+            line_ref = f'{manifest_path}:{line_number}'
+            try:
+                doc_metadata = json.loads(line)
+                file_path = doc_metadata.pop('path')
+            except (ValueError, KeyError, AttributeError, TypeError):
+                yield PreparedFile(line_ref, None, None, None, 'FAILED TO READ MANIFEST. Expected a JSON object with a path')
+                continue
+            if not isinstance(file_path, str):
+                yield PreparedFile(line_ref, None, None, None, 'FAILED TO READ MANIFEST. Path must be a string')
+                continue
+            yield PreparedFile(os.path.join(base_dir, file_path), None, None, document_metadata.document_json(doc_metadata))
@@ -0,0 +1,51 @@
+import json
+
+import click
+
+from dart_cli.cli import global_options
+from dart_cli.dart_rest.metrics import merge_summaries, write_atomically
+from dart_cli.forklift.journal import DONE, EXISTING, FAILED, IN_FLIGHT, QUEUED, load_journal, merge_records
+
+
+def state_counts(records: dict[str, dict]) -> dict[str, int]:
+    counts = {QUEUED: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0, EXISTING: 0}
+    for record in records.values():
+        counts[record['state']] = counts.get(record['state'], 0) + 1
+    return counts
+
+
+def format_counts(counts: dict[str, int]) -> str:
+    unfinished = counts[QUEUED] + counts[IN_FLIGHT]
+    return f"uploaded: {counts[DONE]} already in DART: {counts[EXISTING]} failed: {counts[FAILED]} unfinished: {unfinished}"
+
+
+@click.command(name='merge')
+@global_options.dart_options
+@click.option('--metrics', 'metrics_paths', required=False, multiple=True, type=click.Path(exists=True, dir_okay=False), help='JSON metrics summary (--metrics-out) of a submission to combine (can be used multiple times)')
+@click.option('--merged-journal', required=False, default=None, type=click.Path(dir_okay=False, writable=True), help='Write the combined journal (the last record of each file) to this file')
+@click.option('--merged-metrics', required=False, default=None, type=click.Path(dir_okay=False, writable=True), help='Write the combined metrics summary to this file')
+@click.argument('journals', required=True, nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def merge_command(journals, metrics_paths, merged_journal, merged_metrics):
+    """Combine the journals and metrics of forklift submissions (e.g. the shards of a --shard submission) into one report"""
+    if merged_metrics is not None and len(metrics_paths) == 0:
+        raise click.exceptions.BadOptionUsage('merged_metrics', '--merged-metrics requires --metrics')
+    records = {}
+    for journal_path in journals:
+        journal_records = load_journal(journal_path)
+        print(f'{journal_path}: {format_counts(state_counts(journal_records))}')
+        merge_records(records, journal_records)
+    print(f'Files: {len(records)} {format_counts(state_counts(records))}')
+    if merged_journal is not None:
+        write_atomically(merged_journal, ''.join(json.dumps(record) + '\n' for record in records.values()))
+
+    if len(metrics_paths) > 0:
+        summaries = []
+        for metrics_path in metrics_paths:
+            with open(metrics_path, 'rt') as metrics_file:
+                summaries.append(json.load(metrics_file))
+        summary = merge_summaries(summaries)
+        print(f"Requests: {summary['requests']} errors: {summary['errors']} "
+              f"sent: {summary['bytes_sent']} bytes in {round(summary['duration_seconds'] / 60, 2)} minutes "
+              f"({round(summary['bytes_per_second'])} bytes/s)")
+        if merged_metrics is not None:
+            write_atomically(merged_metrics, json.dumps(summary, indent=4))
@@ -0,0 +1,79 @@
+import json
+import os
+from typing import Callable, Optional
+
+# Fields of the submission's metadata that replace a document's own values
+OVERRIDDEN_FIELDS = ['reannotate', 'genre']
+# Fields of the submission's metadata that are added to a document's own values
+MERGED_FIELDS = ['labels', 'tenants']
+
+
+def meta_filenames(filename: str) -> list[str]:
+    """
+    Names the .meta file holding per-file metadata for filename (in the same directory) may have,
+    in order of preference: its last extension replaced with .meta, so that e.g. report.v2.pdf and
+    report.pdf have their own, then, as .meta files were named before, everything from its first
+    dot replaced (report.meta for report.v2.pdf)
+    """
+    names = [f"{os.path.splitext(filename)[0]}.meta"]
+    legacy_name = f"{filename.split('.')[0]}.meta"
+    if legacy_name != names[0]:
+        names.append(legacy_name)
+    return names
+
+
+def find_meta_filename(filename: str, exists: Callable[[str], bool]) -> Optional[str]:
+    """The first of the meta_filenames of filename that exists, if any"""
+    return next((name for name in meta_filenames(filename) if exists(name)), None)
+
+
+def existing_meta_path(file_path: str) -> Optional[str]:
+    """Path of the .meta file of file_path if there is one"""
+    directory = os.path.dirname(file_path)
+    meta_name = find_meta_filename(os.path.basename(file_path), lambda name: os.path.isfile(os.path.join(directory, name)))
+    return None if meta_name is None else os.path.join(directory, meta_name)
+
+
+class DocumentMetadata:
+    """
+    Upload metadata of each document: its .meta file (if any) with the submission's reannotate,
+    genre, labels and tenants merged in. The merge is prepared once per submission, and the
+    metadata of documents without a .meta file is serialized only once.
+    """
+
+    def __init__(self, metadata_obj: dict):
+        self.overrides = {field: metadata_obj[field] for field in OVERRIDDEN_FIELDS if field in metadata_obj}
+        self.merged = {field: metadata_obj[field] for field in MERGED_FIELDS if field in metadata_obj}
+        self.default_json = json.dumps(self.merge({}))
+
+    def merge(self, doc_metadata: dict) -> dict:
+        doc_metadata.update(self.overrides)
+        for field, values in self.merged.items():
+            if field not in doc_metadata:
+                doc_metadata[field] = values
+            else:
+                doc_metadata[field] = list(set(doc_metadata[field]).union(values))
+        return doc_metadata
+
+    def metadata_json(self, meta_path: Optional[str]) -> str:
+        """
+        :param meta_path: the document's .meta file, or None if it has none
+        :raise OSError, ValueError: if the .meta file cannot be read or parsed
+        """
+        if meta_path is None:
+            return self.default_json
+        with open(meta_path, 'r', encoding='utf-8') as meta_file:
+            return self.merged_json(meta_file.read())
+
+    def merged_json(self, meta_text: Optional[str]) -> str:
+        """
+        :param meta_text: content of the document's .meta file, or None if it has none
+        :raise ValueError: if meta_text cannot be parsed
+        """
+        if meta_text is None:
+            return self.default_json
+        return self.document_json(json.loads(meta_text))
+
+    def document_json(self, doc_metadata: dict) -> str:
+        """Upload metadata of a document given its own metadata (which is updated)"""
+        return json.dumps(self.merge(doc_metadata))
@@ -0,0 +1,92 @@
+import hashlib
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, BinaryIO, Callable, Iterator, NamedTuple, Optional
+
+from dart_cli.forklift.existing import HASH_CHUNK_SIZE, file_md5
+from dart_cli.forklift.metadata import DocumentMetadata
+
+# Files being prepared per prep worker, bounding how far preparation runs ahead of uploads
+PREPARING_PER_WORKER = 4
+
+
+class PreparedFile(NamedTuple):
+    """
+    A file ready for upload: its metadata, and its document id if it was hashed ahead of the
+    upload, or the reason it cannot be uploaded (error). Files on disk are read by the upload
+    itself. Files that are not on disk (archive members) have the name to upload them with,
+    and either their content or an opener for it (and its size, as the opened file cannot
+    tell it).
+    """
+    file_path: str
+    content: Optional[bytes]
+    document_id: Optional[str]
+    metadata: Optional[str]
+    error: Optional[str] = None
+    filename: Optional[str] = None
+    opener: Optional[Callable[[], BinaryIO]] = None
+    size: Optional[int] = None
+
+
+def resolve_metadata(document_metadata: DocumentMetadata, entry: tuple[str, Optional[str]]) -> PreparedFile:
+    """Merge the upload metadata of a discovered (file path, meta path), leaving the file to be read by the upload"""
+    file_path, meta_path = entry
+    try:
+        return PreparedFile(file_path, None, None, document_metadata.metadata_json(meta_path))
+    except (OSError, ValueError) as e:
+        return PreparedFile(file_path, None, None, None, f'FAILED TO READ METADATA. {meta_path}: {e}')
+
+
+def hash_file(prepared_file: PreparedFile) -> PreparedFile:
+    """
+    Compute the document id (content MD5) of a file whose metadata is resolved, reading it in
+    chunks (run in a prep process). Only the id is sent back: the upload streams the file from disk.
+    """
+    if prepared_file.error is not None:
+        return prepared_file
+    try:
+        document_id = file_md5(prepared_file.file_path)
+    except OSError as e:
+        return prepared_file._replace(metadata=None, error=f'FAILED TO READ FILE. {e}')
+    return prepared_file._replace(document_id=document_id)
+
+
+def prepare_file(document_metadata: DocumentMetadata, entry: tuple[str, Optional[str]]) -> PreparedFile:
+    """Hash a discovered (file path, meta path) and merge its upload metadata (run in a prep process)"""
+    return hash_file(resolve_metadata(document_metadata, entry))
+
+
+def prepared_document_id(prepared_file: PreparedFile) -> Optional[str]:
+    """Document id of a prepared file, hashing its content if it was not hashed yet (None if it cannot be read)"""
+    if prepared_file.document_id is not None:
+        return prepared_file.document_id
+    if prepared_file.content is not None:
+        return hashlib.md5(prepared_file.content).hexdigest()
+    try:
+        if prepared_file.opener is None:
+            return file_md5(prepared_file.file_path)
+        md5 = hashlib.md5()
+        with prepared_file.opener() as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+                md5.update(chunk)
+        return md5.hexdigest()
+    except OSError:
+        return None
+
+
+def prepared_files(executor: Executor,
+                   prepare: Callable[[Any], PreparedFile],
+                   entries: Iterator,
+                   max_preparing: int) -> Iterator[PreparedFile]:
+    """
+    Prepare entries (e.g. discovered files, with prepare_file) on executor, yielding them in
+    order. Unlike Executor.map, at most max_preparing entries are submitted ahead of the
+    consumer, so discovery is not drained into memory.
+    """
+    preparing = deque()
+    for entry in entries:
+        preparing.append(executor.submit(prepare, entry))
+        if len(preparing) >= max_preparing:
+            yield preparing.popleft().result()
+    while len(preparing) > 0:
+        yield preparing.popleft().result()
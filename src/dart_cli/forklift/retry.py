@@ -0,0 +1,33 @@
+import click
+
+from dart_cli.cli import global_options
+from dart_cli.dart_context.dart_context import DartContext
+from dart_cli.forklift.submit import submission_metadata, upload_raws
+
+
+@click.command(name='retry-failed')
+@global_options.dart_options
+@click.option('-s', '--succeeded-dir', required=False, default=None)
+@click.option('-f', '--failed-dir', required=False, default=None)
+@click.option('--ignore-meta-files', required=False, is_flag=True, flag_value=True, default=False, help='Do not use files with extension ".meta" as per-file metadata of files that failed before they were uploaded')
+@click.option('--metadata', required=False, default=None, help='Metadata of files that failed before they were uploaded (others are uploaded with the metadata in the report)')
+@click.option('--metadata-file', required=False, default=None)
+@click.option('--label', required=False, default=None, multiple=True, help='Values should be separated by semicolons')
+@click.option('--threads', '--upload-workers', 'threads', required=False, default=6, type=click.IntRange(min=1), help='Number of concurrent uploads')
+@click.option('--journal', 'journal_path', required=False, default=None, help='File recording the upload state of each file (default: under ~/.dart, named after the reports and forklift url)')
+@click.option('--failure-report', 'failure_report_path', required=False, default=None, type=click.Path(dir_okay=False, writable=True), help='JSONL file recording the files that fail again (default: next to the journal, ending in .failures.jsonl)')
+@click.option('--progress/--no-progress', 'show_progress', required=False, default=True, help='Show live throughput, latency and ETA (a status line on a terminal, otherwise a log line every 30s)')
+@click.option('--max-upload-mbps', required=False, default=None, type=click.FloatRange(min=0, min_open=True), help='Maximum upload bandwidth in megabits per second, shared by all upload workers and all dart processes on this host uploading to the same forklift')
+@click.option('-v', '--verbose', required=False, is_flag=True, default=False, help='Print every file as it is posted, with its metadata')
+@click.option('--resume', required=False, is_flag=True, default=False, help='Continue from the journal of a previous retry: skip uploaded files and retry failed and interrupted ones')
+@click.argument('reports', required=True, nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@global_options.pass_dart_context
+def retry_failed_command(dart_context: DartContext, reports, succeeded_dir, failed_dir, ignore_meta_files, metadata,
+                         metadata_file, label, threads, journal_path, failure_report_path, show_progress, max_upload_mbps,
+                         verbose, resume):
+    """Upload the files listed in the failure reports of forklift submissions again"""
+    metadata_obj = submission_metadata(dart_context, metadata, metadata_file, label)
+    upload_raws(dart_context, (), None, failed_dir, succeeded_dir, metadata_obj, threads, ignore_meta_files,
+                journal_path=journal_path, resume=resume, verbose=verbose, show_progress=show_progress,
+                failure_report_path=failure_report_path, retry_reports=reports,
+                max_upload_mbps=max_upload_mbps)
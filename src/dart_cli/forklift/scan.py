@@ -0,0 +1,61 @@
+import os
+from typing import Callable, Iterator, Optional
+
+from dart_cli.forklift.metadata import find_meta_filename
+
+
+def is_document_name(filename: str, ignore_meta: bool) -> bool:
+    """
+    Whether a file is uploaded: hidden files (e.g. partial downloads) are not, and neither are
+    .meta files with ignore_meta
+    """
+    return not filename.startswith('.') and not (ignore_meta and filename.endswith('.meta'))
+
+
+def scan_directory(directory: str, with_meta=True, exclude_dirs: tuple = (),
+                   on_directory: Optional[Callable[[str], None]] = None,
+                   report: Callable[[str], None] = print) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Yield the files under directory (except hidden files) as the directory tree is read, so
+    that nothing waits for the whole tree to be listed. With with_meta, each file is paired
+    with the path of its .meta file if the directory has one: .meta files are indexed while
+    the directory is listed, so no file is stat'ed to look for one, and the files of a
+    directory are yielded once it has been listed. As with --ignore-meta-files, .meta files
+    themselves are only left out without with_meta.
+
+    Directories in exclude_dirs are not read, and on_directory is called with each directory
+    just before it is listed (e.g. to watch it for files written while it is listed).
+    """
+    exclude_dirs = {os.path.abspath(exclude_dir) for exclude_dir in exclude_dirs if exclude_dir is not None}
+    pending_dirs = [directory]
+    while len(pending_dirs) > 0:
+        current_dir = pending_dirs.pop()
+        if len(exclude_dirs) > 0 and os.path.abspath(current_dir) in exclude_dirs:
+            continue
+        filenames = []
+        meta_filenames = set()
+        if on_directory is not None:
+            on_directory(current_dir)
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Like os.walk, do not follow symbolic links to directories
+                        if not entry.is_symlink():
+                            pending_dirs.append(entry.path)
+                    elif not is_document_name(entry.name, ignore_meta=not with_meta):
+                        continue
+                    elif entry.name.endswith('.meta'):
+                        meta_filenames.add(entry.name)
+                        filenames.append(entry.name)
+                    elif with_meta:
+                        filenames.append(entry.name)
+                    else:
+                        yield entry.path, None
+        except OSError as e:
+            report(f'Cannot read directory {current_dir}: {e}')
+
+        for filename in filenames:
+            meta_name = find_meta_filename(filename, meta_filenames.__contains__)
+            meta_path = None if meta_name is None else os.path.join(current_dir, meta_name)
+            yield os.path.join(current_dir, filename), meta_path
@@ -0,0 +1,73 @@
+import itertools
+import os
+import queue
+from bisect import bisect_left, insort
+from typing import Callable
+
+from dart_cli.forklift.prepare import PreparedFile
+
+WALK = 'walk'
+LARGEST_FIRST = 'largest-first'
+MIXED = 'mixed'
+SCHEDULES = [WALK, LARGEST_FIRST, MIXED]
+
+
+def prepared_file_size(prepared_file: PreparedFile) -> int:
+    """Number of bytes a prepared file will upload (0 if it cannot be told, e.g. the file is gone)"""
+    if prepared_file.content is not None:
+        return len(prepared_file.content)
+    if prepared_file.size is not None:
+        return prepared_file.size
+    try:
+        return os.stat(prepared_file.file_path).st_size
+    except OSError:
+        return 0
+
+
+class SizeScheduledQueue(queue.Queue):
+    """
+    Queue of (index, prepared file) entries that hands out the largest queued file with get
+    and the smallest with get_smallest, so that large files start early instead of making
+    the tail of a run, while workers taking the smallest keep small files moving. Files are
+    only ordered among those queued, so with a bounded queue the order is kept within a
+    window of maxsize files. Files of the same size are taken in the order they were queued.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(maxsize)
+        self.__sequence = itertools.count()
+
+    def _init(self, maxsize):
+        # (size, sequence, entry), sorted by size and then by queue order
+        self.queue = []
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        insort(self.queue, item)
+
+    def _get(self):
+        # Earliest queued of the largest files
+        largest = self.queue[-1][0]
+        return self.queue.pop(bisect_left(self.queue, (largest,)))[2]
+
+    def put(self, item, block=True, timeout=None):
+        # The file is stat'ed here, outside the queue's lock
+        _, prepared_file = item
+        super().put((prepared_file_size(prepared_file), next(self.__sequence), item), block, timeout)
+
+    def get_smallest(self):
+        """Remove and return the smallest queued entry, waiting for one to be queued"""
+        with self.not_empty:
+            while not self._qsize():
+                self.not_empty.wait()
+            item = self.queue.pop(0)[2]
+            self.not_full.notify()
+            return item
+
+
+def alternating(*takes: Callable[[], tuple]) -> Callable[[], tuple]:
+    """Take entries with each of takes in turn (e.g. the largest, then the smallest queued file)"""
+    turns = itertools.cycle(takes)
+    return lambda: next(turns)()
@@ -0,0 +1,69 @@
+import hashlib
+import os
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from dart_cli.forklift.prepare import PreparedFile, prepared_document_id
+
+SHARD_BY_PATH = 'path'
+SHARD_BY_CONTENT = 'content'
+
+
+class Shard(NamedTuple):
+    """Shard index (1 to count) of a submission split across count hosts"""
+    index: int
+    count: int
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+    def owns(self, key: str) -> bool:
+        """Whether a file with this shard key belongs to this shard (the same on every host)"""
+        digest = hashlib.md5(key.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') % self.count == self.index - 1
+
+
+def parse_shard(text: str) -> Shard:
+    """
+    Parse a shard given as i/N (e.g. 3/8), with i from 1 to N
+    :raise ValueError: if text is not a shard
+    """
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f'{text} is not a shard, expected i/N (e.g. 3/8)')
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f'{text} is not a shard, expected i/N with i from 1 to N')
+    return Shard(index, count)
+
+
+def path_shard_key(path: str, base_dir: Optional[str]) -> str:
+    """
+    Shard key of a path: relative to the input it was found in (e.g. --input-dir), so that hosts
+    mounting the input in different places still agree on the shard of each file
+    """
+    if base_dir is None:
+        return path
+    return os.path.relpath(path, base_dir).replace(os.sep, '/')
+
+
+def in_shard(entries: Iterator, shard: Shard, base_dir: Optional[str] = None) -> Iterator:
+    """Keep the (file path, ...) entries (discovered files or prepared files) whose path belongs to shard"""
+    for entry in entries:
+        if shard.owns(path_shard_key(entry[0], base_dir)):
+            yield entry
+
+
+def in_content_shard(prepared: Iterator[PreparedFile], shard: Shard,
+                     document_id: Callable[[PreparedFile], Optional[str]] = prepared_document_id) -> Iterator[PreparedFile]:
+    """
+    Keep the prepared files whose content (document id) belongs to shard, so that copies of a
+    document are handled by a single host. Every host reads every file to hash it. Files that
+    cannot be read or prepared are sharded by path, so that one host reports each of them.
+    """
+    for prepared_file in prepared:
+        doc_id = document_id(prepared_file) if prepared_file.error is None else None
+        if doc_id is None:
+            if shard.owns(prepared_file.file_path):
+                yield prepared_file
+        elif shard.owns(doc_id):
+            yield prepared_file._replace(document_id=doc_id)
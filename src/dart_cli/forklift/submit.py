@@ -1,118 +1,190 @@
+import itertools
 import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional
 
 import click
+from dart_cli.corpex.corpex_utilties import existing_document_ids
 from dart_cli.dart_context.dart_context import DartContext
 
 from dart_cli.cli import global_options
-import requests
-from time import sleep
+from dart_cli.dart_rest.attempts import RequestAttempt
+from dart_cli.dart_rest.concurrency import AimdConcurrencyLimit, DEFAULT_MIN_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+from dart_cli.dart_rest.multipart import MultipartStream
+from dart_cli.dart_rest.rate_limit import BandwidthShaper
+from dart_cli.dart_rest.rest_client import DartRestClient
+from dart_cli.forklift.archives import archive_members
+from dart_cli.forklift.existing import ExistingDocumentFilter
+from dart_cli.forklift.failures import RESPONSE_EXCERPT_LENGTH, AttemptCounter, FailureReport, default_failure_report_path, failed_files, load_failures
+from dart_cli.forklift.manifest import manifest_files
+from dart_cli.forklift.metadata import DocumentMetadata, existing_meta_path
+from dart_cli.forklift.scan import scan_directory
+from dart_cli.forklift.prepare import PREPARING_PER_WORKER, PreparedFile, hash_file, prepare_file, prepared_document_id, prepared_files, resolve_metadata
+from dart_cli.forklift.journal import UploadJournal, default_journal_path, uploaded_document_id
+from dart_cli.forklift.schedule import MIXED, SCHEDULES, WALK, SizeScheduledQueue, alternating
+from dart_cli.forklift.shard import SHARD_BY_CONTENT, SHARD_BY_PATH, Shard, in_content_shard, in_shard, parse_shard
+from dart_cli.forklift.watch import DEFAULT_POLL_SECONDS, DEFAULT_SETTLE_SECONDS, DirectoryWatch
 from time import time
 import queue
 import threading
 import shutil
+from functools import partial
 
-from dart_cli.utilities.auth import generate_auth_headers
+from dart_cli.utilities.progress import UploadProgress
 from dart_cli.utilities.url import get_base_url
 
+# Bound on files discovered but not yet uploaded, so that discovery never runs far ahead of uploads
+FILES_QUEUE_SIZE = 10000
+# Bound per upload worker on archive members read ahead (which may hold their content)
+PREPARED_FILES_PER_WORKER = 4
+
 
 class WorkerThread(threading.Thread):
-    def __init__(self, files_queue, service_url: str, completed_file_path: str, failed_file_path: str, auth_headers: {}, metadata_obj: dict):
+    def __init__(self, files_queue, service_url: str, completed_file_path: str, failed_file_path: str, rest_client: DartRestClient, concurrency_limit: AimdConcurrencyLimit = None, journal: UploadJournal = None, verbose=False, progress: UploadProgress = None, take_file: Callable[[], tuple] = None, failure_report: FailureReport = None, attempt_counter: AttemptCounter = None, throttle: Callable[[int], None] = None):
         threading.Thread.__init__(self)
         self.files_queue = files_queue
+        # How the worker takes its next (index, prepared file) from files_queue (default: in queue order)
+        self.take_file = files_queue.get if take_file is None else take_file
         self.service_url = service_url
         self.completed_file_path = completed_file_path
         self.failed_file_path = failed_file_path
-        self.auth_headers = auth_headers
-        self.metadata_obj = metadata_obj
+        self.rest_client = rest_client
+        self.concurrency_limit = concurrency_limit
+        self.journal = journal
+        self.verbose = verbose
+        self.progress = progress
+        self.failure_report = failure_report
+        self.attempt_counter = attempt_counter
+        self.throttle = throttle
+
+    def report(self, message: str):
+        if self.progress is not None:
+            self.progress.log(message)
+        else:
+            print(message)
 
     def run(self):
         while True:
-            job_to_scan = self.files_queue.get()
-            file_index = job_to_scan['index']
-            file_path = job_to_scan['file_path']
-            if file_index % 500 == 0:
-                print(f'Posting: #{file_index} filename: {file_path.name}')
-            doc_metadata = {}
-            if 'meta_path' in job_to_scan:
-                meta_path = job_to_scan['meta_path']
-                if meta_path.is_file():
-                    with open(meta_path, 'r', encoding='utf-8') as meta_file:
-                        doc_metadata = json.loads(meta_file.read())
-                        print(doc_metadata)
-
-            if 'reannotate' in self.metadata_obj:
-                doc_metadata['reannotate'] = self.metadata_obj['reannotate']
-
-            if 'genre' in self.metadata_obj:
-                doc_metadata['genre'] = self.metadata_obj['genre']
-
-            if 'labels' in self.metadata_obj:
-                if 'labels' not in doc_metadata:
-                    doc_metadata['labels'] = self.metadata_obj['labels']
-                else:
-                    label_set = set(doc_metadata['labels'])
-                    for label in self.metadata_obj['labels']:
-                        label_set.add(label)
-                    doc_metadata['labels'] = list(label_set)
-
-            if 'tenants' in self.metadata_obj:
-                if 'tenants' not in doc_metadata:
-                    doc_metadata['tenants'] = self.metadata_obj['tenants']
-                else:
-                    label_set = set(doc_metadata['tenants'])
-                    for label in self.metadata_obj['tenants']:
-                        label_set.add(label)
-                    doc_metadata['tenants'] = list(label_set)
-
-            status, message = upload_file(file_path=file_path, service_url=self.service_url, auth_headers=self.auth_headers, metadata=json.dumps(doc_metadata))
-            if status is True:
+            file_index, prepared_file = self.take_file()
+            try:
+                self.upload(file_index, prepared_file)
+            except Exception as e:
+                # e.g. the file cannot be moved, or the journal cannot be written: the worker carries on with the next file
+                self.failed_unexpectedly(prepared_file, e)
+            finally:
+                self.files_queue.task_done()
+
+    def upload(self, file_index: int, prepared_file: PreparedFile):
+        file_path = prepared_file.file_path
+        metadata = prepared_file.metadata
+        if self.verbose:
+            self.report(f'Posting: #{file_index} filename: {file_path} metadata: {metadata}')
+        elif self.progress is None and file_index % 500 == 0:
+            print(f'Posting: #{file_index} filename: {os.path.basename(file_path)}')
+
+        if self.journal is not None:
+            self.journal.in_flight(file_path)
+        if self.progress is not None:
+            self.progress.file_started()
+        if self.concurrency_limit is not None:
+            self.concurrency_limit.acquire()
+        if self.attempt_counter is not None:
+            self.attempt_counter.start()
+        upload_start = time()
+        try:
+            result = upload_file(file_path=file_path, service_url=self.service_url, rest_client=self.rest_client, metadata=metadata, content=prepared_file.content, filename=prepared_file.filename, opener=prepared_file.opener, size=prepared_file.size, throttle=self.throttle)
+        except Exception as e:
+            result = UploadResult(False, f'FAILED TO UPLOAD. {type(e).__name__}: {e}')
+        finally:
+            if self.concurrency_limit is not None:
+                self.concurrency_limit.release()
+        elapsed = time() - upload_start
+        status, message = result.success, result.message
+        if self.progress is not None:
+            self.progress.file_finished(status is True)
+        # Archive members cannot be moved
+        movable = prepared_file.filename is None
+        if status is True:
+            # Moved first, so a file that cannot be moved is only journaled as failed
+            if movable:
                 move_file(file_path, self.completed_file_path)
-            else:
-                move_file(file_path, self.failed_file_path)
-                print(f'failed: {status} message: {message}')
-            self.files_queue.task_done()
+            if self.journal is not None:
+                self.journal.done(file_path, uploaded_document_id(message))
+        else:
+            if self.journal is not None:
+                self.journal.failed(file_path, message)
+            moved_to = move_file(file_path, self.failed_file_path) if movable else None
+            if self.failure_report is not None:
+                attempts = None if self.attempt_counter is None else self.attempt_counter.count()
+                self.failure_report.failed(file_path, message, metadata, result.status_code, result.response_excerpt,
+                                           attempts, elapsed, moved_to)
+            self.report(f'failed: {status} message: {message}')
+
+    def failed_unexpectedly(self, prepared_file: PreparedFile, error: Exception):
+        """Record a file as failed after an error outside its upload (the file may or may not have been uploaded)"""
+        file_path = prepared_file.file_path
+        message = f'FAILED TO UPLOAD. {type(error).__name__}: {error}'
+        self.report(f'failed: {file_path} message: {message}')
+        try:
+            if self.journal is not None:
+                self.journal.failed(file_path, message)
+            if self.failure_report is not None:
+                self.failure_report.failed(file_path, message, prepared_file.metadata)
+        except Exception as e:
+            self.report(f'Cannot record the failure of {file_path}: {e}')
+
+
+class ProducerThread(threading.Thread):
+    """
+    Queues the files to upload (see queue_files) alongside the workers, keeping the exception
+    that stopped it (e.g. an unreadable archive or manifest, or corpex failing --skip-existing
+    lookups) so the submission can fail with it once the files already queued are uploaded
+    """
+
+    def __init__(self, files_queue: queue.Queue, prepared: Iterator[PreparedFile], journal: UploadJournal = None,
+                 progress: UploadProgress = None, failure_report: FailureReport = None):
+        threading.Thread.__init__(self, daemon=True)
+        self.files_queue = files_queue
+        self.prepared = prepared
+        self.journal = journal
+        self.progress = progress
+        self.failure_report = failure_report
+        self.error: Optional[Exception] = None
+
+    def run(self):
+        try:
+            queue_files(self.files_queue, self.prepared, self.journal, self.progress, self.failure_report)
+        except Exception as e:
+            self.error = e
+
+
+class UploadResult(NamedTuple):
+    """Outcome of an upload: the response text if it succeeded, otherwise the failure message and the response's status code and start of its body (if there was a response)"""
+    success: bool
+    message: str
+    status_code: Optional[int] = None
+    response_excerpt: Optional[str] = None
 
 
-def try_post(url, post_files, sleep_time, headers, numtimes):
-    times_left = numtimes - 1
+def try_post(rest_client: DartRestClient, url, body: MultipartStream) -> UploadResult:
+    """Post an upload (retries are handled by rest_client)"""
     try:
-        response = requests.post(f"{url}", files=post_files, headers=headers)
-        if response.status_code == 201 or response.status_code == 200:
-            response.close()
-            return [True, response.text]
-        else:
-            if times_left == 0:
-                response.close()
-                return [False, f"FAILED TO POST. Response status-code: {response.status_code}"]
-            else:
-                sleep(sleep_time)
-                response.close()
-                return try_post(url, post_files, sleep_time, headers, times_left)
+        with rest_client.post(f"{url}", data=body, headers={'Content-Type': body.content_type}) as response:
+            if response.status_code == 201 or response.status_code == 200:
+                return UploadResult(True, response.text, response.status_code)
+            return UploadResult(False, f"FAILED TO POST. Response status-code: {response.status_code}",
+                                response.status_code, response.text[:RESPONSE_EXCERPT_LENGTH])
     except Exception as e:
         print(f"Exception: {e}")
-        if times_left == 0:
-            return [False, f"FAILED TO POST. Exception: {str(e)}"]
-        else:
-            sleep(sleep_time)
-            return try_post(url, post_files, sleep_time, headers, times_left)
+        return UploadResult(False, f"FAILED TO POST. Exception: {str(e)}")
 
 
-def generate_files_queue(files, directory: str, ignore_meta):
-    _files_dict = {}
-    _files_queue = queue.Queue()
-    index = 0
-
-    def build_entry(file_path):
-        basename = os.path.basename(file_path)
-        file_path_path = Path(file_path)
-        queue_entry = {'index': index, 'file_path': file_path_path}
-        if not ignore_meta:
-            meta_path = file_path_path.parent.joinpath(f"{basename.split('.')[0]}.meta")
-            queue_entry['meta_path'] = meta_path
-        return queue_entry
-
+def discover_files(files, directory: str, ignore_meta) -> Iterator[tuple[str, Optional[str]]]:
+    """Yield each file to upload, with the path of its .meta file if it has one and not ignore_meta"""
     if files is not None:
         for file_path in files:
             if os.path.isdir(file_path):
@@ -122,58 +194,329 @@ def generate_files_queue(files, directory: str, ignore_meta):
                 continue
             if basename.endswith('.meta'):
                 continue
-
-            _files_queue.put(build_entry(file_path))
-            index += 1
+            yield file_path, None if ignore_meta else existing_meta_path(file_path)
 
     if directory is not None:
-        for (root_dir, sub_dirs, files) in os.walk(directory):
-            for file in files:
-                basename = os.path.basename(file)
-                if basename.startswith('.'):
-                    continue
-                if ignore_meta and basename.endswith('.meta'):
-                    continue
-                file_path = os.path.join(root_dir, file)
-                _files_queue.put(build_entry(file_path))
-                index += 1
-
-    return _files_queue
-
-
-def upload_file(file_path: str, service_url: str, auth_headers: {}, metadata: str):
-    with open(file_path, 'rb') as file:
-        post_files = {
-            'file': (file.name, file),
-            'metadata': (None, metadata, 'application/json')
-        }
-        return try_post(url=service_url, post_files=post_files, sleep_time=0.2, numtimes=1, headers=auth_headers)
-
-
-def move_file(source_file_path: str, destination_file_path: str):
-    if destination_file_path is not None:
-        filename = os.path.basename(source_file_path)
-        shutil.move(source_file_path, Path(destination_file_path).joinpath(filename))
+        yield from scan_directory(directory, with_meta=not ignore_meta)
 
 
-def upload_raws(dart_context: DartContext, files, input_dir, failed_dir, succeeded_dir, metadata_obj, threads, ignore_meta_files):
+def watched_files(watch: DirectoryWatch, ignore_meta) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Yield each document written to a watched directory once it has settled, with the path of
+    its .meta file if it has one then (so .meta files should be written before their documents)
+    """
+    for file_path in watch.documents():
+        yield file_path, None if ignore_meta else existing_meta_path(file_path)
+
+
+def skip_uploaded(discovered: Iterator[tuple], journal: UploadJournal) -> Iterator[tuple]:
+    """Leave out (file path, ...) entries the journal of a previous run records as uploaded"""
+    skipped = 0
+    for entry in discovered:
+        if journal.was_done(entry[0]):
+            skipped += 1
+        else:
+            yield entry
+    if skipped > 0:
+        print(f'Skipped {skipped} files already uploaded')
+
+
+def queue_files(files_queue: queue.Queue, prepared: Iterator[PreparedFile], journal: UploadJournal = None,
+                progress: UploadProgress = None, failure_report: FailureReport = None) -> int:
+    """
+    Put (index, prepared file) entries on files_queue, which blocks while the queue is
+    full, recording them as queued in journal.
+    Files that could not be prepared are recorded as failed instead.
+    :return: the number of files queued
+    """
+    index = 0
+    for prepared_file in prepared:
+        file_path = prepared_file.file_path
+        if prepared_file.error is not None:
+            if journal is not None:
+                journal.failed(file_path, prepared_file.error)
+            if failure_report is not None:
+                failure_report.failed(file_path, prepared_file.error)
+            if progress is not None:
+                progress.log(f'failed: {file_path} message: {prepared_file.error}')
+            else:
+                print(f'failed: {file_path} message: {prepared_file.error}')
+            continue
+        if journal is not None:
+            journal.queued(file_path)
+        if progress is not None:
+            progress.add_total()
+        files_queue.put((index, prepared_file))
+        index += 1
+    if progress is not None:
+        progress.total_known()
+    return index
+
+
+def existing_ids_lookup(dart_context: DartContext, tenants: list[str]):
+    """Look up document ids in corpex; with tenants, a document only counts as existing if it is in all of them"""
+    def existing_ids(doc_ids: list[str]) -> set[str]:
+        if len(tenants) == 0:
+            return existing_document_ids(dart_context, doc_ids)
+        existing = set(doc_ids)
+        for tenant in tenants:
+            existing &= existing_document_ids(dart_context, sorted(existing), tenant)
+            if len(existing) == 0:
+                break
+        return existing
+    return existing_ids
+
+
+def upload_file(file_path: str, service_url: str, rest_client: DartRestClient, metadata: str, content: bytes = None,
+                filename: str = None, opener: Callable[[], BinaryIO] = None, size: int = None,
+                throttle: Callable[[int], None] = None) -> UploadResult:
+    """
+    Upload a file, reading it unless its content was read ahead (small tar archive members)
+    or it is opened with opener (other archive members). Files are read in chunks as the
+    request is sent (see MultipartStream), so the upload never holds the whole file.
+    :param filename: name to upload the file with (default file_path)
+    :param size: size of the file opened with opener
+    :param throttle: called with the size of each chunk of the request body before it is sent (see BandwidthShaper)
+    """
+    upload_name = file_path if filename is None else filename
+    if content is not None:
+        body = MultipartStream(throttle=throttle).add_field('file', content, filename=upload_name)
+        body.add_field('metadata', metadata, content_type='application/json')
+        return try_post(rest_client=rest_client, url=service_url, body=body)
+    try:
+        file = open(file_path, 'rb') if opener is None else opener()
+    except Exception as e:
+        # Archive members can also fail with e.g. zipfile.BadZipFile or NotImplementedError (unsupported compression)
+        return UploadResult(False, f"FAILED TO READ FILE. {e}")
+    with file:
+        body = MultipartStream(throttle=throttle).add_file('file', upload_name, file, size=size)
+        body.add_field('metadata', metadata, content_type='application/json')
+        return try_post(rest_client=rest_client, url=service_url, body=body)
+
+
+def move_file(source_file_path: str, destination_file_path: str) -> Optional[str]:
+    """:return: where the file was moved (None if it was not)"""
+    if destination_file_path is not None:
+        os.makedirs(destination_file_path, exist_ok=True)
+        filename = os.path.basename(source_file_path)
+        return str(shutil.move(source_file_path, Path(destination_file_path).joinpath(filename)))
+    return None
+
+
+def adaptive_upload_limit(rest_client: DartRestClient, url: str, threads: int, min_threads: int, max_threads: int,
+                          report: Callable[[str], None] = print) -> AimdConcurrencyLimit:
+    """
+    Build a concurrency limit starting at threads uploads in flight, fed by every attempt
+    rest_client makes to url: connection errors, 429s and 5xx responses shrink it, and
+    other responses grow it unless their latency per byte uploaded shows the service is
+    backing up
+    """
+    concurrency_limit = AimdConcurrencyLimit(threads,
+                                             floor=min_threads,
+                                             ceiling=max_threads,
+                                             on_change=lambda limit: report(f'Adjusted concurrent uploads to {limit}'))
+
+    def observe(attempt: RequestAttempt):
+        if attempt.url != url:
+            return
+        if attempt.response is None or attempt.response.status_code == 429 or attempt.response.status_code >= 500:
+            concurrency_limit.on_congestion(attempt.elapsed, attempt.bytes_sent)
+        elif attempt.response.status_code < 400:
+            concurrency_limit.on_success(attempt.elapsed, attempt.bytes_sent)
+
+    rest_client.add_listener(observe)
+    return concurrency_limit
+
+
+def upload_raws(dart_context: DartContext, files, input_dir, failed_dir, succeeded_dir, metadata_obj, threads, ignore_meta_files,
+                adaptive_threads=False, min_threads=DEFAULT_MIN_CONCURRENCY, max_threads=DEFAULT_MAX_CONCURRENCY,
+                journal_path=None, resume=False, skip_existing=False, verbose=False, show_progress=True, prep_workers=0,
+                archives=(), manifests=(), schedule=WALK, small_file_workers=None, shard: Shard = None,
+                shard_by=SHARD_BY_PATH, watch=False, settle_seconds=DEFAULT_SETTLE_SECONDS, watch_poll=None,
+                failure_report_path=None, retry_reports=(), max_upload_mbps=None):
     url = get_base_url('forklift', dart_context) + '/upload'
-    auth_headers = generate_auth_headers(dart_context)
+    if journal_path is None:
+        journal_path = default_journal_path(url, [*files, *archives, *manifests, *retry_reports], input_dir, None if shard is None else str(shard))
+    # Read before the failure report is opened, which may be one of them
+    retry_failures = [load_failures(report) for report in retry_reports]
+    journal = UploadJournal(journal_path, resume=resume)
+    print(f'Journal: {journal_path}')
+    if failure_report_path is None:
+        failure_report_path = default_failure_report_path(journal_path)
+    failure_report = FailureReport(failure_report_path)
+    if shard is not None:
+        print(f'Shard: {shard} (by {shard_by})')
+    # Files are split between shards by their path relative to the input they are found in (or by content, once read)
+    shard_by_path = shard is not None and shard_by == SHARD_BY_PATH
+
+    def shard_entries(entries, base_dir):
+        return in_shard(entries, shard, base_dir) if shard_by_path else entries
+    rest_client = dart_context.rest_client()
+    attempt_counter = AttemptCounter(url)
+    rest_client.add_listener(attempt_counter)
+
+    progress = None
+    if show_progress:
+        progress = UploadProgress()
+
+        def observe(attempt: RequestAttempt):
+            if attempt.url == url:
+                progress.observe(attempt)
+
+        rest_client.add_listener(observe)
+
+    concurrency_limit = None
+    worker_count = threads
+    if adaptive_threads:
+        concurrency_limit = adaptive_upload_limit(rest_client, url, threads, min_threads, max_threads,
+                                                  print if progress is None else progress.log)
+        worker_count = max_threads
+    rest_client.set_pool_size(worker_count)
+    shaper = None
+    if max_upload_mbps is not None:
+        # Megabits, as links are rated
+        shaper = BandwidthShaper(url, max_upload_mbps * 1_000_000 / 8)
+        print(f'Upload bandwidth: {max_upload_mbps} Mbps')
 
     # track time
     start_time = time()
+    existing_filter = None
+    producer = None
+    # Zip archives stay open until their members are uploaded
+    open_archives = ExitStack()
+    prep_executor = None
+    if progress is not None:
+        progress.start()
 
-    files_to_post_queue = generate_files_queue(files, input_dir, ignore_meta_files)
+    try:
+        queue_size = FILES_QUEUE_SIZE if len(archives) == 0 and len(retry_reports) == 0 else worker_count * PREPARED_FILES_PER_WORKER
+        if schedule == WALK:
+            files_to_post_queue = queue.Queue(maxsize=queue_size)
+        else:
+            files_to_post_queue = SizeScheduledQueue(maxsize=queue_size)
+            if small_file_workers is None:
+                small_file_workers = worker_count // 4 if worker_count > 1 else 0
+        for i in range(worker_count):
+            take_file = None
+            if schedule != WALK:
+                # The first workers are kept for the smallest files, so large files never hold up every worker
+                if i < small_file_workers:
+                    take_file = files_to_post_queue.get_smallest
+                elif schedule == MIXED:
+                    take_file = alternating(files_to_post_queue.get, files_to_post_queue.get_smallest)
+            worker = WorkerThread(files_to_post_queue, url, succeeded_dir, failed_dir, rest_client, concurrency_limit, journal, verbose, progress, take_file,
+                                  failure_report, attempt_counter, shaper)
+            worker.setDaemon(True)
+            worker.start()
+
+        # Files are discovered (and prepared) while the workers upload them
+        if watch:
+            # Runs until interrupted, uploading documents as they are written to input_dir
+            directory_watch = DirectoryWatch(input_dir, settle_seconds, poll=watch_poll is not None,
+                                             poll_seconds=DEFAULT_POLL_SECONDS if watch_poll is None else watch_poll,
+                                             exclude_dirs=(succeeded_dir, failed_dir), ignore_meta=ignore_meta_files,
+                                             report=print if progress is None else progress.log)
+            print(f'Watching {input_dir} for new documents (Ctrl-C to stop)')
+            discovered = shard_entries(watched_files(directory_watch, ignore_meta_files), input_dir)
+        else:
+            discovered = shard_entries(discover_files(files, input_dir, ignore_meta_files), input_dir)
+        if resume:
+            discovered = skip_uploaded(discovered, journal)
+        document_metadata = DocumentMetadata(metadata_obj)
+        # Documents listed in manifests come with their metadata, without a directory walk or .meta files
+        listed = itertools.chain.from_iterable(shard_entries(manifest_files(manifest, document_metadata), os.path.dirname(os.path.abspath(manifest)))
+                                               for manifest in manifests)
+        if resume:
+            listed = skip_uploaded(listed, journal)
+        # Document ids are only needed to look up existing documents and to shard by content: otherwise
+        # the upload is the only read of each file, and metadata merging is too cheap for processes
+        needs_document_id = skip_existing or (shard is not None and shard_by == SHARD_BY_CONTENT)
+        if prep_workers > 0 and not needs_document_id:
+            print('--prep-workers has no effect without --skip-existing or --shard-by content')
+        if prep_workers > 0 and needs_document_id:
+            # Hashing and metadata merging run in processes, so they scale with cores instead of the GIL.
+            # Processes are spawned rather than forked, since upload threads are already running.
+            prep_executor = ProcessPoolExecutor(prep_workers, mp_context=multiprocessing.get_context('spawn'))
+            max_preparing = prep_workers * PREPARING_PER_WORKER
+            prepared = itertools.chain(prepared_files(prep_executor, partial(prepare_file, document_metadata), discovered, max_preparing),
+                                       prepared_files(prep_executor, hash_file, listed, max_preparing))
+        else:
+            prepared = itertools.chain((resolve_metadata(document_metadata, entry) for entry in discovered), listed)
+
+        # Archive members are streamed from their archives, never extracted to disk
+        members = itertools.chain.from_iterable(shard_entries(archive_members(archive, document_metadata, ignore_meta_files, open_archives), os.path.dirname(os.path.abspath(archive)))
+                                                for archive in archives)
+        if resume:
+            members = skip_uploaded(members, journal)
+        prepared = itertools.chain(prepared, members)
+        # Files of failure reports are retried as they were uploaded
+        retried = itertools.chain.from_iterable(failed_files(records, document_metadata, open_archives) for records in retry_failures)
+        if resume:
+            retried = skip_uploaded(retried, journal)
+        prepared = itertools.chain(prepared, retried)
+
+        if shard is not None and shard_by == SHARD_BY_CONTENT:
+            prepared = in_content_shard(prepared, shard)
+        if skip_existing:
+            existing_filter = ExistingDocumentFilter(existing_ids_lookup(dart_context, metadata_obj.get('tenants', [])),
+                                                     prepared_document_id, journal)
+            prepared = existing_filter.new_files(prepared)
+        producer = ProducerThread(files_to_post_queue, prepared, journal, progress, failure_report)
+        producer.start()
+        producer.join()
+        files_to_post_queue.join()
+    except KeyboardInterrupt:
+        print('Interrupted: rerun with --resume to upload the remaining files')
+        raise
+    finally:
+        if prep_executor is not None:
+            prep_executor.shutdown(wait=False, cancel_futures=True)
+        if progress is not None:
+            progress.stop()
+        journal.close()
+        failure_report.close()
+        open_archives.close()
+        if shaper is not None:
+            shaper.close()
+
+    counts = journal.counts()
+    print(f"Files uploaded: {counts['done']} failed: {counts['failed']}")
+    if failure_report.count > 0:
+        print(f'Failure report: {failure_report_path} (retry with forklift retry-failed)')
+    if existing_filter is not None:
+        print(f"Files skipped: {existing_filter.existing_count} already in DART, {existing_filter.duplicate_count} duplicates")
+    total_time = (time() - start_time) / 60
+    print(f"Completed in {round(total_time, 2)} minutes")
+    if concurrency_limit is not None:
+        print(f"Final concurrent uploads: {concurrency_limit.limit()}")
+    if producer is not None and producer.error is not None:
+        raise click.ClickException(f'Stopped finding files to upload: {type(producer.error).__name__}: {producer.error}')
 
-    for i in range(threads):
-        worker = WorkerThread(files_to_post_queue, url, succeeded_dir, failed_dir, auth_headers, metadata_obj)
-        worker.setDaemon(True)
-        worker.start()
 
-    files_to_post_queue.join()
+def submission_metadata(dart_context: DartContext, metadata, metadata_file, label) -> dict:
+    """Metadata given to every document of a submission, from --metadata-file, --metadata, --label and --tenant"""
+    metadata_obj = {}
+    if metadata_file is not None:
+        with open(metadata_file) as metadata_file_ptr:
+            metadata_obj.update(json.loads(metadata_file_ptr.read()))
+    if metadata is not None:
+        metadata_obj.update(json.loads(metadata))
+    if label is not None:
+        labels_list = list(label)
+        metadata_obj['labels'] = labels_list
+    if len(dart_context.tenants()) != 0:
+        if 'tenants' in metadata_obj:
+            metadata_obj['tenants'] = metadata_obj['tenants'] + dart_context.tenants()
+        else:
+            metadata_obj['tenants'] = dart_context.tenants()
+    return metadata_obj
 
-    total_time = (time() - start_time) / 60
-    print(f"Completed in {round(total_time, 2)} minutes")
+
+def shard_option(ctx, param, value):
+    try:
+        return None if value is None else parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
 
 @click.command(name='submit')
@@ -184,8 +527,28 @@ def upload_raws(dart_context: DartContext, files, input_dir, failed_dir, succeed
 @click.option('--metadata', required=False, default=None)
 @click.option('--metadata-file', required=False, default=None)
 @click.option('--label', required=False, default=None, multiple=True, help='Values should be separated by semicolons')
-@click.option('--threads', required=False, default=6)
+@click.option('--threads', '--upload-workers', 'threads', required=False, default=6, help='Number of concurrent uploads (initial number with --adaptive-threads)')
+@click.option('--prep-workers', required=False, default=0, type=click.IntRange(min=0), help='Number of processes computing document ids (content MD5) ahead of uploads, for --skip-existing or --shard-by content; no effect otherwise (default 0: files are hashed as they are queued)')
+@click.option('--adaptive-threads', required=False, is_flag=True, default=False, help='Adjust the number of concurrent uploads to the throughput the service sustains, backing off on errors, 429s and rising latency per byte uploaded')
+@click.option('--min-threads', required=False, default=DEFAULT_MIN_CONCURRENCY, type=click.IntRange(min=1), help='Lower bound on concurrent uploads with --adaptive-threads')
+@click.option('--max-threads', required=False, default=DEFAULT_MAX_CONCURRENCY, type=click.IntRange(min=1), help='Upper bound on concurrent uploads with --adaptive-threads')
+@click.option('--schedule', required=False, default=WALK, type=click.Choice(SCHEDULES), help='Order of uploads: walk (as files are found), largest-first (largest queued file first) or mixed (alternately the largest and smallest queued file). Files are ordered among those discovered ahead of the uploads.')
+@click.option('--small-file-workers', required=False, default=None, type=click.IntRange(min=0), help='With --schedule largest-first or mixed, number of upload workers that always take the smallest queued file (default: a quarter of the workers)')
+@click.option('--shard', required=False, default=None, callback=shard_option, help='Only forklift one shard of the input, given as i/N (e.g. 3/8), so N hosts can each submit their share of the same input without coordinating')
+@click.option('--shard-by', required=False, default=SHARD_BY_PATH, type=click.Choice([SHARD_BY_PATH, SHARD_BY_CONTENT]), help='Split files between shards by their path relative to the input (default), or by their content so copies of a document go to the same shard (every host reads every file)')
+@click.option('--watch', required=False, is_flag=True, default=False, help='Keep running, uploading documents as they are written to --input-dir (existing documents are uploaded first); cannot be used with --skip-existing or --prep-workers')
+@click.option('--settle-seconds', required=False, default=DEFAULT_SETTLE_SECONDS, type=click.FloatRange(min=0), help='With --watch, time a document must go unchanged before it is uploaded, so files still being written are not')
+@click.option('--watch-poll', required=False, default=None, type=click.FloatRange(min=0, min_open=True), help='With --watch, list --input-dir every this many seconds instead of using inotify (for network filesystems, where inotify misses files written by other hosts)')
 @click.option('--input-dir', required=False, default=None, help='Forklift all documents in a directory recursively')
+@click.option('--manifest', 'manifests', required=False, multiple=True, type=click.Path(exists=True, dir_okay=False), help='Forklift the documents listed in a JSONL file, one {"path": ..., <metadata fields>} object per line (can be used multiple times)')
+@click.option('--archive', 'archives', required=False, multiple=True, type=click.Path(exists=True, dir_okay=False), help='Forklift all documents in a zip or tar (optionally compressed) archive without extracting it (can be used multiple times)')
+@click.option('--journal', 'journal_path', required=False, default=None, help='File recording the upload state of each file (default: under ~/.dart, named after the inputs and forklift url)')
+@click.option('--failure-report', 'failure_report_path', required=False, default=None, type=click.Path(dir_okay=False, writable=True), help='JSONL file recording why each failed file failed, to retry them with forklift retry-failed (default: next to the journal, ending in .failures.jsonl)')
+@click.option('--progress/--no-progress', 'show_progress', required=False, default=True, help='Show live throughput, latency and ETA (a status line on a terminal, otherwise a log line every 30s)')
+@click.option('--max-upload-mbps', required=False, default=None, type=click.FloatRange(min=0, min_open=True), help='Maximum upload bandwidth in megabits per second, shared by all upload workers and all dart processes on this host uploading to the same forklift. Uploads are paced as they are sent, so large files do not go out in bursts.')
+@click.option('-v', '--verbose', required=False, is_flag=True, default=False, help='Print every file as it is posted, with its metadata')
+@click.option('--skip-existing', required=False, is_flag=True, default=False, help='Hash files and only upload those whose content (and so document id) is not already in DART (in all tenants, with --tenant). Metadata of existing documents is not updated.')
+@click.option('--resume', required=False, is_flag=True, default=False, help='Continue from the journal of a previous run: skip uploaded files and retry failed and interrupted ones')
 @click.argument('files', required=False, nargs=-1)
 @global_options.pass_dart_context
 def submit_command(dart_context : DartContext,
@@ -197,26 +560,44 @@ def submit_command(dart_context : DartContext,
                    metadata,
                    metadata_file,
                    label,
-                   threads):
+                   threads,
+                   adaptive_threads,
+                   min_threads,
+                   max_threads,
+                   journal_path,
+                   resume,
+                   skip_existing,
+                   verbose,
+                   show_progress,
+                   prep_workers,
+                   archives,
+                   manifests,
+                   schedule,
+                   small_file_workers,
+                   shard,
+                   shard_by,
+                   watch,
+                   settle_seconds,
+                   watch_poll,
+                   failure_report_path,
+                   max_upload_mbps):
     """Upload raw documents for processing"""
 
-    if input_dir is None and len(files) == 0:
-        raise click.exceptions.BadArgumentUsage('you must provide either input directory or files for upload')
-
-    metadata_obj = {}
-    if metadata_file is not None:
-        with open(metadata_file) as metadata_file_ptr:
-            metadata_obj.update(json.loads(metadata_file_ptr.read()))
-    if metadata is not None:
-        metadata_obj.update(json.loads(metadata))
-    if label is not None:
-        labels_list = list(label)
-        metadata_obj['labels'] = labels_list
-    if len(dart_context.tenants()) != 0:
-        if 'tenants' in metadata_obj:
-            metadata_obj['tenants'] = metadata_obj['tenants'] + dart_context.tenants()
-        else:
-            metadata_obj['tenants'] = dart_context.tenants()
-
+    if input_dir is None and len(files) == 0 and len(archives) == 0 and len(manifests) == 0:
+        raise click.exceptions.BadArgumentUsage('you must provide an input directory, manifests, archives or files for upload')
+    if adaptive_threads and min_threads > max_threads:
+        raise click.exceptions.BadOptionUsage('min_threads', '--min-threads cannot be greater than --max-threads')
+    if watch and (input_dir is None or len(files) > 0 or len(archives) > 0 or len(manifests) > 0):
+        raise click.exceptions.BadOptionUsage('watch', '--watch requires --input-dir, and cannot be used with files, archives or manifests')
+    if watch and (skip_existing or prep_workers > 0):
+        # Both hold documents back until a batch of them is ready, which a watch may take hours to fill
+        raise click.exceptions.BadOptionUsage('watch', '--watch cannot be used with --skip-existing or --prep-workers')
+    if small_file_workers is not None and small_file_workers >= (max_threads if adaptive_threads else threads):
+        raise click.exceptions.BadOptionUsage('small_file_workers', '--small-file-workers must leave workers for large files')
+
+    metadata_obj = submission_metadata(dart_context, metadata, metadata_file, label)
     print(metadata_obj)
-    upload_raws(dart_context, files, input_dir, failed_dir, succeeded_dir, metadata_obj, threads, ignore_meta_files)
+    upload_raws(dart_context, files, input_dir, failed_dir, succeeded_dir, metadata_obj, threads, ignore_meta_files,
+                adaptive_threads, min_threads, max_threads, journal_path, resume, skip_existing, verbose, show_progress, prep_workers, archives, manifests,
+                schedule, small_file_workers, shard, shard_by, watch, settle_seconds, watch_poll, failure_report_path,
+                max_upload_mbps=max_upload_mbps)
@@ -0,0 +1,99 @@
+import io
+import json
+import tarfile
+import zipfile
+from contextlib import ExitStack
+
+import pytest
+
+from dart_cli.forklift import archives
+from dart_cli.forklift.archives import archive_members
+from dart_cli.forklift.metadata import DocumentMetadata
+
+MEMBERS = {
+    'docs/a.txt': b'first',
+    # After its document: tar archives are read for .meta members first
+    'docs/a.meta': b'{"labels": ["own"]}',
+    'docs/.hidden': b'hidden',
+    'docs/b.pdf': b'second',
+    'docs/c.txt': b'third',
+    'docs/c.meta': b'{"labels": ',
+}
+
+
+def members_by_name(archive_path, ignore_meta=False, open_archives=None):
+    members = {}
+    for member in archive_members(archive_path, DocumentMetadata({'genre': 'news'}), ignore_meta, open_archives):
+        content = member.content
+        if content is None and member.opener is not None:
+            with member.opener() as member_file:
+                content = member_file.read()
+        members[member.file_path.split('!', 1)[1]] = (member, content)
+    return members
+
+
+def check_members(archive_path):
+    members = members_by_name(archive_path)
+    # As in a directory, .meta members are uploaded too unless they are ignored
+    assert sorted(members) == ['docs/a.meta', 'docs/a.txt', 'docs/b.pdf', 'docs/c.meta', 'docs/c.txt']
+    a, a_content = members['docs/a.txt']
+    assert a.filename == 'docs/a.txt'
+    assert a_content == b'first'
+    assert json.loads(a.metadata) == {'labels': ['own'], 'genre': 'news'}
+    assert json.loads(members['docs/b.pdf'][0].metadata) == {'genre': 'news'}
+    assert members['docs/c.txt'][0].error.startswith('FAILED TO READ METADATA.')
+
+    ignored = members_by_name(archive_path, ignore_meta=True)
+    assert sorted(ignored) == ['docs/a.txt', 'docs/b.pdf', 'docs/c.txt']
+    assert ignored['docs/c.txt'][0].error is None
+
+
+def test_zip_members(tmp_path):
+    archive_path = str(tmp_path / 'docs.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        for name, content in MEMBERS.items():
+            archive.writestr(name, content)
+    check_members(archive_path)
+
+
+def test_tar_members(tmp_path):
+    archive_path = str(tmp_path / 'docs.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for name, content in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    check_members(archive_path)
+
+
+def test_zip_archive_stays_open_until_closed(tmp_path):
+    archive_path = str(tmp_path / 'docs.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr('docs/a.txt', b'first')
+    with ExitStack() as open_archives:
+        member = next(archive_members(archive_path, DocumentMetadata({}), True, open_archives))
+        with member.opener() as member_file:
+            assert member_file.read() == b'first'
+    with pytest.raises(ValueError):
+        member.opener()
+
+
+def test_large_tar_members_are_spooled(tmp_path, monkeypatch):
+    monkeypatch.setattr(archives, 'MEMBER_MEMORY_SIZE', 4)
+    archive_path = str(tmp_path / 'docs.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for name, content in [('small.txt', b'tiny'), ('large.txt', b'0123456789'), ('next.txt', b'more')]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+    members = list(archive_members(archive_path, DocumentMetadata({}), True))
+    assert [member.content for member in members] == [b'tiny', None, b'more']
+    large = members[1]
+    assert large.size == 10
+    # Readers of a spooled member are independent, so an upload can be retried after the member was hashed
+    with large.opener() as first, large.opener() as second:
+        assert first.read(4) == b'0123'
+        assert second.read() == b'0123456789'
+        first.seek(0)
+        assert first.read() == b'0123456789'
@@ -0,0 +1,39 @@
+import hashlib
+
+from dart_cli.forklift.existing import ExistingDocumentFilter, file_md5
+from dart_cli.forklift.journal import EXISTING, UploadJournal
+
+
+def write(path, content: bytes) -> str:
+    with open(path, 'wb') as file:
+        file.write(content)
+    return str(path)
+
+
+def test_file_md5_is_document_id(tmp_path):
+    assert file_md5(write(tmp_path / 'a.txt', b'content')) == hashlib.md5(b'content').hexdigest()
+
+
+def test_filter_leaves_out_existing_and_duplicate_files(tmp_path):
+    old = write(tmp_path / 'old.txt', b'old')
+    new = write(tmp_path / 'new.txt', b'new')
+    copy = write(tmp_path / 'copy.txt', b'new')
+    other = write(tmp_path / 'other.txt', b'other')
+    lookups = []
+
+    def existing_ids(doc_ids):
+        lookups.append(doc_ids)
+        return {file_md5(old)} & set(doc_ids)
+
+    journal = UploadJournal(str(tmp_path / 'journal.jsonl'))
+    existing_filter = ExistingDocumentFilter(existing_ids, lambda entry: file_md5(entry[0]), journal, batch_size=3)
+    new_files = list(existing_filter.new_files(iter([(old, None), (new, 'new.meta'), (copy, None), (other, None)])))
+    journal.close()
+
+    assert new_files == [(new, 'new.meta'), (other, None)]
+    assert [len(batch) for batch in lookups] == [2, 1]
+    assert existing_filter.existing_count == 1
+    assert existing_filter.duplicate_count == 1
+    resumed = UploadJournal(str(tmp_path / 'journal.jsonl'), resume=True)
+    assert resumed.previous_state(copy) == EXISTING
+    resumed.close()
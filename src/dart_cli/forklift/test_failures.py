@@ -0,0 +1,65 @@
+import io
+import json
+import tarfile
+import zipfile
+from contextlib import ExitStack
+
+from dart_cli.forklift.failures import FailureReport, failed_files, load_failures
+from dart_cli.forklift.metadata import DocumentMetadata
+
+
+def test_failure_report_round_trip(tmp_path):
+    moved_dir = tmp_path / 'failed'
+    moved_dir.mkdir()
+    (moved_dir / 'a.txt').write_bytes(b'first')
+    (tmp_path / 'b.txt').write_bytes(b'second')
+    (tmp_path / 'b.meta').write_text('{"labels": ["own"]}')
+    archive_path = str(tmp_path / 'docs.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr('docs/c.txt', b'third')
+
+    report_path = str(tmp_path / 'submit.failures.jsonl')
+    report = FailureReport(report_path)
+    report.failed(str(tmp_path / 'a.txt'), 'FAILED TO POST. Exception: timed out', '{"genre": "news"}', attempts=3, elapsed=1.5)
+    report.failed(str(tmp_path / 'a.txt'), 'FAILED TO POST. Response status-code: 503', '{"genre": "news"}', 503,
+                  'unavailable', 4, 2.0, str(moved_dir / 'a.txt'))
+    report.failed(str(tmp_path / 'b.txt'), 'FAILED TO READ METADATA. bad json')
+    report.failed(f'{archive_path}!docs/c.txt', 'FAILED TO POST. Response status-code: 500', '{}', 500)
+    report.close()
+    assert report.count == 4
+
+    records = load_failures(report_path)
+    assert len(records) == 3
+    a = records[str(tmp_path / 'a.txt')]
+    assert a['status_code'] == 503 and a['response_excerpt'] == 'unavailable' and a['attempts'] == 4
+    assert 'status_code' not in records[str(tmp_path / 'b.txt')]
+
+    open_archives = ExitStack()
+    retried = {prepared_file.file_path: prepared_file for prepared_file in failed_files(records, DocumentMetadata({'genre': 'blog'}), open_archives)}
+    assert sorted(retried) == sorted([str(moved_dir / 'a.txt'), str(tmp_path / 'b.txt'), f'{archive_path}!docs/c.txt'])
+    assert retried[str(moved_dir / 'a.txt')].metadata == '{"genre": "news"}'
+    assert json.loads(retried[str(tmp_path / 'b.txt')].metadata) == {'labels': ['own'], 'genre': 'blog'}
+    member = retried[f'{archive_path}!docs/c.txt']
+    assert member.filename == 'docs/c.txt' and member.metadata == '{}'
+    with member.opener() as member_file:
+        assert member_file.read() == b'third'
+    open_archives.close()
+
+
+def test_failed_members_of_an_archive_are_read_in_one_pass(tmp_path, monkeypatch):
+    archive_path = str(tmp_path / 'docs.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for name, content in [('a.txt', b'first'), ('b.txt', b'second'), ('c.txt', b'third')]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    records = {f'{archive_path}!{name}': {'path': f'{archive_path}!{name}', 'metadata': '{}'} for name in ['c.txt', 'a.txt', 'missing.txt']}
+    opened = []
+    tar_open = tarfile.open
+    monkeypatch.setattr(tarfile, 'open', lambda *args, **kwargs: opened.append(args) or tar_open(*args, **kwargs))
+
+    retried = {prepared_file.file_path: prepared_file for prepared_file in failed_files(records, DocumentMetadata({}))}
+    assert len(opened) == 1
+    assert retried[f'{archive_path}!a.txt'].content == b'first'
+    assert retried[f'{archive_path}!c.txt'].content == b'third' and retried[f'{archive_path}!c.txt'].metadata == '{}'
+    assert retried[f'{archive_path}!missing.txt'].error.startswith('FAILED TO READ FILE')
@@ -0,0 +1,67 @@
+import json
+
+from dart_cli.forklift.journal import DONE, FAILED, IN_FLIGHT, UploadJournal, default_journal_path, uploaded_document_id
+
+
+def test_resume_keeps_last_state_of_each_file(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    journal = UploadJournal(journal_path)
+    for name in ['a', 'b', 'c']:
+        journal.queued(str(tmp_path / name))
+        journal.in_flight(str(tmp_path / name))
+    journal.done(str(tmp_path / 'a'), 'doc-a')
+    journal.failed(str(tmp_path / 'b'), 'FAILED TO POST. Response status-code: 503')
+    journal.close()
+
+    resumed = UploadJournal(journal_path, resume=True)
+    assert resumed.was_done(str(tmp_path / 'a'))
+    assert resumed.previous_state(str(tmp_path / 'b')) == FAILED
+    assert resumed.previous_state(str(tmp_path / 'c')) == IN_FLIGHT
+    assert resumed.previous_state(str(tmp_path / 'd')) is None
+    resumed.close()
+
+    # Resuming compacts the journal to one record per file
+    with open(journal_path) as journal_file:
+        records = [json.loads(line) for line in journal_file]
+    assert len(records) == 3
+    assert {'path': str(tmp_path / 'a'), 'state': DONE, 'document_id': 'doc-a'}.items() <= records[0].items()
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    journal = UploadJournal(journal_path)
+    journal.done(str(tmp_path / 'a'), None)
+    journal.close()
+    with open(journal_path, 'at') as journal_file:
+        journal_file.write('{"path": "/b", "sta')
+
+    resumed = UploadJournal(journal_path, resume=True)
+    assert resumed.was_done(str(tmp_path / 'a'))
+    assert resumed.previous_state('/b') is None
+    resumed.close()
+
+
+def test_journal_without_resume_starts_over(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    journal = UploadJournal(journal_path)
+    journal.done(str(tmp_path / 'a'), None)
+    journal.close()
+
+    fresh = UploadJournal(journal_path)
+    assert not fresh.was_done(str(tmp_path / 'a'))
+    fresh.failed(str(tmp_path / 'a'), 'FAILED TO POST')
+    assert fresh.counts() == {'queued': 0, 'in-flight': 0, 'done': 0, 'failed': 1, 'existing': 0}
+    fresh.close()
+
+
+def test_default_journal_path_depends_on_inputs(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    url = 'http://localhost/dart/api/v1/forklift/upload'
+    assert default_journal_path(url, [], 'docs') == default_journal_path(url, (), 'docs')
+    assert default_journal_path(url, [], 'docs') != default_journal_path(url, [], 'other')
+    assert default_journal_path(url, [], 'docs').startswith(str(tmp_path / '.dart'))
+
+
+def test_uploaded_document_id():
+    assert uploaded_document_id('{"document_id": "abc", "filename": "a.txt"}') == 'abc'
+    assert uploaded_document_id('created') is None
@@ -0,0 +1,27 @@
+import json
+
+from dart_cli.forklift.manifest import manifest_files
+from dart_cli.forklift.metadata import DocumentMetadata
+
+
+def test_manifest_lines_become_documents_with_metadata(tmp_path):
+    manifest_path = tmp_path / 'batch' / 'manifest.jsonl'
+    manifest_path.parent.mkdir()
+    manifest_path.write_text('\n'.join([
+        json.dumps({'path': 'reports/2021-03.v2.pdf', 'labels': ['quarterly'], 'source': 'archive'}),
+        '',
+        json.dumps({'path': '/data/other.txt'}),
+        '{"path": ',
+        json.dumps({'labels': ['no path']}),
+    ]))
+
+    documents = list(manifest_files(str(manifest_path), DocumentMetadata({'labels': ['batch'], 'genre': 'news'})))
+
+    assert documents[0].file_path == str(tmp_path / 'batch' / 'reports' / '2021-03.v2.pdf')
+    metadata = json.loads(documents[0].metadata)
+    assert sorted(metadata.pop('labels')) == ['batch', 'quarterly']
+    assert metadata == {'source': 'archive', 'genre': 'news'}
+    assert documents[1].file_path == '/data/other.txt'
+    assert json.loads(documents[1].metadata) == {'genre': 'news', 'labels': ['batch']}
+    assert [document.file_path for document in documents[2:]] == [f'{manifest_path}:4', f'{manifest_path}:5']
+    assert all(document.error.startswith('FAILED TO READ MANIFEST.') for document in documents[2:])
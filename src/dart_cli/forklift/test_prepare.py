@@ -0,0 +1,46 @@
+import hashlib
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from dart_cli.forklift.metadata import DocumentMetadata
+from dart_cli.forklift.prepare import prepare_file, prepared_files
+
+
+def test_prepare_file_hashes_and_merges_metadata(tmp_path):
+    (tmp_path / 'doc.txt').write_bytes(b'content')
+    (tmp_path / 'doc.meta').write_text('{"labels": ["own"]}')
+    document_metadata = DocumentMetadata({'genre': 'news'})
+
+    prepared = prepare_file(document_metadata, (str(tmp_path / 'doc.txt'), str(tmp_path / 'doc.meta')))
+    # The upload streams the file from disk: only its id comes back from the prep process
+    assert prepared.content is None
+    assert prepared.document_id == hashlib.md5(b'content').hexdigest()
+    assert prepared.metadata == '{"labels": ["own"], "genre": "news"}'
+    assert prepared.error is None
+
+    missing = prepare_file(document_metadata, (str(tmp_path / 'missing.txt'), None))
+    assert missing.content is None
+    assert missing.error.startswith('FAILED TO READ FILE.')
+
+
+def test_prepared_files_keeps_order_and_bounds_submissions(tmp_path):
+    paths = []
+    for i in range(20):
+        (tmp_path / f'{i}.txt').write_bytes(str(i).encode('utf-8'))
+        paths.append(str(tmp_path / f'{i}.txt'))
+    discovered_count = 0
+    lock = threading.Lock()
+
+    def discovered():
+        nonlocal discovered_count
+        for path in paths:
+            with lock:
+                discovered_count += 1
+            yield path, None
+
+    with ThreadPoolExecutor(4) as executor:
+        prepared = prepared_files(executor, partial(prepare_file, DocumentMetadata({})), discovered(), 3)
+        first = next(prepared)
+        assert discovered_count == 3
+        assert [first.file_path] + [prepared_file.file_path for prepared_file in prepared] == paths
@@ -0,0 +1,37 @@
+import threading
+
+from dart_cli.forklift.prepare import PreparedFile
+from dart_cli.forklift.schedule import SizeScheduledQueue, alternating, prepared_file_size
+
+
+def test_prepared_file_size(tmp_path):
+    (tmp_path / 'doc.txt').write_bytes(b'12345')
+    assert prepared_file_size(PreparedFile(str(tmp_path / 'doc.txt'), None, None, '{}')) == 5
+    assert prepared_file_size(PreparedFile('a.zip!doc.txt', None, None, '{}', size=7)) == 7
+    assert prepared_file_size(PreparedFile('a.tar!doc.txt', b'123', None, '{}')) == 3
+    assert prepared_file_size(PreparedFile(str(tmp_path / 'missing.txt'), None, None, '{}')) == 0
+
+
+def test_queue_hands_out_largest_and_smallest_files():
+    files_queue = SizeScheduledQueue()
+    for index, size in enumerate([10, 300, 20, 300, 5]):
+        files_queue.put((index, PreparedFile(f'{index}.txt', None, None, '{}', size=size)))
+
+    take = alternating(files_queue.get, files_queue.get_smallest)
+    # Files of the same size keep their queue order
+    assert [take()[0] for _ in range(5)] == [1, 4, 3, 0, 2]
+    assert files_queue.empty()
+
+
+def test_get_smallest_waits_for_a_file_and_frees_space():
+    files_queue = SizeScheduledQueue(maxsize=1)
+    taken = []
+    taker = threading.Thread(target=lambda: taken.append(files_queue.get_smallest()))
+    taker.start()
+    files_queue.put((0, PreparedFile('0.txt', None, None, '{}', size=1)))
+    taker.join(timeout=5)
+    assert taken[0][0] == 0
+
+    files_queue.put((1, PreparedFile('1.txt', None, None, '{}', size=1)), timeout=5)
+    files_queue.task_done()
+    assert files_queue.get_smallest()[0] == 1
@@ -0,0 +1,49 @@
+import hashlib
+
+import pytest
+
+from dart_cli.forklift.journal import merge_records
+from dart_cli.forklift.prepare import PreparedFile
+from dart_cli.forklift.shard import Shard, in_content_shard, in_shard, parse_shard
+
+
+def test_parse_shard():
+    assert parse_shard('3/8') == Shard(3, 8)
+    for text in ['0/8', '9/8', '3', 'a/b', '1/0']:
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_shards_partition_files_by_relative_path():
+    paths = [f'/mnt/host-a/corpus/dir{i % 7}/doc{i}.pdf' for i in range(200)]
+    shards = [set(entry[0] for entry in in_shard(((path, None) for path in paths), Shard(i, 4), '/mnt/host-a/corpus'))
+              for i in range(1, 5)]
+    assert sum(len(shard) for shard in shards) == len(paths)
+    assert set().union(*shards) == set(paths)
+    assert all(len(shard) > 0 for shard in shards)
+
+    # Another host mounting the input elsewhere picks the same files
+    moved = [path.replace('/mnt/host-a', '/data') for path in paths]
+    shard_on_other_host = {entry[0] for entry in in_shard(((path, None) for path in moved), Shard(2, 4), '/data/corpus')}
+    assert shard_on_other_host == {path.replace('/mnt/host-a', '/data') for path in shards[1]}
+
+
+def test_content_shard_keeps_copies_together():
+    files = [PreparedFile(f'/in/{i}.txt', f'content {i % 10}'.encode('utf-8'), None, '{}') for i in range(100)]
+    shards = [list(in_content_shard(iter(files), Shard(i, 3))) for i in range(1, 4)]
+    assert sum(len(shard) for shard in shards) == len(files)
+    for shard in shards:
+        for prepared_file in shard:
+            assert prepared_file.document_id == hashlib.md5(prepared_file.content).hexdigest()
+    doc_ids = [{prepared_file.document_id for prepared_file in shard} for shard in shards]
+    assert len(doc_ids[0] & doc_ids[1]) == 0 and len(doc_ids[1] & doc_ids[2]) == 0
+
+
+def test_merge_records_keeps_most_recent_record():
+    merged = {}
+    merge_records(merged, {'a': {'path': 'a', 'state': 'failed', 'time': 2.0},
+                           'b': {'path': 'b', 'state': 'done', 'time': 1.0}})
+    merge_records(merged, {'a': {'path': 'a', 'state': 'done', 'time': 3.0},
+                           'b': {'path': 'b', 'state': 'queued', 'time': 0.5}})
+    assert merged['a']['state'] == 'done'
+    assert merged['b']['state'] == 'done'
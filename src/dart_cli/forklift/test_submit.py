@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from dart_cli.cli.dart import cli
+from dart_cli.dart_context.dart_context import DartContext
+from dart_cli.dev.fake_server import FakeDartServer, FakeServiceProfile, configure_fake_environment
+from dart_cli.forklift.failures import load_failures
+from dart_cli.forklift.metadata import DocumentMetadata
+from dart_cli.forklift.prepare import PreparedFile, resolve_metadata
+from dart_cli.forklift.submit import discover_files, queue_files, scan_directory
+
+
+def write(path, content='x'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wt') as file:
+        file.write(content)
+
+
+def test_scan_directory_skips_hidden_files_and_directory_links(tmp_path):
+    write(str(tmp_path / 'a.txt'))
+    write(str(tmp_path / '.hidden'))
+    write(str(tmp_path / 'sub' / 'b.txt'))
+    write(str(tmp_path / 'sub' / 'deeper' / 'c.txt'))
+    os.symlink(str(tmp_path / 'sub'), str(tmp_path / 'link'))
+
+    found = sorted(os.path.relpath(path, str(tmp_path)) for path, _ in scan_directory(str(tmp_path)))
+    assert found == ['a.txt', os.path.join('sub', 'b.txt'), os.path.join('sub', 'deeper', 'c.txt')]
+
+
+def test_discover_files_pairs_files_with_meta_paths(tmp_path):
+    write(str(tmp_path / 'doc.pdf'))
+    write(str(tmp_path / 'doc.meta'), '{}')
+
+    assert list(discover_files([str(tmp_path / 'doc.pdf'), str(tmp_path / 'doc.meta')], None, False)) == \
+        [(str(tmp_path / 'doc.pdf'), str(tmp_path / 'doc.meta'))]
+    # In a directory, .meta files are uploaded too unless they are ignored
+    assert sorted(discover_files(None, str(tmp_path), False)) == [(str(tmp_path / 'doc.meta'), str(tmp_path / 'doc.meta')),
+                                                                  (str(tmp_path / 'doc.pdf'), str(tmp_path / 'doc.meta'))]
+    assert list(discover_files(None, str(tmp_path), True)) == [(str(tmp_path / 'doc.pdf'), None)]
+
+    write(str(tmp_path / 'other.pdf'))
+    assert (str(tmp_path / 'other.pdf'), None) in list(discover_files(None, str(tmp_path), False))
+
+
+def test_queue_files_resolves_metadata(tmp_path):
+    write(str(tmp_path / 'b.meta'), '{"labels": ["own"], "genre": "news"}')
+    write(str(tmp_path / 'c.meta'), '{"labels": ')
+    document_metadata = DocumentMetadata({'labels': ['batch'], 'genre': 'report', 'source': 'ignored'})
+    files_queue = queue.Queue(maxsize=10)
+
+    discovered = [('a', None), ('b', str(tmp_path / 'b.meta')), ('c', str(tmp_path / 'c.meta'))]
+    assert queue_files(files_queue, (resolve_metadata(document_metadata, entry) for entry in discovered)) == 2
+    assert files_queue.get() == (0, PreparedFile('a', None, None, '{"genre": "report", "labels": ["batch"]}'))
+    index, prepared_file = files_queue.get()
+    assert (index, prepared_file.file_path) == (1, 'b')
+    assert json.loads(prepared_file.metadata)['genre'] == 'report'
+    assert sorted(json.loads(prepared_file.metadata)['labels']) == ['batch', 'own']
+    assert files_queue.empty()
+
+
+def test_meta_files_pair_by_last_extension(tmp_path):
+    write(str(tmp_path / 'report.pdf'))
+    write(str(tmp_path / 'report.meta'), '{}')
+    write(str(tmp_path / 'report.v2.pdf'))
+    write(str(tmp_path / 'report.v2.meta'), '{}')
+
+    assert sorted(discover_files(None, str(tmp_path), True)) == [(str(tmp_path / 'report.pdf'), None), (str(tmp_path / 'report.v2.pdf'), None)]
+    found = dict(discover_files(None, str(tmp_path), False))
+    assert found[str(tmp_path / 'report.pdf')] == str(tmp_path / 'report.meta')
+    assert found[str(tmp_path / 'report.v2.pdf')] == str(tmp_path / 'report.v2.meta')
+    assert list(discover_files([str(tmp_path / 'report.v2.pdf')], None, False)) == [(str(tmp_path / 'report.v2.pdf'), str(tmp_path / 'report.v2.meta'))]
+
+
+@pytest.fixture
+def fake_dart(tmp_path, monkeypatch):
+    """A fake DART service, with a profile "fake" pointing at it saved under a temporary home"""
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    os.makedirs(str(tmp_path / 'home'))
+    server = FakeDartServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    dart_context = DartContext()
+    configure_fake_environment(dart_context, '127.0.0.1', server.server_address[1], False)
+    dart_context.save_profile('fake')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def dart(*args):
+    result = CliRunner().invoke(cli, ['--profile', 'fake', *args])
+    assert result.exception is None or isinstance(result.exception, SystemExit), result.output
+    return result
+
+
+def test_submit_uploads_directory_to_fake_server(tmp_path, fake_dart):
+    write(str(tmp_path / 'in' / 'a.txt'), 'first')
+    write(str(tmp_path / 'in' / 'sub' / 'b.txt'), 'second')
+    write(str(tmp_path / 'in' / 'sub' / 'b.meta'), '{"labels": ["own"]}')
+
+    result = dart('forklift', 'submit', '--input-dir', str(tmp_path / 'in'), '--label', 'batch', '--no-progress',
+                  '--succeeded-dir', str(tmp_path / 'done'))
+    assert result.exit_code == 0, result.output
+    assert 'Files uploaded: 3 failed: 0' in result.output
+    a_id = hashlib.md5(b'first').hexdigest()
+    b_id = hashlib.md5(b'second').hexdigest()
+    assert a_id in fake_dart.documents and b_id in fake_dart.documents
+    assert fake_dart.documents[a_id].metadata['labels'] == ['batch']
+    assert sorted(fake_dart.documents[b_id].metadata['labels']) == ['batch', 'own']
+    assert os.path.isfile(str(tmp_path / 'done' / 'b.txt'))
+
+
+def test_submit_resume_skips_uploaded_files(tmp_path, fake_dart):
+    write(str(tmp_path / 'in' / 'a.txt'), 'first')
+    write(str(tmp_path / 'in' / 'b.txt'), 'second')
+    journal_path = str(tmp_path / 'journal.jsonl')
+    submit = ['forklift', 'submit', '--input-dir', str(tmp_path / 'in'), '--journal', journal_path, '--no-progress']
+    assert 'Files uploaded: 2 failed: 0' in dart(*submit).output
+
+    write(str(tmp_path / 'in' / 'c.txt'), 'third')
+    result = dart(*submit, '--resume')
+    assert result.exit_code == 0, result.output
+    assert 'Skipped 2 files already uploaded' in result.output
+    assert 'Files uploaded: 1 failed: 0' in result.output
+    assert len(fake_dart.documents) == 3
+
+
+def test_failed_uploads_are_reported_and_retried(tmp_path, fake_dart):
+    write(str(tmp_path / 'in' / 'a.txt'), 'first')
+    write(str(tmp_path / 'in' / 'b.txt'), 'second')
+    journal_path = str(tmp_path / 'journal.jsonl')
+    fake_dart.profiles['forklift'] = FakeServiceProfile(error_rate=1.0, error_statuses=[500])
+
+    result = dart('forklift', 'submit', '--input-dir', str(tmp_path / 'in'), '--journal', journal_path,
+                  '--failed-dir', str(tmp_path / 'failed'), '--no-progress')
+    assert 'Files uploaded: 0 failed: 2' in result.output
+    report_path = str(tmp_path / 'journal.failures.jsonl')
+    failures = load_failures(report_path)
+    assert sorted(failures) == [str(tmp_path / 'in' / 'a.txt'), str(tmp_path / 'in' / 'b.txt')]
+    assert all(record['status_code'] == 500 for record in failures.values())
+    assert os.path.isfile(str(tmp_path / 'failed' / 'a.txt'))
+    assert len(fake_dart.documents) == 0
+
+    del fake_dart.profiles['forklift']
+    result = dart('forklift', 'retry-failed', report_path, '--journal', str(tmp_path / 'retry.jsonl'), '--no-progress')
+    assert result.exit_code == 0, result.output
+    assert 'Files uploaded: 2 failed: 0' in result.output
+    assert sorted(fake_dart.documents) == sorted(hashlib.md5(content).hexdigest() for content in [b'first', b'second'])
+
+
+def test_watch_rejects_batching_options(tmp_path, fake_dart):
+    os.makedirs(str(tmp_path / 'in'))
+    for option in [['--skip-existing'], ['--prep-workers', '2']]:
+        result = CliRunner().invoke(cli, ['--profile', 'fake', 'forklift', 'submit', '--input-dir', str(tmp_path / 'in'), '--watch', *option])
+        assert result.exit_code == 2
+        assert '--watch cannot be used with --skip-existing or --prep-workers' in result.output
+
+
+def test_prep_workers_only_hash_when_document_ids_are_needed(tmp_path, fake_dart):
+    write(str(tmp_path / 'in' / 'a.txt'), 'first')
+
+    result = dart('forklift', 'submit', '--input-dir', str(tmp_path / 'in'), '--prep-workers', '2', '--no-progress')
+    assert result.exit_code == 0, result.output
+    assert '--prep-workers has no effect without --skip-existing or --shard-by content' in result.output
+    assert 'Files uploaded: 1 failed: 0' in result.output
+
+
+def test_meta_files_named_before_the_first_dot_are_still_used(tmp_path):
+    write(str(tmp_path / 'report.v2.pdf'))
+    write(str(tmp_path / 'report.meta'), '{}')
+
+    assert dict(discover_files(None, str(tmp_path), False))[str(tmp_path / 'report.v2.pdf')] == str(tmp_path / 'report.meta')
+    assert list(discover_files([str(tmp_path / 'report.v2.pdf')], None, False)) == [(str(tmp_path / 'report.v2.pdf'), str(tmp_path / 'report.meta'))]
@@ -0,0 +1,92 @@
+import json
+
+from dart_cli.forklift.trace import IngestTrace, JournalTail, trace_ingest
+
+
+def journal_line(path: str, state: str, time: float, document_id: str = None) -> str:
+    record = {'path': path, 'state': state, 'time': time}
+    if document_id is not None:
+        record['document_id'] = document_id
+    return json.dumps(record) + '\n'
+
+
+def test_journal_tail_reads_uploads_as_they_are_appended(tmp_path):
+    journal_path = tmp_path / 'journal.jsonl'
+    journal_path.write_text(journal_line('/in/a', 'queued', 1.0) + journal_line('/in/a', 'done', 2.0, 'doc-a')
+                            + journal_line('/in/b', 'failed', 2.5))
+    tail = JournalTail(str(journal_path))
+    assert tail.new_uploads() == [('doc-a', 2.0)]
+
+    with open(journal_path, 'a') as journal_file:
+        journal_file.write(journal_line('/in/c', 'done', 3.0, 'doc-c'))
+        journal_file.write(journal_line('/in/d', 'done', 4.0, 'doc-d')[:20])
+    assert tail.new_uploads() == [('doc-c', 3.0)]
+    assert tail.new_uploads() == []
+
+
+def test_trace_reports_stage_latencies(tmp_path):
+    journal_path = tmp_path / 'journal.jsonl'
+    journal_path.write_text(journal_line('/in/a', 'done', 100.0, 'doc-a') + journal_line('/in/b', 'done', 100.0, 'doc-b'))
+    now = [100.0]
+    # doc-a has a CDR after 10s and is searchable after 20s; doc-b never is
+    available_after = {'cdr': {'doc-a': 110.0}, 'search': {'doc-a': 120.0}}
+
+    def lookup(stage):
+        return lambda doc_ids: {doc_id for doc_id in doc_ids if available_after[stage].get(doc_id, float('inf')) <= now[0]}
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    trace = IngestTrace(['cdr', 'search'])
+    trace_ingest([JournalTail(str(journal_path))], trace, {'cdr': lookup('cdr'), 'search': lookup('search')},
+                 poll_seconds=5, timeout_seconds=60, report=lambda message: None, clock=lambda: now[0], sleep=sleep)
+
+    report = trace.report()
+    assert now[0] == 160.0
+    assert report['documents'] == 2
+    assert report['available'] == 1
+    assert report['stages']['cdr']['seconds']['max'] == 10.0
+    assert report['stages']['search']['available'] == 1
+    assert report['time_to_availability_seconds']['p50'] == 20.0
+
+
+def test_trace_backs_off_from_documents_pending_for_long(tmp_path):
+    journal_path = tmp_path / 'journal.jsonl'
+    journal_path.write_text(journal_line('/in/a', 'done', 0.0, 'doc-a'))
+    now = [0.0]
+    looked_up = []
+
+    def lookup(doc_ids):
+        looked_up.extend(doc_ids)
+        return set()
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    trace_ingest([JournalTail(str(journal_path))], IngestTrace(['cdr']), {'cdr': lookup}, poll_seconds=1,
+                 timeout_seconds=1000, report=lambda message: None, clock=lambda: now[0], sleep=sleep)
+    # At every poll for the first 10s, then once the time since the upload has grown by a tenth: not 1000 times
+    assert 50 <= len(looked_up) <= 60
+
+
+def test_trace_waits_for_a_submission_to_finish(tmp_path):
+    journal_path = tmp_path / 'journal.jsonl'
+    journal_path.write_text('')
+    now = [100.0]
+    # The submission queues two files at 110s, uploads one at 120s and the other at 150s, long after the poll interval
+    appended = {110.0: journal_line('/in/a', 'queued', 110.0) + journal_line('/in/b', 'queued', 110.0),
+                120.0: journal_line('/in/a', 'done', 120.0, 'doc-a'),
+                150.0: journal_line('/in/b', 'done', 150.0, 'doc-b')}
+
+    def sleep(seconds):
+        now[0] += seconds
+        if now[0] in appended:
+            with open(journal_path, 'a') as journal_file:
+                journal_file.write(appended[now[0]])
+
+    trace = IngestTrace(['cdr'])
+    trace_ingest([JournalTail(str(journal_path))], trace, {'cdr': lambda doc_ids: set(doc_ids)},
+                 poll_seconds=5, timeout_seconds=600, report=lambda message: None, clock=lambda: now[0], sleep=sleep)
+
+    assert now[0] == 150.0
+    assert trace.report()['available'] == 2
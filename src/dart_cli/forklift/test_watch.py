@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+from dart_cli.forklift.watch import DirectoryWatch, Inotify
+
+
+def write_settled(path, content: str):
+    path.write_text(content)
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+@pytest.mark.parametrize('poll', [True, False])
+def test_watch_yields_existing_and_new_documents_once_settled(tmp_path, poll):
+    if not poll:
+        try:
+            Inotify().close()
+        except OSError:
+            pytest.skip('inotify is not available')
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'done').mkdir()
+    write_settled(tmp_path / 'in' / 'old.txt', 'old')
+    write_settled(tmp_path / 'in' / '.partial', 'hidden')
+    write_settled(tmp_path / 'in' / 'old.meta', '{}')
+    write_settled(tmp_path / 'done' / 'moved.txt', 'moved')
+
+    watch = DirectoryWatch(str(tmp_path), settle_seconds=0.2, poll=poll, poll_seconds=0.1, exclude_dirs=(str(tmp_path / 'done'),), ignore_meta=True)
+    documents = watch.documents()
+    assert next(documents) == str(tmp_path / 'in' / 'old.txt')
+
+    (tmp_path / 'in' / 'sub').mkdir()
+    write_settled(tmp_path / 'in' / 'sub' / 'new.txt', 'new')
+    assert next(documents) == str(tmp_path / 'in' / 'sub' / 'new.txt')
+
+    # A document is yielded again once it changes, and only after it has gone unchanged for the settle time
+    (tmp_path / 'in' / 'old.txt').write_text('old, changed')
+    started = time.time()
+    assert next(documents) == str(tmp_path / 'in' / 'old.txt')
+    assert time.time() - started >= 0.2
+    documents.close()
+
+
+def test_watch_yields_meta_files_unless_ignored(tmp_path):
+    write_settled(tmp_path / 'doc.txt', 'doc')
+    write_settled(tmp_path / 'doc.meta', '{}')
+
+    documents = DirectoryWatch(str(tmp_path), settle_seconds=0.1, poll=True, poll_seconds=0.1).documents()
+    assert sorted([next(documents), next(documents)]) == [str(tmp_path / 'doc.meta'), str(tmp_path / 'doc.txt')]
+    # Later listings do not yield unchanged documents again
+    write_settled(tmp_path / 'new.txt', 'new')
+    assert next(documents) == str(tmp_path / 'new.txt')
+    documents.close()
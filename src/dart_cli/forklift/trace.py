@@ -0,0 +1,214 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import click
+
+from dart_cli.cli import global_options
+from dart_cli.corpex.corpex_utilties import existing_document_ids
+from dart_cli.dart_context.dart_context import DartContext
+from dart_cli.dart_rest.metrics import latency_summary, write_atomically
+from dart_cli.forklift.journal import DONE, EXISTING, FAILED
+from dart_cli.utilities.url import get_base_url
+
+CDR_STAGE = 'cdr'
+SEARCH_STAGE = 'search'
+STAGES = [CDR_STAGE, SEARCH_STAGE]
+FINAL_STATES = {DONE, FAILED, EXISTING}
+
+DEFAULT_POLL_SECONDS = 10.0
+DEFAULT_TIMEOUT_SECONDS = 3600.0
+SEARCH_BATCH_SIZE = 500
+# A document not available at a stage yet is looked up again once this fraction of the time since its upload has
+# passed (or at the next poll, if later), so each document is looked up O(log(latency)) times rather than at every
+# poll, and latencies are still measured to within this fraction
+BACKOFF_FRACTION = 0.1
+
+
+class JournalTail:
+    """
+    Reads the uploads recorded in a forklift journal as they are appended (e.g. by a running
+    submission), keeping track of the files that are queued or being uploaded
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self.unfinished: set[str] = set()
+        self.__offset = 0
+
+    def new_uploads(self) -> list[tuple[str, float]]:
+        """:return: (document id, upload time) of uploads recorded since the last call"""
+        uploads = []
+        with open(self.path, 'rb') as journal_file:
+            journal_file.seek(self.__offset)
+            for line in journal_file:
+                if not line.endswith(b'\n'):
+                    # A record still being written: read it next time
+                    break
+                self.__offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.records += 1
+                if record.get('state') in FINAL_STATES:
+                    self.unfinished.discard(record.get('path'))
+                else:
+                    self.unfinished.add(record.get('path'))
+                if record.get('state') == DONE and record.get('document_id') is not None:
+                    uploads.append((record['document_id'], record['time']))
+        return uploads
+
+    def finished(self) -> bool:
+        """Whether the journal has records, and every file in it was uploaded, failed or found existing"""
+        return self.records > 0 and len(self.unfinished) == 0
+
+
+class IngestTrace:
+    """When each uploaded document was first seen available at each stage of the pipeline"""
+
+    def __init__(self, stages: list[str]):
+        self.stages = stages
+        self.uploaded: dict[str, float] = {}
+        self.available: dict[str, dict[str, float]] = {stage: {} for stage in stages}
+        self.next_lookup: dict[str, dict[str, float]] = {stage: {} for stage in stages}
+
+    def upload(self, doc_id: str, upload_time: float) -> None:
+        # Uploading the same content again does not make it available again
+        if doc_id not in self.uploaded:
+            self.uploaded[doc_id] = upload_time
+
+    def pending(self, stage: str) -> list[str]:
+        return [doc_id for doc_id in self.uploaded if doc_id not in self.available[stage]]
+
+    def due(self, stage: str, now: float) -> list[str]:
+        """Pending documents to look up at this poll"""
+        next_lookup = self.next_lookup[stage]
+        return [doc_id for doc_id in self.pending(stage) if next_lookup.get(doc_id, now) <= now]
+
+    def found(self, stage: str, doc_ids, found_time: float) -> None:
+        for doc_id in doc_ids:
+            self.available[stage].setdefault(doc_id, found_time)
+            self.next_lookup[stage].pop(doc_id, None)
+
+    def not_found(self, stage: str, doc_ids, lookup_time: float) -> None:
+        for doc_id in doc_ids:
+            self.next_lookup[stage][doc_id] = lookup_time + BACKOFF_FRACTION * (lookup_time - self.uploaded[doc_id])
+
+    def report(self) -> dict:
+        """Latencies (seconds from upload to availability) of each stage, and until a document is available at every stage"""
+        stages = {}
+        for stage in self.stages:
+            latencies = [found - self.uploaded[doc_id] for doc_id, found in self.available[stage].items()]
+            stages[stage] = {'available': len(latencies), 'seconds': latency_summary(latencies)}
+        total_latencies = [max(self.available[stage][doc_id] for stage in self.stages) - upload_time
+                           for doc_id, upload_time in self.uploaded.items()
+                           if all(doc_id in self.available[stage] for stage in self.stages)]
+        return {
+            'documents': len(self.uploaded),
+            'available': len(total_latencies),
+            'stages': stages,
+            'time_to_availability_seconds': latency_summary(total_latencies),
+        }
+
+
+def cdr_lookup(dart_context: DartContext, workers: int) -> Callable[[list[str]], set[str]]:
+    """Look up which documents have a CDR in cdr-retrieval (one request per document, workers at a time)"""
+    base_url = get_base_url('cdr-retrieval', dart_context)
+    suffix = '' if len(dart_context.tenants()) < 1 else f'?tenant_id={dart_context.tenants()[0]}'
+    rest_client = dart_context.rest_client()
+    rest_client.set_pool_size(workers)
+
+    def has_cdr(doc_id: str) -> bool:
+        # Streamed, so the CDR is not downloaded
+        with rest_client.get(f'{base_url}/{doc_id}{suffix}', stream=True) as response:
+            return response.status_code == 200
+
+    def available(doc_ids: list[str]) -> set[str]:
+        with ThreadPoolExecutor(workers) as executor:
+            return {doc_id for doc_id, found in zip(doc_ids, executor.map(has_cdr, doc_ids)) if found}
+    return available
+
+
+def search_lookup(dart_context: DartContext, batch_size: int) -> Callable[[list[str]], set[str]]:
+    """Look up which documents are searchable in corpex, batch_size at a time"""
+    tenant_id = dart_context.tenants()[0] if len(dart_context.tenants()) > 0 else None
+
+    def available(doc_ids: list[str]) -> set[str]:
+        found = set()
+        for start in range(0, len(doc_ids), batch_size):
+            found |= existing_document_ids(dart_context, doc_ids[start:start + batch_size], tenant_id)
+        return found
+    return available
+
+
+def format_latencies(summary: dict) -> str:
+    if summary['mean'] is None:
+        return 'n/a'
+    return ' '.join(f'{key}: {round(value, 1)}s' for key, value in summary.items())
+
+
+def trace_ingest(tails: list[JournalTail], trace: IngestTrace, lookups: dict[str, Callable[[list[str]], set[str]]],
+                 poll_seconds: float, timeout_seconds: float, report: Callable[[str], None] = print,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep) -> None:
+    """
+    Poll each stage for uploaded documents that are not available there yet (backing off
+    from documents that have been pending for a long time), until every file in the journals
+    has finished uploading (so a trace started alongside a submission waits for it) and every
+    document uploaded is available at every stage, or timeout_seconds have passed
+    """
+    started = clock()
+    while True:
+        for tail in tails:
+            for doc_id, upload_time in tail.new_uploads():
+                trace.upload(doc_id, upload_time)
+        for stage, lookup in lookups.items():
+            # Documents found were available by the time the poll started
+            poll_time = clock()
+            due = trace.due(stage, poll_time)
+            if len(due) > 0:
+                found = lookup(due)
+                trace.found(stage, found, poll_time)
+                trace.not_found(stage, [doc_id for doc_id in due if doc_id not in found], poll_time)
+        pending_count = max(len(trace.pending(stage)) for stage in trace.stages)
+        report(f'Documents: {len(trace.uploaded)} ' + ' '.join(f'{stage}: {len(trace.available[stage])}' for stage in trace.stages))
+        if pending_count == 0 and all(tail.finished() for tail in tails):
+            return
+        if clock() - started >= timeout_seconds:
+            report(f'Timed out with {pending_count} documents not available at every stage')
+            return
+        sleep(poll_seconds)
+
+
+@click.command(name='trace')
+@global_options.dart_options
+@click.option('--stage', 'stages', required=False, multiple=True, type=click.Choice(STAGES), help='Stage to trace: cdr (CDR available from cdr-retrieval) or search (searchable in corpex); can be used multiple times (default: both)')
+@click.option('--poll-seconds', required=False, default=DEFAULT_POLL_SECONDS, type=click.FloatRange(min=0, min_open=True), help='Time between polls of the pipeline (latencies are measured to within this time, or a tenth of the latency if longer)')
+@click.option('--timeout', 'timeout_seconds', required=False, default=DEFAULT_TIMEOUT_SECONDS, type=click.FloatRange(min=0), help='Stop after this many seconds, reporting documents that are not available by then')
+@click.option('--workers', required=False, default=8, type=click.IntRange(min=1), help='Concurrent requests checking cdr-retrieval')
+@click.option('--report-out', required=False, default=None, type=click.Path(dir_okay=False, writable=True), help='Write the latency report as JSON to this file')
+@click.argument('journals', required=True, nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@global_options.pass_dart_context
+def trace_command(dart_context: DartContext, stages, poll_seconds, timeout_seconds, workers, report_out, journals):
+    """Measure how long documents uploaded by forklift submit (read from its journals) take to become available in DART"""
+    stages = list(stages) if len(stages) > 0 else STAGES
+    lookups = {}
+    if CDR_STAGE in stages:
+        lookups[CDR_STAGE] = cdr_lookup(dart_context, workers)
+    if SEARCH_STAGE in stages:
+        lookups[SEARCH_STAGE] = search_lookup(dart_context, SEARCH_BATCH_SIZE)
+    trace = IngestTrace(stages)
+    try:
+        trace_ingest([JournalTail(journal) for journal in journals], trace, lookups, poll_seconds, timeout_seconds)
+    except KeyboardInterrupt:
+        print('Interrupted: reporting documents traced so far')
+
+    ingest_report = trace.report()
+    print(f"Documents available: {ingest_report['available']} of {ingest_report['documents']}")
+    for stage, stage_report in ingest_report['stages'].items():
+        print(f"{stage}: {stage_report['available']} available, latency {format_latencies(stage_report['seconds'])}")
+    print(f"Time to availability: {format_latencies(ingest_report['time_to_availability_seconds'])}")
+    if report_out is not None:
+        write_atomically(report_out, json.dumps(ingest_report, indent=4))
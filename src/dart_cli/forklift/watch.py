@@ -0,0 +1,245 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Callable, Iterator, Optional
+
+from dart_cli.forklift.scan import is_document_name, scan_directory
+
+# inotify event flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+EVENTS_BUFFER_SIZE = 64 * 1024
+
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_POLL_SECONDS = 10.0
+# Listings after the first also pick up files changed this long before the previous one, for timestamp granularity
+# and clock differences with file servers
+RESCAN_MARGIN_SECONDS = 60.0
+
+
+class Inotify:
+    """
+    Minimal inotify binding (Linux only): watches a directory tree for files being written,
+    moved in or removed, adding watches for directories created in it
+    """
+
+    def __init__(self):
+        """:raise OSError: if inotify is not available"""
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, 'libc not found')
+        self.__libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.__libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self.__fd = self.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_init1: {os.strerror(ctypes.get_errno())}')
+        self.__dirs: dict[int, str] = {}
+
+    def add_watch(self, directory: str) -> None:
+        """:raise OSError: if directory cannot be watched (e.g. fs.inotify.max_user_watches is reached)"""
+        watch = self.__libc.inotify_add_watch(self.__fd, os.fsencode(directory), WATCH_MASK)
+        if watch < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch {directory}: {os.strerror(ctypes.get_errno())}')
+        self.__dirs[watch] = directory
+
+    def read_events(self, timeout: float) -> list[tuple[int, Optional[str]]]:
+        """
+        Wait up to timeout seconds for events
+        :return: (flags, path) of each event (path is None for IN_Q_OVERFLOW)
+        """
+        readable, _, _ = select.select([self.__fd], [], [], max(timeout, 0))
+        if len(readable) == 0:
+            return []
+        try:
+            buffer = os.read(self.__fd, EVENTS_BUFFER_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            watch, flags, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            if flags & IN_Q_OVERFLOW:
+                events.append((flags, None))
+                continue
+            directory = self.__dirs.get(watch)
+            if directory is None:
+                continue
+            if flags & IN_IGNORED:
+                del self.__dirs[watch]
+                continue
+            events.append((flags, os.path.join(directory, os.fsdecode(name)) if name else directory))
+        return events
+
+    def close(self) -> None:
+        os.close(self.__fd)
+
+
+def file_signature(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_size, stat.st_mtime_ns
+
+
+def change_time(stat: os.stat_result) -> float:
+    """When a file was last written, or moved or copied in (both update its status change time)"""
+    return max(stat.st_mtime, stat.st_ctime)
+
+
+class DirectoryWatch:
+    """
+    Yields the documents written to a directory tree (and those already in it) once they have
+    settled: a file is only yielded after settle_seconds without changes, so files still being
+    written (or copied in) are not uploaded part way. A file is yielded again if it is changed
+    after it was yielded.
+
+    Changes are found with inotify, or by listing the tree every poll_seconds when polling
+    (inotify is not available, or does not see changes made by other hosts, e.g. on NFS).
+    Memory does not grow with the tree: listings after the first (and after inotify drops
+    events) only pick up files changed since the previous one, by their modification and
+    status change times, so only the files yielded since then are remembered.
+    """
+
+    def __init__(self, directory: str, settle_seconds: float = DEFAULT_SETTLE_SECONDS, poll: bool = False,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS, exclude_dirs: tuple = (), ignore_meta: bool = False,
+                 report: Callable[[str], None] = print, clock: Callable[[], float] = time.time):
+        self.directory = os.path.abspath(directory)
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.exclude_dirs = exclude_dirs
+        self.ignore_meta = ignore_meta
+        self.report = report
+        self.clock = clock
+        # Documents waiting to settle, with the time of their last change
+        self.__pending: dict[str, float] = {}
+        # Signatures and change times of documents yielded since changes were last all seen
+        self.__recent: dict[str, tuple[tuple[int, int], float]] = {}
+        # Every change made before this time has been seen
+        self.__seen_until: Optional[float] = None
+        self.__inotify = None
+        if not poll:
+            try:
+                self.__inotify = Inotify()
+            except OSError as e:
+                self.report(f'Cannot use inotify ({e}), polling {directory} every {poll_seconds}s instead')
+
+    def __watch_directory(self, directory: str) -> None:
+        if self.__inotify is not None:
+            # Before listing, so files written while the directory is listed are not missed
+            self.__inotify.add_watch(directory)
+
+    def __scan(self, directory: str, since: Optional[float] = None) -> None:
+        """Mark the documents in directory (changed since the given time) as pending"""
+        now = self.clock()
+        for path, _ in scan_directory(directory, with_meta=not self.ignore_meta, exclude_dirs=self.exclude_dirs,
+                                      on_directory=self.__watch_directory, report=self.report):
+            if path in self.__pending:
+                continue
+            if since is not None:
+                try:
+                    if change_time(os.stat(path)) < since - RESCAN_MARGIN_SECONDS:
+                        continue
+                except OSError:
+                    continue
+            self.__pending[path] = now
+
+    def __seen(self, until: float) -> None:
+        """Record that every change made before until has been seen"""
+        self.__seen_until = until
+        # Documents changed before then are not picked up by later listings, so they need not be remembered
+        for path, (_, changed) in list(self.__recent.items()):
+            if changed < until - RESCAN_MARGIN_SECONDS:
+                del self.__recent[path]
+
+    def __rescan(self) -> None:
+        """List the whole tree for changes made since they were last all seen"""
+        since = self.__seen_until
+        started = time.time()
+        self.__scan(self.directory, since)
+        self.__seen(started)
+
+    def __handle(self, flags: int, path: Optional[str]) -> None:
+        if path is None:
+            # Events were dropped: find changes by listing the tree again
+            self.report(f'Too many changes in {self.directory} at once, listing it again')
+            self.__rescan()
+            return
+        if flags & IN_ISDIR:
+            if flags & (IN_CREATE | IN_MOVED_TO):
+                self.__scan(path)
+            return
+        if flags & (IN_DELETE | IN_MOVED_FROM):
+            self.__pending.pop(path, None)
+            self.__recent.pop(path, None)
+        elif is_document_name(os.path.basename(path), self.ignore_meta) and not flags & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self.__pending[path] = self.clock()
+
+    def __settled(self) -> Iterator[str]:
+        now = self.clock()
+        for path, changed in list(self.__pending.items()):
+            if now - changed < self.settle_seconds:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed before it settled
+                del self.__pending[path]
+                continue
+            # Writes are not always seen as events (e.g. through NFS), so the modification time must have settled too
+            if time.time() - stat.st_mtime < self.settle_seconds:
+                self.__pending[path] = now
+                continue
+            del self.__pending[path]
+            signature = file_signature(stat)
+            yielded = self.__recent.get(path)
+            if yielded is None or yielded[0] != signature:
+                self.__recent[path] = signature, change_time(stat)
+                yield path
+
+    def __wait(self, timeout: float) -> None:
+        if self.__inotify is None:
+            time.sleep(timeout)
+            self.__rescan()
+            return
+        started = time.time()
+        events = self.__inotify.read_events(timeout)
+        for flags, path in events:
+            self.__handle(flags, path)
+        if len(events) == 0:
+            # No events were waiting, so every change made before the wait started has been seen
+            self.__seen(started)
+
+    def documents(self) -> Iterator[str]:
+        """Yield settled documents until the generator is closed (e.g. the command is interrupted)"""
+        try:
+            self.__seen_until = time.time()
+            self.__scan(self.directory)
+            while True:
+                yield from self.__settled()
+                if len(self.__pending) == 0:
+                    timeout = self.poll_seconds
+                else:
+                    timeout = max(min(self.__pending.values()) + self.settle_seconds - self.clock(), 0.1)
+                    if self.__inotify is None:
+                        timeout = min(timeout, self.poll_seconds)
+                self.__wait(timeout)
+        finally:
+            if self.__inotify is not None:
+                self.__inotify.close()
@@ -1,7 +1,6 @@
 import click
 
 from dart_cli.cli import global_options
-from dart_cli.health.dart_healthcheck import check_health
 
 
 @click.command(name='health')
@@ -20,6 +19,7 @@ from dart_cli.health.dart_healthcheck import check_health
 @global_options.pass_dart_context
 def command(dart_context, show_healthy, show_unhealthy, services):
     """Check the status of DART services"""
+    from dart_cli.health.dart_healthcheck import check_health
     for service in services:
         healthy, msg = check_health(dart_context, service)
         if show_healthy and healthy:
@@ -1,6 +1,3 @@
-import requests
-
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -9,10 +6,9 @@ def check_health(context: DartContext, service):
     base_url = get_base_url(service, context)
     msg_prefix = (service + ':                           ')[:20]
     url = base_url + '/health'
-    auth_headers = generate_auth_headers(context)
 
     try:
-        response = requests.get(url, headers=auth_headers)
+        response = context.rest_client().get(url)
     except Exception as e:
         return False, f'{msg_prefix}Failed - Unable to reach service: {str(e)}'
 
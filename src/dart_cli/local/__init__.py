@@ -1,17 +1,14 @@
 import click
-from dart_cli.local.filter import raw_filter, cdr_filter
-from dart_cli.local.list import list_ids
-from dart_cli.local.post import post_command
-from dart_cli.local.hash import hash_files
 
+from dart_cli.cli.lazy_group import LazyGroup
 
-@click.group(name='local')
+
+@click.group(name='local', cls=LazyGroup, lazy_subcommands={
+    'filter-docs': 'dart_cli.local.filter:raw_filter',
+    'filter-cdrs': 'dart_cli.local.filter:cdr_filter',
+    'post': 'dart_cli.local.post:post_command',
+    'list-ids': 'dart_cli.local.list:list_ids',
+    'hash': 'dart_cli.local.hash:hash_files',
+})
 def command():
     """Utilities for dealing with DART data locally"""
-
-
-command.add_command(raw_filter)
-command.add_command(cdr_filter)
-command.add_command(post_command)
-command.add_command(list_ids)
-command.add_command(hash_files)
@@ -16,9 +16,10 @@ def hash_files(files, input_dir, rename, output_dir):
     for file in files:
         file_paths.append(file)
 
-    for root, subFolders, files in os.walk(input_dir):
-        for filename in files:
-            file_paths.append(os.path.join(root, filename))
+    if input_dir is not None:
+        for root, subFolders, files in os.walk(input_dir):
+            for filename in files:
+                file_paths.append(os.path.join(root, filename))
 
     for file_path in file_paths:
         extension = os.path.splitext(file_path)[-1]
@@ -6,63 +6,75 @@ from pathlib import Path
 import click
 
 import requests
-from time import sleep
 from time import time
 import queue
 import threading
 import shutil
 
+from dart_cli.cli import global_options
+from dart_cli.dart_context.dart_context import DartContext
+from dart_cli.dart_rest.attempts import RequestListener, observed_request
+from dart_cli.dart_rest.rest_client import pooled_session, request_body_rewinder
+from dart_cli.dart_rest.retry import RetryPolicy, DEFAULT_MAX_RETRIES
+from dart_cli.utilities.progress import UploadProgress
+
 
 class WorkerThread(threading.Thread):
-    def __init__(self, files_queue, service_url: str, completed_file_path: str, failed_file_path: str, auth_headers: {},
-                 upload_format: str):
+    def __init__(self, files_queue, service_url: str, completed_file_path: str, failed_file_path: str,
+                 session: requests.Session, retry_policy: RetryPolicy, upload_format: str,
+                 listeners: list[RequestListener], progress: UploadProgress = None):
         threading.Thread.__init__(self)
         self.files_queue = files_queue
         self.service_url = service_url
         self.completed_file_path = completed_file_path
         self.failed_file_path = failed_file_path
-        self.auth_headers = auth_headers
+        self.session = session
+        self.retry_policy = retry_policy
         self.upload_format = upload_format
+        self.listeners = listeners
+        self.progress = progress
 
     def run(self):
         while True:
             job_to_scan = self.files_queue.get()
             file_index = job_to_scan['index']
             file_path = job_to_scan['file_path']
-            if file_index % 500 == 0:
+            if self.progress is None and file_index % 500 == 0:
                 print(f'Posting: #{file_index} filename: {file_path.name}')
+            if self.progress is not None:
+                self.progress.file_started()
             status, message = upload_file(file_path=file_path, service_url=self.service_url,
-                                          auth_headers=self.auth_headers, upload_format=self.upload_format)
+                                          session=self.session, retry_policy=self.retry_policy,
+                                          upload_format=self.upload_format, listeners=self.listeners)
+            if self.progress is not None:
+                self.progress.file_finished(status is True)
             if status is True:
                 move_file(file_path, self.completed_file_path)
             else:
                 move_file(file_path, self.failed_file_path)
-                print(f'failed: {status} message: {message}')
+                if self.progress is not None:
+                    self.progress.log(f'failed: {status} message: {message}')
+                else:
+                    print(f'failed: {status} message: {message}')
             self.files_queue.task_done()
 
 
-def try_post(url, post_files=None, json_data=None, sleep_time=None, headers=None, numtimes=None):
-    times_left = numtimes - 1
+def try_post(session: requests.Session, retry_policy: RetryPolicy, url, post_files=None, json_data=None,
+             listeners: list[RequestListener] = ()):
+    """Post a file or json document, retrying transient failures according to retry_policy"""
+    rewind_body = request_body_rewinder({'files': post_files})
+
+    def send():
+        return observed_request(session, 'POST', f"{url}", listeners, files=post_files, json=json_data).response
+
     try:
-        response = requests.post(f"{url}", files=post_files, json=json_data, headers=headers)
-        if response.status_code == 201 or response.status_code == 200:
-            response.close()
-            return [True, response.text]
-        else:
-            if times_left == 0:
-                response.close()
-                return [False, f"FAILED TO POST. Response status-code: {response.status_code}"]
-            else:
-                sleep(sleep_time)
-                response.close()
-                return try_post(url, post_files, json_data, sleep_time, headers, times_left)
+        with retry_policy.execute(send, rewind_body) as response:
+            if response.status_code == 201 or response.status_code == 200:
+                return [True, response.text]
+            return [False, f"FAILED TO POST. Response status-code: {response.status_code}"]
     except Exception as e:
         print(f"Exception: {e}")
-        if times_left == 0:
-            return [False, f"FAILED TO POST. Exception: {str(e)}"]
-        else:
-            sleep(sleep_time)
-            return try_post(url, post_files, json_data, sleep_time, headers, times_left)
+        return [False, f"FAILED TO POST. Exception: {str(e)}"]
 
 
 def generate_files_queue(files, directory: str):
@@ -91,16 +103,19 @@ def generate_files_queue(files, directory: str):
     return _files_queue
 
 
-def upload_file(file_path: str, service_url: str, auth_headers: {}, upload_format: str):
+def upload_file(file_path: str, service_url: str, session: requests.Session, retry_policy: RetryPolicy,
+                upload_format: str, listeners: list[RequestListener] = ()):
     with open(file_path, 'rb') as file:
         if upload_format == 'file':
             post_files = {
                 'file': (file.name, file),
             }
-            return try_post(url=service_url, post_files=post_files, sleep_time=0.2, numtimes=1, headers=auth_headers)
+            return try_post(session=session, retry_policy=retry_policy, url=service_url, post_files=post_files,
+                            listeners=listeners)
         if upload_format == 'json':
             json_data = json.loads(file.read().decode('utf8'))
-            return try_post(url=service_url, json_data=json_data, sleep_time=0.2, numtimes=1, headers=auth_headers)
+            return try_post(session=session, retry_policy=retry_policy, url=service_url, json_data=json_data,
+                            listeners=listeners)
 
 
 def move_file(source_file_path: str, destination_file_path: str):
@@ -109,18 +124,37 @@ def move_file(source_file_path: str, destination_file_path: str):
         shutil.move(source_file_path, Path(destination_file_path).joinpath(filename))
 
 
-def upload(url, files, input_dir, failed_dir, succeeded_dir, upload_format, auth_headers_in, threads):
+def upload(url, files, input_dir, failed_dir, succeeded_dir, upload_format, auth, threads, max_retries,
+           listeners: list[RequestListener] = (), show_progress=False):
+    session = pooled_session(threads)
+    if auth is not None:
+        session.auth = tuple(auth.split(':', 1))
+    retry_policy = RetryPolicy(max_retries=max_retries)
+
     # track time
     start_time = time()
 
     files_to_post_queue = generate_files_queue(files, input_dir)
 
+    progress = None
+    if show_progress:
+        progress = UploadProgress()
+        progress.add_total(files_to_post_queue.qsize())
+        progress.total_known()
+        listeners = [*listeners, progress.observe]
+        progress.start()
+
     for i in range(threads):
-        worker = WorkerThread(files_to_post_queue, url, succeeded_dir, failed_dir, auth_headers_in, upload_format)
+        worker = WorkerThread(files_to_post_queue, url, succeeded_dir, failed_dir, session, retry_policy, upload_format,
+                              listeners, progress)
         worker.setDaemon(True)
         worker.start()
 
-    files_to_post_queue.join()
+    try:
+        files_to_post_queue.join()
+    finally:
+        if progress is not None:
+            progress.stop()
 
     total_time = (time() - start_time) / 60
     print(f"Completed in {round(total_time, 2)} minutes")
@@ -135,9 +169,19 @@ def upload(url, files, input_dir, failed_dir, succeeded_dir, upload_format, auth
 @click.option('-s', '--succeeded-dir', required=False, default=None)
 @click.option('-f', '--failed-dir', required=False, default=None)
 @click.option('-a', '--auth', required=False, default=None, help='Basic auth: [username]:[password]')
+@click.option('--max-retries', required=False, type=click.IntRange(min=0), default=DEFAULT_MAX_RETRIES,
+              help='Maximum number of times to retry a post that failed with a transient error')
+@click.option('--progress/--no-progress', 'show_progress', required=False, default=True,
+              help='Show live throughput, latency and ETA (a status line on a terminal, otherwise a log line every 30s)')
 @click.argument('files', required=False, nargs=-1)
-def post_command(url, threads, upload_format, input_dir, succeeded_dir, failed_dir, auth, files):
+@global_options.pass_dart_context
+def post_command(dart_context: DartContext, url, threads, upload_format, input_dir, succeeded_dir, failed_dir, auth,
+                 max_retries, show_progress, files):
     """Post files to a service"""
     if input_dir is None and len(files) == 0:
         raise click.exceptions.BadArgumentUsage('you must provide either input directory or files for upload')
-    upload(url, files, input_dir, failed_dir, succeeded_dir, upload_format, auth, threads)
+    # Record posts if metrics were requested with the global --metrics-out/--metrics-prometheus options
+    recorder = dart_context.metrics_recorder()
+    listeners = [] if recorder is None else [recorder.record]
+    upload(url, files, input_dir, failed_dir, succeeded_dir, upload_format, auth, threads, max_retries, listeners,
+           show_progress)
@@ -1,14 +1,13 @@
 import click
 
 from dart_cli.cli import global_options
-from dart_cli.messages.read import read_command
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='messages')
+@click.group(name='messages', cls=LazyGroup, lazy_subcommands={
+    'read': 'dart_cli.messages.read:read_command',
+})
 @global_options.dart_options
 @global_options.pass_dart_context
 def command(dart_context):
     """Commands for interacting with DART messaging"""
-
-
-command.add_command(read_command)
@@ -1,23 +1,22 @@
 import click
 
 from dart_cli.cli.global_options import dart_options, pass_dart_context
-from dart_cli.pipeline.commands import start_command, stop_command, destroy_command, provision_deploy_command, deploy_command, \
-    provision_command, nuke_command, clean_command, info_command, refresh_command
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='pipeline')
+@click.group(name='pipeline', cls=LazyGroup, lazy_subcommands={
+    'provision': 'dart_cli.pipeline.commands:provision_command',
+    'deploy': 'dart_cli.pipeline.commands:deploy_command',
+    'provision-deploy': 'dart_cli.pipeline.commands:provision_deploy_command',
+    'refresh': 'dart_cli.pipeline.commands:refresh_command',
+    'start': 'dart_cli.pipeline.commands:start_command',
+    'stop': 'dart_cli.pipeline.commands:stop_command',
+    'info': 'dart_cli.pipeline.commands:info_command',
+    'clean-s3': 'dart_cli.pipeline.commands:clean_command',
+    'destroy': 'dart_cli.pipeline.commands:destroy_command',
+    'nuke': 'dart_cli.pipeline.commands:nuke_command',
+})
 @dart_options
 @pass_dart_context
 def command(dart_context):
     """Commands for provisioning and deploying the DART pipeline"""
-
-command.add_command(provision_command)
-command.add_command(deploy_command)
-command.add_command(provision_deploy_command)
-command.add_command(refresh_command)
-command.add_command(start_command)
-command.add_command(stop_command)
-command.add_command(info_command)
-command.add_command(clean_command)
-command.add_command(destroy_command)
-command.add_command(nuke_command)
@@ -1,16 +1,15 @@
 import click
 from dart_cli.cli.global_options import dart_options, pass_dart_context
-from dart_cli.profiles import manage_profiles
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='profiles')
+@click.group(name='profiles', cls=LazyGroup, lazy_subcommands={
+    'add': 'dart_cli.profiles.manage_profiles:add_profile_command',
+    'rm': 'dart_cli.profiles.manage_profiles:remove_profile_command',
+    'ls': 'dart_cli.profiles.manage_profiles:ls_profiles_command',
+    'view': 'dart_cli.profiles.manage_profiles:view_profile_command',
+})
 @dart_options
 @pass_dart_context
 def command(ctx):
     """Commands for managing configuration profiles"""
-
-
-command.add_command(manage_profiles.add_profile_command)
-command.add_command(manage_profiles.remove_profile_command)
-command.add_command(manage_profiles.ls_profiles_command)
-command.add_command(manage_profiles.view_profile_command)
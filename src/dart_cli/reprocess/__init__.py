@@ -1,7 +1,6 @@
 import click
 
 from dart_cli.cli.global_options import dart_options, pass_dart_context
-from dart_cli.reprocess.reprocess import reprocess_cdrs
 
 
 @click.command(name='reprocess')
@@ -20,4 +19,5 @@ def command(dart_context, succeeded_dir, failed_dir, labels, threads, input_dir,
     print(files)
     if input_dir is None and len(files) == 0:
         raise click.exceptions.BadArgumentUsage('you must provide either input directory or files for reprocessing')
+    from dart_cli.reprocess.reprocess import reprocess_cdrs
     reprocess_cdrs(dart_context, succeeded_dir, failed_dir, labels, threads, input_dir, files)
@@ -6,10 +6,8 @@ from pathlib import Path
 import json
 import shutil
 
-import requests
 from dart_cli.dart_context.dart_context import DartContext
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 
@@ -27,8 +25,7 @@ def upload_document(dart_context: DartContext, json, labels):
         else:
             cdr['labels'] = labels
 
-    auth_headers = generate_auth_headers(dart_context)
-    response = requests.post(url, json=cdr, headers=auth_headers)
+    response = dart_context.rest_client().post(url, json=cdr)
 
     if response.status_code < 300:
         return True
@@ -37,6 +34,7 @@ def upload_document(dart_context: DartContext, json, labels):
         return False
 
 def reprocess_cdrs(dart_context, succeeded_dir, failed_dir, labels, threads, input_dir, files):
+    dart_context.rest_client().set_pool_size(threads)
     if files is not None:
         for file_path in files:
             with open(file_path, 'rt') as file:
@@ -1,17 +1,15 @@
 import click
 
 from dart_cli.cli.global_options import dart_options, pass_dart_context
-from dart_cli.retrieve.cdr_archive import get_cdr_archive
-from dart_cli.retrieve.cdr_retrieval import get_cdrs, get_raws
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='retrieve')
+@click.group(name='retrieve', cls=LazyGroup, lazy_subcommands={
+    'cdr-archive': 'dart_cli.retrieve.cdr_archive:get_cdr_archive',
+    'cdrs': 'dart_cli.retrieve.cdr_retrieval:get_cdrs',
+    'raws': 'dart_cli.retrieve.cdr_retrieval:get_raws',
+})
 @dart_options
 @pass_dart_context
 def command(ctx):
     """Commands for retrieving DART artifacts"""
-
-
-command.add_command(get_cdr_archive)
-command.add_command(get_cdrs)
-command.add_command(get_raws)
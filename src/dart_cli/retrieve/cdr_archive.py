@@ -1,9 +1,7 @@
 import os
 
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -25,9 +23,7 @@ def get_cdr_archive(dart_context: DartContext, output):
     elif output_path.split('.')[-1] != 'zip':
         file_path = output_path + '.zip'
 
-    auth_headers = generate_auth_headers(dart_context)
-
-    with requests.get(url, stream=True, headers=auth_headers) as response:
+    with dart_context.rest_client().get(url, stream=True) as response:
         response.raise_for_status()
         with open(file_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=8192):
@@ -2,9 +2,7 @@ import json
 import os
 import re
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.cli.global_options import pass_dart_context, dart_options
@@ -61,7 +59,6 @@ def process_cdr_data(cdr, incl, excl):
 @pass_dart_context
 def get_cdrs(dart_context: DartContext, output, view, ext, include, exclude, ids_file, doc_ids):
     base_url = get_base_url('cdr-retrieval', dart_context)
-    auth_headers = generate_auth_headers(dart_context)
 
     all_doc_ids = []
     if ids_file is not None:
@@ -83,7 +80,7 @@ def get_cdrs(dart_context: DartContext, output, view, ext, include, exclude, ids
         file_name = doc_id + '.' + ext.strip().lstrip('. ')
         file_path = os.path.join(output, file_name)
         tmp_url = url(doc_id)
-        with requests.get(tmp_url, headers=auth_headers) as response:
+        with dart_context.rest_client().get(tmp_url) as response:
             try:
                 response.raise_for_status()
             except Exception as e:
@@ -116,7 +113,6 @@ def parse_content_disposition(header_value):
 @pass_dart_context
 def get_raws(dart_context: DartContext, output, ids_file, doc_ids):
     base_url  = get_base_url('cdr-retrieval', dart_context)
-    auth_headers = generate_auth_headers(dart_context)
 
     all_doc_ids = []
     if ids_file is not None:
@@ -134,7 +130,7 @@ def get_raws(dart_context: DartContext, output, ids_file, doc_ids):
         return base_url + '/raw/' + doc_id + suffix
 
     for doc_id in all_doc_ids:
-        with requests.get(url(doc_id), stream=True, headers=auth_headers) as response:
+        with dart_context.rest_client().get(url(doc_id), stream=True) as response:
             response.raise_for_status()
             content_disposition_header = response.headers['content-disposition']
             filename = parse_content_disposition(content_disposition_header)
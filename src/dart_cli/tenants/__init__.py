@@ -1,18 +1,17 @@
 import click
 
 from dart_cli.cli.global_options import pass_dart_context, dart_options
-from dart_cli.tenants import add_tenants
-from dart_cli.tenants import remove_tenants, tenant_docs, ls_tenants
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='tenants')
+@click.group(name='tenants', cls=LazyGroup, lazy_subcommands={
+    'add': 'dart_cli.tenants.add_tenants:add_command',
+    'clone': 'dart_cli.tenants.add_tenants:clone_command',
+    'docs': 'dart_cli.tenants.tenant_docs:command',
+    'ls': 'dart_cli.tenants.ls_tenants:command',
+    'rm': 'dart_cli.tenants.remove_tenants:command',
+})
 @dart_options
 @pass_dart_context
 def command(ctx):
     """Commands for managing DART tenants"""
-
-command.add_command(add_tenants.add_command)
-command.add_command(add_tenants.clone_command)
-command.add_command(tenant_docs.command)
-command.add_command(ls_tenants.command)
-command.add_command(remove_tenants.command)
@@ -1,7 +1,5 @@
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -11,8 +9,7 @@ from dart_cli.cli.global_options import dart_options, pass_dart_context
 
 def add_tenant(context : DartContext, tenant):
     base_url = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.post(url=base_url + f'/{tenant}', headers=auth_headers)
+    res = context.rest_client().post(url=base_url + f'/{tenant}')
     if res.status_code != 201:
         print(f"Unable to add {tenant} ({res.status_code}): {res.text}")
     else:
@@ -35,8 +32,7 @@ def add_command(context : DartContext, tenants):
 def clone_command(context : DartContext, existing_tenant, new_tenant):
     """Clone a tenant"""
     base_url = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.post(url=base_url + f'/{existing_tenant}/clone/{new_tenant}', headers=auth_headers)
+    res = context.rest_client().post(url=base_url + f'/{existing_tenant}/clone/{new_tenant}')
     if res.status_code != 201:
         print(f"Unable to clone {existing_tenant} ({res.status_code}):\n{res.text}")
     else:
@@ -1,7 +1,5 @@
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -15,8 +13,7 @@ from dart_cli.cli.global_options import dart_options, pass_dart_context
 def command(context: DartContext):
     """Display all tenants"""
     base_url  = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.get(url=base_url, headers=auth_headers)
+    res = context.rest_client().get(url=base_url)
     if res.status_code != 200:
         print(f"Unable to retrieve tenants:")
         print(f"Status: {res.status_code}")
@@ -1,7 +1,5 @@
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -15,8 +13,7 @@ from dart_cli.cli.global_options import dart_options, pass_dart_context
 def ls_command(context: DartContext, tenant_id):
     """Display docs belonging to a tenant"""
     base_url = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.get(url=base_url + f'/{tenant_id}/documents', headers=auth_headers)
+    res = context.rest_client().get(url=base_url + f'/{tenant_id}/documents')
     if res.status_code != 200:
         print(f"Unable to retrieve documents from {tenant_id}:")
         print(f"Status: {res.status_code}")
@@ -47,16 +44,14 @@ def get_doc_ids_list(doc_ids, doc_ids_file):
 def add_command(context : DartContext, tenant_id, doc_ids, doc_ids_file):
     """Add docs to a tenant"""
     base_url  = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
     all_doc_ids = get_doc_ids_list(doc_ids, doc_ids_file)
     if len(all_doc_ids) < 1:
         print("Provide at least one document id to add")
         return
     doc_ids_log = f'{len(all_doc_ids)} documents' if len(all_doc_ids) > 10 else ", ".join(all_doc_ids)
-    res = requests.post(
+    res = context.rest_client().post(
         url=base_url + f'/{tenant_id}/documents',
         json=all_doc_ids,
-        headers=auth_headers,
     )
     if res.status_code != 200:
         print(f"Unable to add {doc_ids_log} to {tenant_id}:")
@@ -74,16 +69,14 @@ def add_command(context : DartContext, tenant_id, doc_ids, doc_ids_file):
 def remove_command(context : DartContext, tenant_id, doc_ids, doc_ids_file):
     """Remove docs from a tenant"""
     base_url  = get_base_url('tenants', context)
-    auth_headers = generate_auth_headers(context)
     all_doc_ids = get_doc_ids_list(doc_ids, doc_ids_file)
     if len(all_doc_ids) < 1:
         print("Provide at least one document id to remove")
         return
     doc_ids_log = f'{len(all_doc_ids)} documents' if len(all_doc_ids) > 10 else ", ".join(all_doc_ids)
-    res = requests.post(
+    res = context.rest_client().post(
         url=base_url + f'/{tenant_id}/documents/remove',
         json=all_doc_ids,
-        headers=auth_headers,
     )
     if res.status_code != 200:
         print(f"Unable to remove {doc_ids_log} from {tenant_id}:")
@@ -1,19 +1,18 @@
 import click
 
 from dart_cli.cli.global_options import pass_dart_context, dart_options
-from dart_cli.users import ls_users, groups
-from dart_cli.users import add_user, remove_users
+from dart_cli.cli.lazy_group import LazyGroup
 
 
-@click.group(name='users')
+@click.group(name='users', cls=LazyGroup, lazy_subcommands={
+    'ls': 'dart_cli.users.ls_users:ls_command',
+    'view': 'dart_cli.users.ls_users:view_command',
+    'add': 'dart_cli.users.add_user:add_command',
+    'update': 'dart_cli.users.add_user:update_command',
+    'add-groups': 'dart_cli.users.groups:join_command',
+    'rm': 'dart_cli.users.remove_users:command',
+})
 @dart_options
 @pass_dart_context
 def command(ctx):
     """Commands for managing DART users"""
-
-command.add_command(ls_users.ls_command)
-command.add_command(ls_users.view_command)
-command.add_command(add_user.add_command)
-command.add_command(add_user.update_command)
-command.add_command(groups.join_command)
-command.add_command(remove_users.command)
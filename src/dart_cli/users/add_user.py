@@ -1,10 +1,8 @@
 from pathlib import Path
 
 import click
-import requests
 import json
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -64,8 +62,7 @@ def add_command(context : DartContext, user_name, metadata_file, metadata, first
     """Add a user"""
     metadata_obj = generate_metadata(metadata_file, metadata, first_name, last_name, email, group, password)
     base_url = get_base_url('users', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.post(url=base_url + f'/{user_name}', json=metadata_obj, headers=auth_headers)
+    res = context.rest_client().post(url=base_url + f'/{user_name}', json=metadata_obj)
     if res.status_code != 201:
         print(f"Unable to add {user_name} ({res.status_code}): {res.text}")
     else:
@@ -86,10 +83,9 @@ def update_command(context : DartContext, user_name, metadata_file, metadata, fi
     """Update a user"""
     metadata_obj = generate_metadata(metadata_file, metadata, first_name, last_name, email, group, password)
     base_url = get_base_url('users', context)
-    auth_headers = generate_auth_headers(context)
     if not metadata_obj:
         raise click.exceptions.ClickException('Must provide updated data')
-    res = requests.put(url=base_url + f'/{user_name}', json=metadata_obj, headers=auth_headers)
+    res = context.rest_client().put(url=base_url + f'/{user_name}', json=metadata_obj)
     if res.status_code != 200:
         print(f"Unable to update {user_name} ({res.status_code}): {res.text}")
     else:
@@ -1,7 +1,5 @@
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -30,8 +28,7 @@ def display_user(user_obj: {}):
 def ls_command(context : DartContext, view):
     """Display all users"""
     base_url  = get_base_url('users', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.get(url=base_url, headers=auth_headers)
+    res = context.rest_client().get(url=base_url)
     if res.status_code != 200:
         print(f"Unable to retrieve users:")
         print(f"Status: {res.status_code}")
@@ -45,8 +42,7 @@ def ls_command(context : DartContext, view):
 
 def get_user(context, user):
     base_url = get_base_url('users', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.get(url=base_url + f'/{user}', headers=auth_headers)
+    res = context.rest_client().get(url=base_url + f'/{user}')
     if res.status_code != 200:
         print(f"Unable to retrieve users:")
         print(f"Status: {res.status_code}")
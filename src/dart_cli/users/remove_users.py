@@ -1,7 +1,5 @@
 import click
-import requests
 
-from dart_cli.utilities.auth import generate_auth_headers
 from dart_cli.utilities.url import get_base_url
 
 from dart_cli.dart_context.dart_context import DartContext
@@ -11,8 +9,7 @@ from dart_cli.cli.global_options import dart_options, pass_dart_context
 
 def remove_user(context : DartContext, user):
     base_url = get_base_url('users', context)
-    auth_headers = generate_auth_headers(context)
-    res = requests.delete(url=base_url + f'/{user}', headers=auth_headers)
+    res = context.rest_client().delete(url=base_url + f'/{user}')
     if res.status_code != 200:
         print(f"Unable to remove {user} ({res.status_code}): {res.text}")
     else:
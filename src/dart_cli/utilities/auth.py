@@ -1,6 +1,4 @@
-import jwt
-import requests
-
+from dart_cli.utilities.token_cache import cached_token, token_cache_key
 from dart_cli.utilities.url import get_base_url
 
 
@@ -13,22 +11,44 @@ KEYCLOAK_REALM = 'dart'
 KEYCLOAK_PROTOCOL = 'openid-connect'
 KEYCLOAK_CLIENT = 'dart-cli'
 
-def update_token(context: 'DartContext', show: bool, decode: bool) -> str:
+def keycloak_token_url(context: 'DartContext') -> str:
     base_url = get_base_url('keycloak', context)
+    return f'{base_url}/auth/realms/{KEYCLOAK_REALM}/protocol/{KEYCLOAK_PROTOCOL}/token'
+
+
+def update_token(context: 'DartContext', show: bool, decode: bool) -> str:
     if context.auth_config.dart_auth_config.use_client_secret() and context.auth_config.dart_auth_config.client_secret is not None:
-        keycloak_url = f'{base_url}/auth/realms/{KEYCLOAK_REALM}/protocol/{KEYCLOAK_PROTOCOL}/token'
+        keycloak_url = keycloak_token_url(context)
         client_secret = context.auth_config.dart_auth_config.client_secret
-        res = requests.post(keycloak_url, data={'grant_type': 'client_credentials',
-                                                'client_id': KEYCLOAK_CLIENT,
-                                                'client_secret': client_secret})
+        res = context.rest_client().post(keycloak_url,
+                                         auth=False,
+                                         data={'grant_type': 'client_credentials',
+                                               'client_id': KEYCLOAK_CLIENT,
+                                               'client_secret': client_secret})
         if res.status_code == 200:
             res_data = res.json()
             new_token = res_data['access_token']
             if show:
                 print(new_token)
             if decode:
+                import jwt
                 print(jwt.decode(new_token, options={"verify_signature": False}))
             return new_token
         else:
             print("Unable to update token:")
             print(res.json())
+
+
+def dart_token_cache_key(context: 'DartContext') -> str:
+    return token_cache_key(context.profile_name, keycloak_token_url(context))
+
+
+def cached_dart_token(context: 'DartContext', stale_token: str = None) -> str:
+    """
+    Get a token for DART auth, reusing the token cached on disk for this profile and
+    keycloak instance until shortly before it expires
+    :param stale_token: token that has been rejected and must not be reused
+    """
+    return cached_token(dart_token_cache_key(context),
+                        lambda: update_token(context, False, False),
+                        stale_token)
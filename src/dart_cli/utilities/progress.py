@@ -0,0 +1,159 @@
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, TextIO
+
+from dart_cli.dart_rest.attempts import RequestAttempt
+from dart_cli.dart_rest.metrics import percentile
+
+# Seconds between redraws of the status line on a terminal, and between log lines otherwise
+TTY_REFRESH_INTERVAL = 0.5
+LOG_INTERVAL = 30.0
+
+# Rates are averaged over this many seconds, and latency percentiles over this many requests
+RATE_WINDOW_SECONDS = 10.0
+LATENCY_WINDOW = 1000
+
+CLEAR_LINE = '\r\x1b[K'
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '?'
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
+
+class UploadProgress:
+    """
+    Live progress of a bulk upload: files/s, MB/s, files in flight, successes and failures,
+    ETA and rolling p50/p95 request latency. On a terminal a status line is redrawn in place;
+    otherwise a line is logged periodically. Updates only bump counters under a lock, and the
+    display is rendered by a background thread.
+    """
+
+    def __init__(self,
+                 stream: TextIO = None,
+                 interactive: bool = None,
+                 interval: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param interactive: redraw a status line (default: whether stream is a terminal)
+        :param interval: seconds between updates (default depends on interactive)
+        """
+        self.stream = sys.stdout if stream is None else stream
+        self.interactive = self.stream.isatty() if interactive is None else interactive
+        self.interval = (TTY_REFRESH_INTERVAL if self.interactive else LOG_INTERVAL) if interval is None else interval
+        self.clock = clock
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__thread = None
+        self.__start_time = clock()
+        self.__total = 0
+        self.__total_known = False
+        self.__in_flight = 0
+        self.__succeeded = 0
+        self.__failed = 0
+        self.__bytes_sent = 0
+        self.__latencies = deque(maxlen=LATENCY_WINDOW)
+        self.__samples = deque([(self.__start_time, 0, 0)])
+        self.__status_shown = False
+
+    def add_total(self, count: int = 1) -> None:
+        """Count files discovered for upload"""
+        with self.__lock:
+            self.__total += count
+
+    def total_known(self) -> None:
+        """Mark discovery as finished, so that an ETA can be given"""
+        with self.__lock:
+            self.__total_known = True
+
+    def file_started(self) -> None:
+        with self.__lock:
+            self.__in_flight += 1
+
+    def file_finished(self, success: bool) -> None:
+        with self.__lock:
+            self.__in_flight -= 1
+            if success:
+                self.__succeeded += 1
+            else:
+                self.__failed += 1
+
+    def observe(self, attempt: RequestAttempt) -> None:
+        """Request listener recording the latency and bytes sent of each attempt (see DartRestClient.add_listener)"""
+        with self.__lock:
+            self.__latencies.append(attempt.elapsed)
+            self.__bytes_sent += attempt.bytes_sent
+
+    def log(self, message: str) -> None:
+        """Print a message without garbling the status line"""
+        with self.__lock:
+            if self.__status_shown:
+                self.stream.write(CLEAR_LINE)
+                self.__status_shown = False
+            self.stream.write(message + '\n')
+            self.stream.flush()
+
+    def start(self) -> 'UploadProgress':
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop updating, and print the final status"""
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        self.__show(final=True)
+
+    def __run(self) -> None:
+        while not self.__stopped.wait(self.interval):
+            self.__show()
+
+    def status(self) -> str:
+        with self.__lock:
+            now = self.clock()
+            done = self.__succeeded + self.__failed
+            self.__samples.append((now, done, self.__bytes_sent))
+            while len(self.__samples) > 2 and self.__samples[1][0] <= now - RATE_WINDOW_SECONDS:
+                self.__samples.popleft()
+            window_start, window_done, window_bytes = self.__samples[0]
+            latencies = sorted(self.__latencies)
+            total = self.__total
+            total_known = self.__total_known
+            in_flight = self.__in_flight
+            succeeded = self.__succeeded
+            failed = self.__failed
+            bytes_sent = self.__bytes_sent
+
+        window = now - window_start
+        files_rate = (done - window_done) / window if window > 0 else 0.0
+        bytes_rate = (bytes_sent - window_bytes) / window if window > 0 else 0.0
+        eta = None
+        if total_known and files_rate > 0:
+            eta = max(total - done, 0) / files_rate
+        p50 = percentile(latencies, 0.5)
+        p95 = percentile(latencies, 0.95)
+        latency = '-' if p50 is None else f'{p50 * 1000:.0f}/{p95 * 1000:.0f}ms'
+        total_text = str(total) if total_known else f'{total}+'
+        return (f'{done}/{total_text} files  {files_rate:.1f} files/s  {bytes_rate / 1e6:.2f} MB/s  '
+                f'in flight: {in_flight}  ok: {succeeded}  failed: {failed}  '
+                f'p50/p95: {latency}  elapsed: {format_duration(now - self.__start_time)}  ETA: {format_duration(eta)}')
+
+    def __show(self, final: bool = False) -> None:
+        status = self.status()
+        with self.__lock:
+            if self.interactive and not final:
+                self.stream.write(CLEAR_LINE + status)
+                self.__status_shown = True
+            else:
+                self.stream.write((CLEAR_LINE if self.__status_shown else '') + status + '\n')
+                self.__status_shown = False
+            self.stream.flush()
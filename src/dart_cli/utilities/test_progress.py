@@ -0,0 +1,64 @@
+import io
+
+from dart_cli.dart_rest.attempts import RequestAttempt
+from dart_cli.utilities.progress import UploadProgress, format_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def attempt(elapsed: float, bytes_sent: int) -> RequestAttempt:
+    return RequestAttempt('POST', 'http://forklift/upload', None, None, elapsed, elapsed, 0.0, bytes_sent, 0)
+
+
+def test_status_reports_rates_latency_and_eta():
+    clock = FakeClock()
+    progress = UploadProgress(io.StringIO(), interactive=False, clock=clock)
+    progress.add_total(100)
+    progress.total_known()
+    for i in range(20):
+        progress.file_started()
+        progress.observe(attempt(0.01 * (i + 1), 1_000_000))
+        progress.file_finished(i != 0)
+    progress.file_started()
+    clock.now += 10
+
+    status = progress.status()
+    assert '20/100 files' in status
+    assert '2.0 files/s' in status
+    assert '2.00 MB/s' in status
+    assert 'in flight: 1' in status
+    assert 'ok: 19  failed: 1' in status
+    assert 'p50/p95: 100/190ms' in status
+    assert 'ETA: 40s' in status
+
+
+def test_eta_unknown_while_discovering():
+    clock = FakeClock()
+    progress = UploadProgress(io.StringIO(), interactive=False, clock=clock)
+    progress.add_total(5)
+    clock.now += 1
+    assert '0/5+ files' in progress.status()
+    assert 'ETA: ?' in progress.status()
+
+
+def test_log_clears_the_status_line():
+    stream = io.StringIO()
+    progress = UploadProgress(stream, interactive=True, interval=60)
+    progress.start()
+    progress.log('failed: upload')
+    progress.stop()
+    assert stream.getvalue().startswith('failed: upload\n')
+    assert stream.getvalue().endswith('\n')
+
+
+def test_format_duration():
+    assert format_duration(None) == '?'
+    assert format_duration(59) == '59s'
+    assert format_duration(61) == '1m01s'
+    assert format_duration(3700) == '1h01m'
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import jwt
+import pytest
+
+from dart_cli.utilities import token_cache
+
+
+def make_token(expires_in: float) -> str:
+    return jwt.encode({'exp': int(time.time() + expires_in)}, 'secret', algorithm='HS256')
+
+
+@pytest.fixture(autouse=True)
+def home_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
+
+
+def test_fresh_token_is_reused():
+    token = make_token(3600)
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return token
+
+    assert token_cache.cached_token('p@url', fetch) == token
+    assert token_cache.cached_token('p@url', fetch) == token
+    assert len(fetches) == 1
+
+
+def test_token_near_expiry_is_replaced():
+    old_token = make_token(token_cache.TOKEN_EXPIRY_MARGIN_SECONDS / 2)
+    new_token = make_token(3600)
+    token_cache.store_token('p@url', old_token)
+
+    assert token_cache.cached_token('p@url', lambda: new_token) == new_token
+
+
+def test_stale_token_is_replaced_but_other_tokens_are_reused():
+    rejected_token = make_token(3600)
+    token_cache.store_token('p@url', rejected_token)
+    replacement = make_token(3601)
+
+    assert token_cache.cached_token('p@url', lambda: replacement, stale_token=rejected_token) == replacement
+    assert token_cache.cached_token('p@url', lambda: make_token(3602), stale_token=rejected_token) == replacement
+
+
+def test_keys_are_separated_by_profile():
+    token_a = make_token(3600)
+    token_b = make_token(3601)
+    key_a = token_cache.token_cache_key('a', 'https://keycloak/token')
+    key_b = token_cache.token_cache_key('b', 'https://keycloak/token')
+
+    assert token_cache.cached_token(key_a, lambda: token_a) == token_a
+    assert token_cache.cached_token(key_b, lambda: token_b) == token_b
+
+
+def test_concurrent_callers_fetch_once():
+    token = make_token(3600)
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.1)
+        return token
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(token_cache.cached_token('p@url', fetch)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [token] * 8
+    assert len(fetches) == 1
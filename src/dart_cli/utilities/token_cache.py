@@ -0,0 +1,102 @@
+import contextlib
+import json
+import os
+import time
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locking available (e.g., Windows): cache still works, but concurrent
+    # processes may each fetch their own token
+    fcntl = None
+
+
+TOKEN_CACHE_FILENAME = 'token-cache.json'
+
+# Tokens are treated as expired this many seconds before their exp claim, so that
+# a token is never sent when it is about to expire in flight
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+
+def token_cache_path() -> str:
+    return os.path.join(os.getenv('HOME'), '.dart', TOKEN_CACHE_FILENAME)
+
+
+def token_cache_key(profile_name: Optional[str], token_url: str) -> str:
+    profile = '' if profile_name is None else profile_name
+    return f'{profile}@{token_url}'
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Read the exp claim of a JWT without verifying it (None if it cannot be read)"""
+    import jwt
+    try:
+        claims = jwt.decode(token, options={'verify_signature': False})
+    except jwt.PyJWTError:
+        return None
+    return claims.get('exp')
+
+
+def is_token_fresh(token: str, margin: float = TOKEN_EXPIRY_MARGIN_SECONDS) -> bool:
+    expiry = token_expiry(token)
+    return expiry is not None and expiry - margin > time.time()
+
+
+@contextlib.contextmanager
+def locked_token_cache():
+    """
+    Hold an exclusive lock on the token cache while yielding its contents. Changes made
+    to the yielded dict are written back before the lock is released.
+    """
+    cache_path = token_cache_path()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(cache_path, 'rt') as cache_file:
+                    cache = json.loads(cache_file.read())
+            except (FileNotFoundError, json.JSONDecodeError):
+                cache = {}
+            original = dict(cache)
+
+            yield cache
+
+            if cache != original:
+                # Drop expired tokens so the cache does not grow without bound
+                cache = {key: tk for key, tk in cache.items() if is_token_fresh(tk, 0)}
+                tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'wt') as tmp_file:
+                    tmp_file.write(json.dumps(cache, indent=4))
+                os.replace(tmp_path, cache_path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def cached_token(key: str, fetch_token: Callable[[], Optional[str]], stale_token: str = None) -> Optional[str]:
+    """
+    Get a token from the cache, or fetch and cache a new one if there is no fresh token.
+    The cache stays locked during the fetch, so concurrent processes wait for a single
+    fetch instead of each making their own.
+    :param key: cache key (see token_cache_key)
+    :param fetch_token: retrieves a new token, returning None on failure
+    :param stale_token: a token known to be rejected; it is replaced even if it looks fresh,
+                        but a different token cached by another process is reused
+    """
+    with locked_token_cache() as cache:
+        token = cache.get(key)
+        if token is not None and token != stale_token and is_token_fresh(token):
+            return token
+        new_token = fetch_token()
+        if new_token is not None:
+            cache[key] = new_token
+        return new_token
+
+
+def store_token(key: str, token: str) -> None:
+    with locked_token_cache() as cache:
+        cache[key] = token